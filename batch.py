@@ -0,0 +1,98 @@
+import argparse
+from evo import batch
+
+
+def int_tuple(argument):
+    res = str(argument).split(",")
+    return (int(res[0]), int(res[1]))
+
+
+def sweep_values(argument):
+    # name=v1,v2,... (map sizes as WxH)
+    name, _, values = str(argument).partition("=")
+    if name not in batch.RUN_SWEEPS:
+        raise argparse.ArgumentTypeError("unknown parameter {!r} (one of: {})".format(
+            name, ", ".join(batch.RUN_SWEEPS)))
+    if name == "map":
+        return name, [int_tuple(v.replace("x", ",")) for v in values.split(",")]
+    return name, [float(v) if "." in v else int(v) for v in values.split(",")]
+
+
+# Basic arguments
+parser = argparse.ArgumentParser()
+# Map size
+parser.add_argument(
+    "--map",
+    required=False,
+    default="6,4",
+    type=int_tuple,
+    help='Map size in TILES: width,height')
+# Simulation backend
+parser.add_argument(
+    "--backend",
+    required=False,
+    default="sprite",
+    choices=("sprite", "array"),
+    help='Simulation backend (not region : runs already fill every CPU, its worker processes would only compete)')
+# Tick budget
+parser.add_argument(
+    "--ticks",
+    required=False,
+    default=10000,
+    type=int,
+    help='Maximum ticks per run (runs stop early on extinction)')
+# Seeds
+parser.add_argument(
+    "--seeds",
+    required=False,
+    default=4,
+    type=int,
+    help='Number of seeds per configuration')
+# Sweeps
+parser.add_argument(
+    "--sweep",
+    required=False,
+    default=[],
+    action='append',
+    type=sweep_values,
+    help='Swept parameter: name=v1,v2,... (e.g. decay=0.0005,0.001 or map=6x4,12x8), repeatable')
+# Workers
+parser.add_argument(
+    "--workers",
+    required=False,
+    default=None,
+    type=int,
+    help='Worker processes (defaults to CPU count)')
+# Cache
+parser.add_argument(
+    "--cache",
+    required=False,
+    default=".evo_cache",
+    help='Directory caching finished runs')
+# Output
+parser.add_argument(
+    "--output",
+    required=False,
+    default="batch.csv",
+    help='Aggregated CSV table')
+
+
+def main():
+    # Parse
+    args = parser.parse_args()
+    # Batch
+    configs = batch.sweep(
+        base={'map': args.map, 'backend': args.backend, 'ticks': args.ticks},
+        grid=dict(args.sweep),
+        seeds=args.seeds)
+    rows = list()
+    for result in batch.run_batch(configs, workers=args.workers, cache_dir=args.cache):
+        row = batch.summarize(result)
+        rows.append(row)
+        print(("[cached] " if result['cached'] else "") + batch.format_row(row), flush=True)
+    batch.write_table(rows, args.output)
+
+
+# Worker processes import this module : only the main process runs the batch
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import argparse
+from evo import bench
+
+
+# Basic arguments
+parser = argparse.ArgumentParser()
+# Scenarios
+parser.add_argument(
+    "--scenario",
+    required=False,
+    default=[],
+    action='append',
+    choices=list(bench.BENCH_SCENARIOS),
+    help='Scenario to run, repeatable (defaults to all)')
+# Backends
+parser.add_argument(
+    "--backend",
+    required=False,
+    default=[],
+    action='append',
+    choices=("sprite", "array"),
+    help='Backend to run, repeatable (defaults to both)')
+# Scaling curves switch
+parser.add_argument(
+    "--no-scaling",
+    required=False,
+    default=False,
+    action='store_true',
+    help='Skips scaling curves (ticks/sec vs. population)')
+# Quick switch
+parser.add_argument(
+    "--quick",
+    required=False,
+    default=False,
+    action='store_true',
+    help='Runs 10x fewer ticks')
+# Output
+parser.add_argument(
+    "--output",
+    required=False,
+    default="bench.json",
+    help='JSON report')
+# Comparison
+parser.add_argument(
+    "--compare",
+    required=False,
+    default=None,
+    help='Previous JSON report to compare against')
+# Benchmarks run in worker processes : guard the entry point.
+if __name__ == "__main__":
+    # Parse
+    args = parser.parse_args()
+
+    # Benchmark
+    results = bench.run_suite(
+        scenarios=args.scenario or None,
+        backends=args.backend or ("sprite", "array"),
+        scaling=not args.no_scaling,
+        ticks_ratio=0.1 if args.quick else 1,
+        report=lambda result: print(bench.format_result(result), flush=True))
+    bench.write(results, args.output)
+    if args.compare:
+        for line in bench.compare(bench.read(args.compare), results):
+            print(line)
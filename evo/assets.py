@@ -0,0 +1,74 @@
+import os
+import json
+import fnmatch
+import pathlib
+import numpy
+import pygame
+
+
+# Constants and Defaults
+ASSET_PACK_VERSION = 1
+ASSET_PACK_NAME = "assets.pack"
+ASSET_PACK_SOURCES = "*.bmp"
+
+# Pack file : one JSON index line (version, source names with their mtime and size, image name -> (offset, width,
+# height)), then every image as raw RGB rows. The pack is rebuilt whenever a source image changes.
+
+
+class AssetPack():
+
+    # Every source image decoded once into a single file : startup reads that file in one go and builds
+    # surfaces straight from its pixels, instead of opening and decoding each image.
+
+    def __init__(self, directory, path=None):
+        self.directory = pathlib.Path(directory)
+        self.path = self.directory / ASSET_PACK_NAME if path is None else pathlib.Path(path)
+        self.images, self.data = self.load()
+
+    def sources(self):
+        return {
+            p.name: [p.stat().st_mtime_ns, p.stat().st_size]
+            for p in sorted(self.directory.glob(ASSET_PACK_SOURCES)) if p.is_file()}
+
+    def load(self):
+        sources = self.sources()
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+            header_size = data.index(b"\n")
+            header = json.loads(data[:header_size])
+            if header['version'] == ASSET_PACK_VERSION and header['sources'] == sources:
+                return header['images'], memoryview(data)[header_size + 1:]
+        except (OSError, ValueError, KeyError):
+            pass
+        return self.build(sources)
+
+    def build(self, sources):
+        images, chunks, offset = dict(), list(), 0
+        for name in sources:
+            image = pygame.image.load(str(self.directory / name))
+            pixels = numpy.ascontiguousarray(pygame.surfarray.array3d(image).transpose(1, 0, 2)).tobytes()
+            images[name] = (offset, image.get_width(), image.get_height())
+            chunks.append(pixels)
+            offset += len(pixels)
+        data = b"".join(chunks)
+        header = json.dumps({'version': ASSET_PACK_VERSION, 'sources': sources, 'images': images}).encode()
+        # Written aside then swapped in (concurrent runs), kept in memory only if the directory is read-only
+        try:
+            temp_path = self.path.with_name("{}.{}.tmp".format(self.path.name, os.getpid()))
+            with open(temp_path, "wb") as f:
+                f.write(header + b"\n" + data)
+            os.replace(temp_path, self.path)
+        except OSError:
+            pass
+        return images, memoryview(data)
+
+    # ----- Lookups ----- #
+
+    def names(self, pattern):
+        return sorted(name for name in self.images if fnmatch.fnmatch(name, pattern))
+
+    def surface(self, name):
+        # Unconverted surface (converting requires a display), sharing the pack pixels
+        offset, width, height = self.images[name]
+        return pygame.image.frombuffer(self.data[offset:offset + width * height * 3], (width, height), "RGB")
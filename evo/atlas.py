@@ -0,0 +1,112 @@
+import numpy
+import pygame
+from evo import utils
+
+
+# Constants and Defaults
+ATLAS_PADDING = 1
+ATLAS_SIZE_STEPS = 100  # Size lookup table resolution (steps per size unit)
+DIET_HERBIVORE = 4  # Digestion at or below : herbivore sprites
+DIET_CARNIVORE = 6  # Digestion at or above : carnivore sprites
+DIET_HERBIVORE_INDEX, DIET_OMNIVORE_INDEX, DIET_CARNIVORE_INDEX = 0, 1, 2
+
+
+class SpriteAtlas():
+
+    # Every sprite packed into one colorkeyed sheet, with a pre-scaled sheet per zoom level.
+    # Sprites are plain ints : draw them with surface.blits([(atlas.sheet(zoom), dest, areas[sprite]), ...]).
+
+    def __init__(self, creature_images, fruit_images, size_range, zooms=(1,)):
+        # Sources (sprite -> surface)
+        self.images = list()
+        # - Fallback
+        default = pygame.Surface((10, 10))
+        default.fill((0, 0, 255))
+        self.default = self.add(default)
+        # - Fruits
+        self.fruits = {name: self.add(image) for name, image in fruit_images.items()}
+        # - Creatures : (size bucket, diet) -> sprite, buckets sorted by decreasing size threshold.
+        #   The last bucket (below every threshold) falls back on the default sprite.
+        self.thresholds = numpy.array([threshold for threshold, _ in creature_images], dtype=numpy.float64)
+        self.creature_sprites = numpy.array(
+            [[self.add(image) for image in images] for _, images in creature_images]
+            + [[self.default] * 3], dtype=numpy.int64)
+        # Size lookup : size step -> first bucket whose threshold is lower or equal
+        self.size_min, size_max = size_range
+        steps = self.size_min + numpy.arange(int((size_max - self.size_min) * ATLAS_SIZE_STEPS) + 2) / ATLAS_SIZE_STEPS
+        self.size_buckets = numpy.array([self._bucket(size) for size in steps], dtype=numpy.int64)
+        # Sheets (zoom -> (surface, areas))
+        self.sheets = dict()
+        for zoom in zooms:
+            self.sheet(zoom)
+
+    def add(self, image):
+        self.images.append(image)
+        return len(self.images) - 1
+
+    def _bucket(self, size):
+        for bucket, threshold in enumerate(self.thresholds):
+            if size >= threshold:
+                return bucket
+        return len(self.thresholds)
+
+    # ----- Lookups ----- #
+
+    @staticmethod
+    def diet(digestion):
+        if digestion >= DIET_CARNIVORE:
+            return DIET_CARNIVORE_INDEX
+        if digestion <= DIET_HERBIVORE:
+            return DIET_HERBIVORE_INDEX
+        return DIET_OMNIVORE_INDEX
+
+    def creature(self, size, digestion):
+        # Table lookup on the step below [size], then one step up if a threshold lies in between
+        step = min(max(int((size - self.size_min) * ATLAS_SIZE_STEPS), 0), len(self.size_buckets) - 1)
+        bucket = self.size_buckets[step]
+        if bucket and size >= self.thresholds[bucket - 1]:
+            bucket -= 1
+        return int(self.creature_sprites[bucket, self.diet(digestion)])
+
+    def creatures(self, sizes, digestions):
+        # Vectorized creature()
+        steps = ((sizes - self.size_min) * ATLAS_SIZE_STEPS).astype(numpy.int64)
+        buckets = self.size_buckets[numpy.clip(steps, 0, len(self.size_buckets) - 1)]
+        buckets[(buckets > 0) & (sizes >= self.thresholds[buckets - 1])] -= 1
+        diets = numpy.full(len(sizes), DIET_OMNIVORE_INDEX, dtype=numpy.int64)
+        diets[digestions >= DIET_CARNIVORE] = DIET_CARNIVORE_INDEX
+        diets[digestions <= DIET_HERBIVORE] = DIET_HERBIVORE_INDEX
+        return self.creature_sprites[buckets, diets]
+
+    def fruit(self, name):
+        return self.fruits.get(name, self.default)
+
+    def image(self, sprite):
+        return self.images[sprite]
+
+    # ----- Sheets ----- #
+
+    def sheet(self, zoom):
+        # (surface, areas) of the sheet scaled to [zoom], built on first use
+        sheet = self.sheets.get(zoom)
+        if sheet is None:
+            sheet = self.sheets[zoom] = self.build(zoom)
+        return sheet
+
+    def build(self, zoom):
+        # Sprites are scaled one by one (nearest-neighbour : colorkey stays clean), then packed on one row.
+        images = [
+            image if zoom == 1 else pygame.transform.scale(image, (
+                max(round(image.get_width()*zoom), 1), max(round(image.get_height()*zoom), 1)))
+            for image in self.images]
+        surface = pygame.Surface((
+            sum(image.get_width() + ATLAS_PADDING for image in images),
+            max(image.get_height() for image in images)))
+        surface.fill(utils.ALPHA_COLOR)
+        areas = list()
+        x = 0
+        for image in images:
+            areas.append(surface.blit(image, (x, 0)))
+            x += image.get_width() + ATLAS_PADDING
+        surface.set_colorkey(utils.ALPHA_COLOR)
+        return surface.convert(), areas
@@ -0,0 +1,125 @@
+import csv
+import json
+import hashlib
+import pathlib
+import itertools
+import concurrent.futures
+from evo import dna
+from evo.node import Creature
+
+
+# Constants and Defaults
+RUN_DEFAULTS = {
+    'map': (6, 4),
+    'backend': "sprite",
+    'ticks': 10000,
+    'seed': 0,
+    'creatures_start': None,
+    'fruits_start': None,
+    'fruits_chance': None,
+    'fruits_max': None,
+    'decay': Creature.DECAY,
+    'mutation_ratio': dna.Gene.MUTATION_RATIO,  # Genes defining their own ratio (Perception) keep it
+}
+RUN_GENES = ('size', 'speed', 'perception', 'digestion')
+RUN_SWEEPS = tuple(name for name in RUN_DEFAULTS if name != 'seed')  # Seeds come from sweep(seeds=...)
+
+
+# ----- Runs ----- #
+
+def run_config(config):
+    # Executed in worker processes : class-level settings are (re)applied on every run,
+    # as pool workers are reused.
+    from evo.engine import Engine
+    config = dict(RUN_DEFAULTS, **config)
+    Creature.DECAY = config['decay']
+    dna.Gene.MUTATION_RATIO = config['mutation_ratio']
+    engine = Engine(map_tiles=config['map'], headless=True, backend=config['backend'], seed=config['seed'])
+    stats = engine.simulate(
+        creatures_start=config['creatures_start'],
+        fruits_start=config['fruits_start'],
+        fruits_chance=config['fruits_chance'],
+        fruits_max=config['fruits_max'],
+        quit_on_extinct=True,
+        ticks=config['ticks'])
+    engine.cleanup()
+    return {'config': config, 'stats': stats, 'extinct': stats['creatures'] == 0}
+
+
+def config_key(config):
+    config = dict(RUN_DEFAULTS, **config)
+    return hashlib.sha1(json.dumps(config, sort_keys=True).encode()).hexdigest()
+
+
+def sweep(base=None, grid=None, seeds=1):
+    # Cartesian product of [grid] values (param -> list of values) over [seeds], on top of [base].
+    base = dict() if base is None else base
+    grid = dict() if grid is None else grid
+    # Unknown names would be ignored by runs, yet still change their cache key
+    unknown = set(base).union(grid).difference(RUN_SWEEPS)
+    if unknown:
+        raise ValueError("Unknown run parameters: {}".format(", ".join(sorted(unknown))))
+    names = list(grid)
+    for values in itertools.product(*(grid[name] for name in names)):
+        for seed in range(seeds):
+            yield dict(base, seed=seed, **dict(zip(names, values)))
+
+
+def run_batch(configs, workers=None, cache_dir=None):
+    # Yields run results as they complete, cached ones first.
+    cache_dir = None if cache_dir is None else pathlib.Path(cache_dir)
+    if cache_dir:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+    pending = dict()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        for config in configs:
+            key = config_key(config)
+            cache_file = cache_dir / "{}.json".format(key) if cache_dir else None
+            if cache_file and cache_file.is_file():
+                with open(cache_file, "r") as f:
+                    yield dict(json.load(f), cached=True)
+                continue
+            pending[pool.submit(run_config, config)] = cache_file
+        for future in concurrent.futures.as_completed(pending):
+            result = future.result()
+            cache_file = pending[future]
+            if cache_file:
+                with open(cache_file, "w") as f:
+                    json.dump(result, f)
+            yield dict(result, cached=False)
+
+
+# ----- Aggregation ----- #
+
+def summarize(result):
+    # One flat table row per run
+    config, stats = result['config'], result['stats']
+    row = {name: value for name, value in config.items() if name != 'map'}
+    row['map'] = "{}x{}".format(*config['map'])
+    row.update({
+        'extinct': result['extinct'],
+        'time': stats['time'],
+        'tps': stats['tps'],
+        'creatures': stats['creatures'],
+        'fruits': stats['fruits'],
+        'births': stats['births'],
+        'deaths': stats['deaths'],
+        'generation': stats['generation']
+    })
+    for gene in RUN_GENES:
+        row[gene] = round(stats[gene][0], 3)
+    return row
+
+
+def write_table(rows, path):
+    rows = list(rows)
+    if not rows:
+        return
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def format_row(row):
+    return " ".join("{}={}".format(name, value) for name, value in row.items())
@@ -0,0 +1,152 @@
+import sys
+import time
+import json
+import platform
+import resource
+import subprocess
+import concurrent.futures
+import numpy
+import pygame
+
+
+# Constants and Defaults
+# - Fixed-seed scenarios : name -> engine / simulate settings
+BENCH_SCENARIOS = {
+    'default': {'map': (6, 4), 'ticks': 2000},
+    'large': {'map': (32, 32), 'ticks': 300},
+    'stress': {'map': (32, 32), 'ticks': 50, 'creatures_start': 10000},
+}
+BENCH_SCALING = (500, 1000, 2000, 4000, 8000)
+BENCH_SCALING_MAP = (32, 32)
+BENCH_SCALING_TICKS = 30
+BENCH_SEED = 0
+BENCH_WARMUP = 5
+
+
+# ----- Runs ----- #
+
+def peak_memory():
+    # Peak resident set size, in KB (ru_maxrss is in bytes on macOS)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def run_scenario(name, backend, settings):
+    # Executed in a fresh process : peak memory and class-level state are per scenario.
+    from evo.engine import Engine, ENGINE_PHASES
+    engine = Engine(map_tiles=settings['map'], headless=True, backend=backend, seed=BENCH_SEED)
+    engine.populate(creatures_start=settings.get('creatures_start'))
+    creatures_start = engine.creature_count()
+    # Warm up (caches, first allocations)
+    for _ in range(BENCH_WARMUP):
+        engine.step()
+    # Timed ticks, phase by phase
+    phases = {phase: 0 for phase in ENGINE_PHASES}
+    phase_methods = [(phase, getattr(engine, "phase_{}".format(phase))) for phase in ENGINE_PHASES]
+    ticks = 0
+    time_start = time.perf_counter()
+    while ticks < settings['ticks'] and engine.creature_count():
+        for phase, method in phase_methods:
+            phase_start = time.perf_counter()
+            method()
+            phases[phase] += time.perf_counter() - phase_start
+        engine.time += 1
+        ticks += 1
+    elapsed = time.perf_counter() - time_start
+    result = {
+        'scenario': name,
+        'backend': backend,
+        'map': list(settings['map']),
+        'creatures_start': creatures_start,
+        'creatures_end': engine.creature_count(),
+        'ticks': ticks,
+        'elapsed': round(elapsed, 4),
+        'tps': round(ticks / elapsed, 2) if elapsed > 0 else 0,
+        'phases_ms': {phase: round(1000 * total / max(ticks, 1), 4) for phase, total in phases.items()},
+        'peak_memory_kb': peak_memory()
+    }
+    engine.cleanup()
+    return result
+
+
+def run_isolated(name, backend, settings):
+    # One short-lived worker per scenario (callers must guard their entry point for spawn platforms)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=1) as pool:
+        return pool.submit(run_scenario, name, backend, settings).result()
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': numpy.__version__,
+        'pygame': pygame.version.ver,
+        'machine': platform.machine(),
+        'time': time.strftime("%Y-%m-%dT%H:%M:%S")
+    }
+
+
+def run_suite(scenarios=None, backends=("sprite", "array"), scaling=True, ticks_ratio=1, report=None):
+    # [ticks_ratio] shrinks tick counts (quick runs), [report] is called with each result as it comes.
+    scenarios = list(BENCH_SCENARIOS) if scenarios is None else scenarios
+    results = {'environment': environment(), 'scenarios': list(), 'scaling': list()}
+    for name in scenarios:
+        settings = dict(BENCH_SCENARIOS[name])
+        settings['ticks'] = max(1, int(settings['ticks'] * ticks_ratio))
+        for backend in backends:
+            result = run_isolated(name, backend, settings)
+            results['scenarios'].append(result)
+            if report:
+                report(result)
+    if scaling:
+        for backend in backends:
+            for population in BENCH_SCALING:
+                settings = {
+                    'map': BENCH_SCALING_MAP,
+                    'ticks': max(1, int(BENCH_SCALING_TICKS * ticks_ratio)),
+                    'creatures_start': population
+                }
+                result = run_isolated("scaling", backend, settings)
+                results['scaling'].append(result)
+                if report:
+                    report(result)
+    return results
+
+
+# ----- Reports ----- #
+
+def format_result(result):
+    return "{:<8} {:<6} map={}x{} creatures={:>6} ticks={:>5} tps={:>9} peak={:>7}KB  {}".format(
+        result['scenario'], result['backend'], *result['map'], result['creatures_start'], result['ticks'],
+        result['tps'], result['peak_memory_kb'],
+        " ".join("{}={}ms".format(phase, ms) for phase, ms in result['phases_ms'].items()))
+
+
+def compare(old, new):
+    # Yields one line per scenario / population found in both reports : tps ratio new/old.
+    def index(results):
+        return {
+            (r['scenario'], r['backend'], r['creatures_start'] if r['scenario'] == "scaling" else None): r
+            for r in results['scenarios'] + results['scaling']}
+    old_index, new_index = index(old), index(new)
+    for key, new_result in new_index.items():
+        old_result = old_index.get(key)
+        if old_result and old_result['tps']:
+            yield "{:<8} {:<6} {:>6}  tps {:>9} -> {:>9}  x{:.2f}".format(
+                key[0], key[1], key[2] or "", old_result['tps'], new_result['tps'],
+                new_result['tps'] / old_result['tps'])
+
+
+def write(results, path):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+
+
+def read(path):
+    with open(path, "r") as f:
+        return json.load(f)
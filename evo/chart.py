@@ -7,103 +7,158 @@ CHART_BACKGROUND = (192, 192, 192)
 CHART_ALPHA = 192
 CHART_LINE_COLOR = (0, 0, 255)
 CHART_AREA_COLOR = (64, 128, 255)
+CHART_HEADROOM = 0.1  # Free bounds are padded, so most new points fit without a full redraw...
+CHART_SHRINK = 0.5  # ...and only shrink back once data spans less than this share of them.
 
 
-# Initialize
-pygame.init()
+class Plot():
+
+    # Rendering state of one metric. The [layer] only holds the plot itself and is updated
+    # incrementally (scrolled, new segments appended), labels are composed on top into [surface].
+
+    def __init__(self, vmin, vmax):
+        self.vmin = vmin
+        self.vmax = vmax
+        self.bounds = None
+        self.layer = None
+        self.surface = None
+        self.rendered = 0  # Data points currently drawn on [layer]
+        self.pending = 0  # Data points added since
+
+    def fits(self, data):
+        return all(self.bounds[0] <= v <= self.bounds[1] for dp in data for v in dp)
 
 
 class Chart():
 
+    # Charts are rendered lazily : data points are only drawn when the metric's surface is requested.
+
     def __init__(self, size, history=100):
         # Config
         self.size = utils.Int2D(*size)
         self.history = history
+        # Fixed point spacing : once history is full, every new point scrolls the plot by one slot.
+        self.slot = max(1, self.size.x // max(history - 1, 1))
         # Internals
         self.metrics = list()
         self.data = dict()
         self.plots = dict()
         self.active = self._cycle()
-        # Initialize
-        self.redraw()
 
     def add_metric(self, name, vmin=None, vmax=None):
         self.metrics.append((name, vmin, vmax))
         self.data[name] = collections.deque(maxlen=self.history)
-        self.plots[name] = pygame.Surface(self.size.xy)
+        self.plots[name] = Plot(vmin, vmax)
 
     def add_data(self, data):
         for metric_name, _, _ in self.metrics:
             self.data[metric_name].append(data.get(metric_name, (0,)))
-        self.redraw()
-
-    def redraw(self):
-        for metric_name, vmin, vmax in self.metrics:
-            # Fetch metric data
-            data = self.data[metric_name]
-            # Reset background and alpha
-            self.plots[metric_name].fill(CHART_BACKGROUND)
-            self.plots[metric_name].set_alpha(CHART_ALPHA)
-            # Not enough data, render placeholder text and quit
-            if len(data) < 3:
-                self.plots[metric_name].blit(
-                    source=utils.gui_text("{} (not enough data)".format(metric_name), bg=CHART_BACKGROUND),
-                    dest=(int(0.5*self.size.x-60), int(0.5*self.size.y)))
-                continue
-            # Draw chart
-            # TODO : Optimize...
-            # - Data bounds
-            slot_x = self.size.x/(len(data)-1)
-            plot_min = min(min(dp) for dp in data) if vmin is None else vmin
-            plot_max = max(max(dp) for dp in data) if vmax is None else vmax
-            # - Charts
-            mid0 = utils.Int2D(0, self.size.y - utils.scale(data[0][0], plot_min, plot_max, 0, self.size.y))
-            for i in range(1, len(data)):
-                pos_x = i*slot_x
-                # Area-chart
-                try:
-                    low1 = max(self.size.y - utils.scale(data[i][1], plot_min, plot_max, 0, self.size.y), mid0.y)
-                    high1 = min(self.size.y - utils.scale(data[i][2], plot_min, plot_max, 0, self.size.y), mid0.y)
-                    pygame.draw.rect(
-                        self.plots[metric_name],
-                        CHART_AREA_COLOR,
-                        pygame.Rect((pos_x-slot_x, high1), (slot_x+1, low1-high1+1))
-                    )
-                except IndexError:
-                    pass
-                # Line-chart
-                mid1 = utils.Int2D(pos_x, self.size.y - utils.scale(data[i][0], plot_min, plot_max, 0, self.size.y))
-                pygame.draw.line(self.plots[metric_name], CHART_LINE_COLOR, mid0.xy, mid1.xy, 1)
-                # Reset to next
-                mid0 = mid1
-            # Chart title
-            self.plots[metric_name].blit(
-                source=utils.gui_text(metric_name, bg=CHART_BACKGROUND),
-                dest=(int(0.5*self.size.x-30), 10)
-            )
-            # Y-min
-            self.plots[metric_name].blit(
-                source=utils.gui_text(round(plot_min, 2), bg=CHART_BACKGROUND),
-                dest=(10, self.size.y-15)
-            )
-            # Y-max
-            self.plots[metric_name].blit(
-                source=utils.gui_text(round(plot_max, 2), bg=CHART_BACKGROUND),
-                dest=(10, 10)
-            )
-            # Y-latest
-            _latest = utils.gui_text(
-                text=round(data[-1][0], 2),
-                fg=CHART_LINE_COLOR,
-                bg=CHART_BACKGROUND
-            )
-            self.plots[metric_name].blit(
-                source=_latest,
-                dest=(self.size.x-(_latest.get_width()+5), max(mid0.y-_latest.get_height(), 5))
-            )
+            self.plots[metric_name].pending += 1
+
+    def surface(self, metric_name) -> pygame.Surface:
+        plot = self.plots[metric_name]
+        if plot.surface is None or plot.pending:
+            self.render(metric_name)
+        return plot.surface
+
+    # ----- Rendering ----- #
+
+    def render(self, metric_name):
+        data = self.data[metric_name]
+        plot = self.plots[metric_name]
+        if plot.layer is None:
+            plot.layer = pygame.Surface(self.size.xy)
+            plot.surface = pygame.Surface(self.size.xy)
+            plot.surface.set_alpha(CHART_ALPHA)
+        # Not enough data, render placeholder text
+        if len(data) < 3:
+            plot.surface.fill(CHART_BACKGROUND)
+            plot.surface.blit(
+                source=utils.gui_text("{} (not enough data)".format(metric_name), bg=CHART_BACKGROUND),
+                dest=(int(0.5*self.size.x-60), int(0.5*self.size.y)))
+            return
+        # Plot : appended to if possible, redrawn otherwise
+        dropped = max(plot.rendered + plot.pending - self.history, 0)
+        new_data = list(data)[-plot.pending-1:] if plot.pending else list()
+        if (plot.bounds is None or plot.rendered - dropped < 2 or not plot.fits(new_data)
+                or self.shrinkable(plot, data)):
+            self.rebound(plot, data)
+            self.redraw(plot, data)
+        elif plot.pending:
+            self.append(plot, new_data, plot.rendered - dropped - 1, dropped)
+        plot.rendered, plot.pending = len(data), 0
+        # Labels
+        self.compose(metric_name, plot, data)
+
+    def shrinkable(self, plot, data):
+        if plot.vmin is not None and plot.vmax is not None:
+            return False
+        data_min, data_max = min(min(dp) for dp in data), max(max(dp) for dp in data)
+        return (data_max - data_min) < CHART_SHRINK * (plot.bounds[1] - plot.bounds[0])
+
+    def rebound(self, plot, data):
+        data_min = min(min(dp) for dp in data) if plot.vmin is None else plot.vmin
+        data_max = max(max(dp) for dp in data) if plot.vmax is None else plot.vmax
+        headroom = CHART_HEADROOM * ((data_max - data_min) or 1)
+        plot.bounds = (
+            data_min if plot.vmin is not None else data_min - headroom,
+            data_max if plot.vmax is not None else data_max + headroom)
+
+    def y(self, plot, value):
+        return self.size.y - utils.scale(value, plot.bounds[0], plot.bounds[1], 0, self.size.y)
+
+    def draw(self, plot, data, x0):
+        # Area (quantiles band) as one polygon, line (median) as one polyline
+        xs = [x0 + i*self.slot for i in range(len(data))]
+        if all(len(dp) > 2 for dp in data):
+            pygame.draw.polygon(plot.layer, CHART_AREA_COLOR, (
+                [(x, self.y(plot, dp[2])) for x, dp in zip(xs, data)]
+                + [(x, self.y(plot, dp[1])) for x, dp in zip(reversed(xs), reversed(data))]))
+        pygame.draw.lines(plot.layer, CHART_LINE_COLOR, False, [(x, self.y(plot, dp[0])) for x, dp in zip(xs, data)])
+
+    def redraw(self, plot, data):
+        plot.layer.fill(CHART_BACKGROUND)
+        self.draw(plot, list(data), 0)
+
+    def append(self, plot, new_data, last, dropped):
+        # [new_data] starts with the last point already drawn, found at slot [last] once scrolled.
+        if dropped:
+            plot.layer.scroll(dx=-dropped*self.slot)
+        x0 = last * self.slot
+        plot.layer.fill(CHART_BACKGROUND, pygame.Rect(x0+1, 0, self.size.x-x0-1, self.size.y))
+        self.draw(plot, new_data, x0)
+
+    def compose(self, metric_name, plot, data):
+        plot_min, plot_max = plot.bounds
+        plot.surface.blit(plot.layer, (0, 0))
+        # Chart title
+        plot.surface.blit(
+            source=utils.gui_text(metric_name, bg=CHART_BACKGROUND),
+            dest=(int(0.5*self.size.x-30), 10)
+        )
+        # Y-min
+        plot.surface.blit(
+            source=utils.gui_text(round(plot_min, 2), bg=CHART_BACKGROUND),
+            dest=(10, self.size.y-15)
+        )
+        # Y-max
+        plot.surface.blit(
+            source=utils.gui_text(round(plot_max, 2), bg=CHART_BACKGROUND),
+            dest=(10, 10)
+        )
+        # Y-latest
+        _latest = utils.gui_text(
+            text=round(data[-1][0], 2),
+            fg=CHART_LINE_COLOR,
+            bg=CHART_BACKGROUND
+        )
+        plot.surface.blit(
+            source=_latest,
+            dest=(self.size.x-(_latest.get_width()+5), max(self.y(plot, data[-1][0])-_latest.get_height(), 5))
+        )
 
     def _cycle(self):
         while True:
             yield None
             for metric_name, _, _ in self.metrics:
-                yield self.plots[metric_name]
+                yield metric_name
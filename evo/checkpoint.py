@@ -0,0 +1,295 @@
+import io
+import os
+import json
+import operator
+import itertools
+import threading
+import numpy
+import pygame
+from evo import dna
+from evo import task
+from evo.node import Node, Creature, Fruit, Exploration, Escape
+
+
+# Constants and Defaults
+CHECKPOINT_VERSION = 1
+TASKS = (None, task.Wean, task.Gestate, task.Consume, task.Drink)
+TARGETS = (None, Exploration, Escape, Fruit, Creature)
+FRUITS = tuple(Fruit.__subclasses__())
+GENES = dna.GENOME
+
+# Checkpoints are NumPy .npz archives (zip, deflate) : one array per column, plus a JSON [header]
+# holding scalars (time, counters, random states). Loading never unpickles anything.
+
+
+# ----- Files ----- #
+
+def write(path, header, arrays):
+    buffer = io.BytesIO()
+    numpy.savez_compressed(buffer, header=numpy.frombuffer(json.dumps(header).encode(), dtype=numpy.uint8), **arrays)
+    # Atomic replace : a crash while writing never corrupts the previous checkpoint.
+    path_tmp = "{}.tmp".format(path)
+    with open(path_tmp, "wb") as f:
+        f.write(buffer.getvalue())
+    os.replace(path_tmp, path)
+
+
+def read_header(path):
+    with numpy.load(path, allow_pickle=False) as data:
+        return json.loads(data['header'].tobytes())
+
+
+def read(path):
+    with numpy.load(path, allow_pickle=False) as data:
+        return json.loads(data['header'].tobytes()), {name: data[name] for name in data.files if name != 'header'}
+
+
+class Autosaver():
+
+    # Writes snapshots from a background thread, so the simulation loop only pays for the snapshot.
+    # A snapshot is skipped if the previous one is still being written.
+
+    def __init__(self, path):
+        self.path = path
+        self.thread = None
+
+    def save(self, header, arrays):
+        if self.thread and self.thread.is_alive():
+            return False
+        self.thread = threading.Thread(target=write, args=(self.path, header, arrays), daemon=True)
+        self.thread.start()
+        return True
+
+    def close(self):
+        if self.thread:
+            self.thread.join()
+
+
+# ----- Snapshots ----- #
+
+def next_node_id():
+    # Peek at Node.id_tracker without consuming an id
+    next_id = next(Node.id_tracker)
+    Node.id_tracker = itertools.count(next_id)
+    return next_id
+
+
+def snapshot(engine):
+    header = {
+        'version': CHECKPOINT_VERSION,
+        'backend': engine.backend,
+        'map_tiles': engine.map_tiles.xy,
+        'seed': engine.rng.seed,
+        'rng': engine.rng.getstate(),
+        'time': engine.time,
+        'elapsed': engine.elapsed,
+        'births': engine.births,
+        'deaths': engine.deaths,
+        'speed': engine.speed,
+        'next_id': next_node_id(),
+        'lineage': engine.lineage.mark()
+    }
+    arrays = {'world_layout': numpy.array(engine.world_layout, dtype=numpy.float64)}
+    if engine.array_world:
+        header['array'], array_columns = engine.array_world.state()
+        arrays.update({"array.{}".format(name): column for name, column in array_columns.items()})
+    else:
+        arrays.update(snapshot_fruits(engine))
+        arrays.update(snapshot_creatures(engine))
+    arrays.update(snapshot_lineage(engine))
+    return header, arrays
+
+
+def snapshot_lineage(engine):
+    # Living creatures' records (the dead are flushed to the archive, if any, by Lineage.mark)
+    living = engine.lineage.living
+    return {
+        'lineage.id': numpy.array(list(living), dtype=numpy.int64),
+        'lineage.parent': numpy.array([r[0] for r in living.values()], dtype=numpy.int64),
+        'lineage.generation': numpy.array([r[1] for r in living.values()], dtype=numpy.int64),
+        'lineage.birth': numpy.array([r[2] for r in living.values()], dtype=numpy.int64),
+        'lineage.genome': numpy.array([r[3] for r in living.values()], dtype=numpy.float64).reshape(
+            -1, len(engine.lineage.genes))
+    }
+
+
+def snapshot_fruits(engine):
+    fruits = list(engine.fruits)
+    return {
+        'fruit.id': numpy.array([f.id for f in fruits], dtype=numpy.int64),
+        'fruit.kind': numpy.array([FRUITS.index(type(f)) for f in fruits], dtype=numpy.int8),
+        'fruit.position': numpy.array([f.position.xy for f in fruits], dtype=numpy.float64).reshape(-1, 2),
+        'fruit.nutrition': numpy.array([f.nutrition for f in fruits], dtype=numpy.float64)
+    }
+
+
+def target_kind(target):
+    for kind, cls in enumerate(TARGETS):
+        if cls and isinstance(target, cls):
+            return kind
+    return 0
+
+
+def snapshot_creatures(engine):
+    creatures = list(engine.creatures)
+    waypoints = [wp for c in creatures for wp in c.waypoints]
+    # Update order : rank among awake creatures, or in the scheduler for asleep ones
+    order = {c: i for i, c in enumerate(engine.scheduler.items())}
+    order.update((c, i) for i, c in enumerate(engine.awake))
+    return {
+        'creature.id': numpy.array([c.id for c in creatures], dtype=numpy.int64),
+        'creature.parent': numpy.array([c.parent_id for c in creatures], dtype=numpy.int64),
+        'creature.generation': numpy.array([c.generation for c in creatures], dtype=numpy.int64),
+        'creature.position': numpy.array([c.position.xy for c in creatures], dtype=numpy.float64).reshape(-1, 2),
+        'creature.genes': numpy.array(
+            [[getattr(c, name).value for name, _ in GENES] for c in creatures], dtype=numpy.float64).reshape(-1, 4),
+        'creature.age': numpy.array([c.age for c in creatures], dtype=numpy.int64),
+        'creature.energy': numpy.array([c.energy for c in creatures], dtype=numpy.float64),
+        'creature.nutrition': numpy.array([c.nutrition for c in creatures], dtype=numpy.float64),
+        'creature.incapacitated': numpy.array([c.incapacitated for c in creatures], dtype=bool),
+        'creature.task': numpy.array(
+            [TASKS.index(type(c.task)) if c.task else 0 for c in creatures], dtype=numpy.int8),
+        'creature.timer': numpy.array([c.task.timer if c.task else 0 for c in creatures], dtype=numpy.float64),
+        'creature.target': numpy.array([target_kind(c.target) for c in creatures], dtype=numpy.int8),
+        'creature.target_id': numpy.array([c.target.id if c.target else -1 for c in creatures], dtype=numpy.int64),
+        'creature.target_position': numpy.array(
+            [c.target.position.xy if c.target else (0, 0) for c in creatures], dtype=numpy.float64).reshape(-1, 2),
+        'creature.order': numpy.array([order.get(c, -1) for c in creatures], dtype=numpy.int64),
+        # Asleep creatures are only aged on wake up : saved as they are, with the ticks they slept and will wake at
+        'creature.slept': numpy.array([-1 if c.slept is None else c.slept for c in creatures], dtype=numpy.int64),
+        'creature.wakes': numpy.array([-1 if c.wakes is None else c.wakes for c in creatures], dtype=numpy.int64),
+        'creature.waypoints_count': numpy.array([len(c.waypoints) for c in creatures], dtype=numpy.int64),
+        'creature.waypoints': numpy.array(waypoints, dtype=numpy.float64).reshape(-1, 2)
+    }
+
+
+# ----- Restore ----- #
+
+def restore(engine, header, arrays):
+    if header['version'] != CHECKPOINT_VERSION:
+        raise ValueError("Unsupported checkpoint version: {}".format(header['version']))
+    if header['backend'] != engine.backend or tuple(header['map_tiles']) != engine.map_tiles.xy:
+        raise ValueError("Checkpoint was made for a {} map with the {} backend".format(
+            "x".join(map(str, header['map_tiles'])), header['backend']))
+    # World
+    engine.world_layout = [
+        tuple(int(v) for v in row[:6]) + tuple(row[6:]) for row in arrays['world_layout'].tolist()]
+    if not engine.headless:
+        engine.renderer.clear()
+    # Lifeforms
+    engine.selected = None
+    if engine.array_world:
+        engine.array_world.load_state(header['array'], {
+            name[len("array."):]: column for name, column in arrays.items() if name.startswith("array.")})
+    else:
+        for lf in list(engine.lifeforms):
+            lf.kill()
+        engine.scheduler.clear()
+        fruits = restore_fruits(engine, arrays)
+        restore_creatures(engine, arrays, fruits)
+        engine.population.reset([c.genome for c in engine.creatures])
+    # Engine
+    engine.time = header['time']
+    engine.elapsed = header['elapsed']
+    engine.births = header['births']
+    engine.deaths = header['deaths']
+    engine.speed = header['speed']
+    engine.rng.seed = header['seed']
+    engine.rng.setstate(header['rng'])
+    Node.id_tracker = itertools.count(header['next_id'])
+    # Lineage : living creatures only (the dead were archived, if kept at all, when the checkpoint was written)
+    engine.lineage.reset(lineage_records(engine, arrays))
+    engine.lineage.rewind(header.get('lineage'))
+    if engine.telemetry:
+        engine.telemetry.resume(engine.time)
+    # Awake creatures and the scheduler are refilled in their saved order
+    if not engine.array_world:
+        restore_order(engine, arrays)
+
+
+def lineage_records(engine, arrays):
+    # (id, parent, generation, birth, genome) of living creatures (checkpoints without them : rebuilt from ages)
+    if 'lineage.id' in arrays:
+        return zip(*(arrays["lineage.{}".format(name)].tolist() for name in (
+            'id', 'parent', 'generation', 'birth', 'genome')))
+    if engine.array_world:
+        return engine.array_world.lineage_records(engine.time)
+    return [(c.id, c.parent_id, c.generation, engine.time - c.age, c.genome) for c in engine.creatures]
+
+
+def restore_order(engine, arrays):
+    # Creatures are updated, and woken up, in the order they were when saved (checkpoints without it : row order).
+    # Asleep creatures go back to the scheduler as they were (checkpoints without it : timed tasks, as of the
+    # last tick).
+    creatures = list(engine.creatures)
+    order = arrays['creature.order'].tolist() if 'creature.order' in arrays else range(len(creatures))
+    slept = arrays['creature.slept'].tolist() if 'creature.slept' in arrays else None
+    wakes = arrays['creature.wakes'].tolist() if 'creature.wakes' in arrays else None
+    engine.awake.empty()
+    for _, index, creature in sorted(zip(order, itertools.count(), creatures), key=operator.itemgetter(0, 1)):
+        if slept is not None:
+            if slept[index] >= 0:
+                creature.slept, creature.wakes = slept[index], wakes[index]
+                engine.scheduler.schedule(creature.wakes, creature)
+            else:
+                creature.add(engine.awake)
+        elif creature.task and creature.task.timed:
+            creature.sleep(engine.time - 1)
+        else:
+            creature.add(engine.awake)
+
+
+def restore_node(node, node_id):
+    node.id = node_id
+
+
+def restore_fruits(engine, arrays):
+    fruits = dict()
+    for fruit_id, kind, position, nutrition in zip(
+            arrays['fruit.id'].tolist(), arrays['fruit.kind'].tolist(),
+            arrays['fruit.position'].tolist(), arrays['fruit.nutrition'].tolist()):
+        fruit = FRUITS[kind](engine, position=pygame.Vector2(position))
+        fruit.nutrition = nutrition
+        restore_node(fruit, fruit_id)
+        fruits[fruit_id] = fruit
+    return fruits
+
+
+def restore_creatures(engine, arrays, fruits):
+    creatures = dict()
+    columns = {name[len("creature."):]: column.tolist() for name, column in arrays.items()
+               if name.startswith("creature.")}
+    # Waypoints are only recorded for the selected creature, and selection is not restored
+    rows = [dict(zip(columns, values)) for values in zip(*(
+        columns[name] for name in columns if name != 'waypoints'))]
+    for row in rows:
+        creature = Creature(engine, position=pygame.Vector2(row['position']), genome=row['genes'])
+        creature.parent_id = row['parent']
+        creature.generation = row['generation']
+        creature.age = row['age']
+        creature.energy = row['energy']
+        creature.nutrition = row['nutrition']
+        creature.incapacitated = row['incapacitated']
+        creature.refresh()
+        restore_node(creature, row['id'])
+        creatures[row['id']] = creature
+    # Links (tasks, targets) once every creature exists
+    for row in rows:
+        creature = creatures[row['id']]
+        # - Task
+        task_class = TASKS[row['task']]
+        if task_class is task.Gestate:
+            creature.task = task_class(timer=row['timer'], action=creature.reproduce)
+        elif task_class is task.Consume:
+            creature.task = task_class(timer=row['timer'], update=creature.consume_target)
+        elif task_class is not None:
+            creature.task = task_class(timer=row['timer'])
+        # - Target
+        target_class = TARGETS[row['target']]
+        if target_class is Fruit:
+            creature.target = fruits.get(row['target_id'])
+        elif target_class is Creature:
+            creature.target = creatures.get(row['target_id'])
+        elif target_class is not None:
+            creature.target = target_class(engine, position=pygame.Vector2(row['target_position']))
+    return creatures
@@ -0,0 +1,248 @@
+import json
+import math
+import queue
+import asyncio
+import threading
+from evo import checkpoint
+
+
+# Constants and Defaults
+CONTROL_BINS = 32  # Histogram bins per gene in population snapshots (gene statistics bins are summed down to this)
+CONTROL_LINE_LIMIT = 2**16  # Longest request line, in bytes
+CONTROL_QUERIES = ('metrics', 'population', 'selected')
+CONTROL_COMMANDS = ('speed', 'pause', 'spawn', 'select', 'checkpoint')
+CONTROL_SPEED_MAX = 10**6  # Largest speed accepted (the engine clamps it further)
+CONTROL_SPAWN_MAX = 10**5  # Most lifeforms spawned by one command
+
+# Protocol : one JSON object per line each way. Requests : {"command": name, ...arguments, "id": optional},
+# replies : {"id": ..., "ok": true, "result": ...} or {"id": ..., "ok": false, "error": message}.
+# Queries are answered from the latest snapshot, commands are run by the engine between ticks.
+
+
+def parse_address(address):
+    # "host:port" (TCP) or a Unix socket path : (host, port or path)
+    host, _, port = address.rpartition(":")
+    if host and port.isdigit():
+        return host, int(port)
+    return None, address
+
+
+def integer(request, name, low, high):
+    # Whole number argument within [low, high] (finite, not a boolean)
+    value = request[name]
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value) \
+            or value != int(value) or not low <= value <= high:
+        raise ValueError("{} must be a whole number between {} and {}: {!r}".format(name, low, high, value))
+    return int(value)
+
+
+class ControlServer():
+
+    # Local asyncio server running in a background thread. The simulation loop never waits on it : once per
+    # frame, the engine runs the commands received so far and refreshes the snapshot queries are answered from,
+    # while each client is read and written by its own coroutine.
+
+    def __init__(self, address, bins=CONTROL_BINS):
+        # Config
+        self.host, self.port = parse_address(address)
+        self.bins = bins
+        # Internals
+        self.snapshot = {name: None for name in CONTROL_QUERIES}
+        self.commands = queue.Queue()  # (request, future), run by the engine
+        self.saver = None
+        self.loop = asyncio.new_event_loop()
+        self.server = None
+        self.address = None  # Bound address (e.g. the actual port when asked for port 0)
+        self.error = None
+        ready = threading.Event()
+        self.thread = threading.Thread(target=self.run, args=(ready,), daemon=True)
+        self.thread.start()
+        ready.wait()
+        if self.error:
+            raise self.error
+
+    # ----- Engine side ----- #
+
+    def update(self, engine):
+        # Between ticks : run pending commands, then snapshot what queries can see
+        replies = list()
+        while True:
+            try:
+                request, future = self.commands.get_nowait()
+            except queue.Empty:
+                break
+            # A bad request must never stop the simulation : any failure is the client's reply
+            try:
+                reply = {'ok': True, 'result': getattr(self, "command_{}".format(request['command']))(engine, request)}
+            except Exception as error:
+                reply = {'ok': False, 'error': "{}: {}".format(type(error).__name__, error)}
+            replies.append((future, reply))
+        self.snapshot = {
+            'metrics': self.metrics(engine),
+            'population': self.population(engine),
+            'selected': self.selected(engine)
+        }
+        # Replied once the snapshot reflects the commands
+        for future, reply in replies:
+            self.loop.call_soon_threadsafe(self.resolve, future, reply)
+
+    def metrics(self, engine):
+        return {
+            'time': engine.time,
+            'tps': round(engine.tps, 2),
+            'speed': engine.speed,
+            'paused': engine.paused,
+            'backend': engine.backend,
+            'creatures': engine.creature_count(),
+            'fruits': engine.fruit_count(),
+            'births': engine.births,
+            'deaths': engine.deaths,
+            'generation': engine.max_generation()
+        }
+
+    def population(self, engine):
+        population = dict()
+        for name, gene_stats in engine.population.genes.items():
+            median, low, high = gene_stats.quantiles(0.5, 0.1, 0.9)
+            population[name] = {
+                'count': gene_stats.count,
+                'mean': gene_stats.mean(),
+                'p50': median,
+                'p10': low,
+                'p90': high,
+                'range': (gene_stats.vmin, gene_stats.vmax),
+                'histogram': gene_stats.counts.reshape(self.bins, -1).sum(axis=1).tolist()
+            }
+        return population
+
+    def selected(self, engine):
+        sc = engine.selected
+        if not sc:
+            return None
+        age, energy = sc.settled(engine.time - 1)
+        return {
+            'id': sc.id,
+            'name': sc.name,
+            'parent': sc.parent_id,
+            'generation': sc.generation,
+            'age': age,
+            'energy': energy,
+            'position': tuple(sc.position),
+            'genes': dict(zip(engine.population.names, sc.genome)),
+            'action': sc.action
+        }
+
+    # ----- Commands (engine side) ----- #
+
+    def command_speed(self, engine, request):
+        # Ticks per second (0 : as fast as possible)
+        engine.set_speed(integer(request, 'value', 0, CONTROL_SPEED_MAX))
+        return engine.speed
+
+    def command_pause(self, engine, request):
+        # Toggles unless told which
+        engine.pause(request.get('paused'))
+        return engine.paused
+
+    def command_spawn(self, engine, request):
+        count = integer(request, 'count', 0, CONTROL_SPAWN_MAX)
+        kind = request['kind']
+        if kind == "creatures":
+            engine.spawn_creatures(count)
+        elif kind == "fruits":
+            engine.spawn_fruits(count)
+        else:
+            raise ValueError("Unknown kind: {}".format(kind))
+        return count
+
+    def command_select(self, engine, request):
+        # Creature id (sprite backend), none clears the selection
+        node_id = request.get('creature')
+        if node_id is None:
+            engine.clear_selected()
+            return None
+        if engine.array_world:
+            raise ValueError("Selection needs the sprite backend")
+        creature = next((c for c in engine.creatures if c.id == node_id), None)
+        if creature is None:
+            raise ValueError("No living creature with id: {}".format(node_id))
+        engine.select(creature)
+        return self.selected(engine)
+
+    def command_checkpoint(self, engine, request):
+        # Written off the main loop, one at a time : False if the previous one is still being written
+        path = request['path']
+        if not isinstance(path, str) or not path:
+            raise ValueError("path must be a file name: {!r}".format(path))
+        if self.saver and self.saver.thread.is_alive():
+            return False
+        self.saver = checkpoint.Autosaver(path)
+        return self.saver.save(*checkpoint.snapshot(engine))
+
+    def close(self):
+        if self.server:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+        if self.saver:
+            self.saver.close()
+
+    # ----- Server (background thread) ----- #
+
+    def run(self, ready):
+        asyncio.set_event_loop(self.loop)
+        try:
+            if self.host is None:
+                self.server = self.loop.run_until_complete(asyncio.start_unix_server(
+                    self.serve, self.port, limit=CONTROL_LINE_LIMIT))
+            else:
+                self.server = self.loop.run_until_complete(asyncio.start_server(
+                    self.serve, self.host, self.port, limit=CONTROL_LINE_LIMIT))
+            self.address = self.server.sockets[0].getsockname()
+        except OSError as error:
+            self.error = error
+        ready.set()
+        if self.server:
+            self.loop.run_forever()
+            # Stopped : drop clients still connected
+            self.server.close()
+            tasks = asyncio.all_tasks(self.loop)
+            for task in tasks:
+                task.cancel()
+            self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        self.loop.close()
+
+    @staticmethod
+    def resolve(future, reply):
+        if not future.done():
+            future.set_result(reply)
+
+    async def serve(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                writer.write(json.dumps(await self.answer(line)).encode() + b"\n")
+                await writer.drain()
+        except (ConnectionError, ValueError, asyncio.CancelledError):
+            # Client gone, request line over the limit, or server stopped
+            pass
+        finally:
+            writer.close()
+
+    async def answer(self, line):
+        try:
+            request = json.loads(line)
+            name = request['command']
+        except (ValueError, TypeError, KeyError):
+            return {'ok': False, 'error': "Expected a JSON object with a command"}
+        reply = {'ok': False, 'error': "Unknown command: {}".format(name)}
+        if name in CONTROL_QUERIES:
+            reply = {'ok': True, 'result': self.snapshot[name]}
+        elif name in CONTROL_COMMANDS:
+            future = self.loop.create_future()
+            self.commands.put((request, future))
+            reply = await future
+        if 'id' in request:
+            reply = dict(reply, id=request['id'])
+        return reply
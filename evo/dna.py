@@ -1,4 +1,5 @@
 import random
+import numpy
 from evo import utils
 
 # TODO : Type hints
@@ -6,6 +7,7 @@ from evo import utils
 
 class Gene():
 
+    __slots__ = ('value', 'cost')
     VMIN = 0.5
     VMAX = 9.5
     DEFAULT = 1
@@ -16,7 +18,7 @@ class Gene():
         if value is None:
             value = self.DEFAULT
         self.value = utils.clamp(value, self.VMIN, self.VMAX)
-        self.cost = self._cost() * self.COST_RATIO
+        self.cost = self.cost_of(self.value)
 
     def __repr__(self):
         return "{}({})".format(
@@ -24,56 +26,89 @@ class Gene():
             round(self.value, 2),
         )
 
-    def _cost(self):
-        return self.value
+    @classmethod
+    def _cost(cls, value):
+        return value
 
-    def mutate(self):
-        vrange = (self.VMAX - self.VMIN) * self.MUTATION_RATIO
-        return self.__class__(utils.clamp(self.value + random.uniform(-vrange, vrange), self.VMIN, self.VMAX))
+    @classmethod
+    def cost_of(cls, value):
+        # Works on scalars as well as arrays.
+        return cls._cost(value) * cls.COST_RATIO
+
+    @classmethod
+    def mutation_range(cls):
+        return (cls.VMAX - cls.VMIN) * cls.MUTATION_RATIO
+
+    def mutate(self, rng=random):
+        vrange = self.mutation_range()
+        return self.__class__(self.value + rng.uniform(-vrange, vrange))
 
 
 class Size(Gene):
 
+    __slots__ = ()
     COST_RATIO = 0.3
 
-    def _cost(self):
-        return 4.189 * self.value**3
+    @classmethod
+    def _cost(cls, value):
+        return 4.189 * value**3
         # Volume of the creature (phere)
 
 
 class Speed(Gene):
 
-    def _cost(self):
-        return 0.5 * self.value**2
+    __slots__ = ()
+
+    @classmethod
+    def _cost(cls, value):
+        return 0.5 * value**2
         # Speed portion of kinetic energy
 
 
 class Perception(Gene):
 
+    __slots__ = ('distance',)
     COST_RATIO = 0.1
     MUTATION_RATIO = 0.03
+    DISTANCE_RATIO = 60
 
     def __init__(self, value=None):
         super().__init__(value=value)
-        self.distance = self.value * 60
+        self.distance = self.value * self.DISTANCE_RATIO
 
-    def _cost(self):
-        return 6.284 * self.value**2
+    @classmethod
+    def _cost(cls, value):
+        return 6.284 * value**2
         # Area to survey (disc)
 
 
 class Digestion(Gene):
 
+    __slots__ = ('carnivore', 'herbivore')
     DEFAULT = 5
 
     def __init__(self, value=None):
         super().__init__(value=value)
-        self.carnivore, self.herbivore = self._specialization()
-
-    def _specialization(self):
-        scaled_value = utils.scale(self.value, self.VMIN, self.VMAX, -2, 2)
-        # Note: Below is DivByZero-safe
-        if scaled_value >= 0:
-            return scaled_value+1, 1/(scaled_value+1)
-        elif scaled_value < 0:
-            return 1/(-scaled_value+1), -scaled_value+1
+        self.carnivore = float(self.carnivore_of(self.value))
+        self.herbivore = 1 / self.carnivore
+
+    @classmethod
+    def carnivore_of(cls, value):
+        # Carnivore ratio (herbivore ratio is its inverse) : 1+s above the midpoint, 1/(1-s) below,
+        # s being the value scaled to [-2, 2]. Works on scalars as well as arrays.
+        scaled = utils.scale(value, cls.VMIN, cls.VMAX, -2, 2)
+        return (1 + abs(scaled)) ** numpy.sign(scaled)
+
+
+# Genome : (name, gene) in storage order
+GENOME = (('size', Size), ('speed', Speed), ('perception', Perception), ('digestion', Digestion))
+GENES = tuple(gene for _, gene in GENOME)
+
+
+def mutate_many(genomes, rng):
+    # Batched Gene.mutate : one mutated copy of each genome row (GENOME order), [rng] is a numpy Generator.
+    # Ranges are read on every call (batch runs override MUTATION_RATIO).
+    vrange = numpy.array([gene.mutation_range() for gene in GENES])
+    return numpy.clip(
+        genomes + rng.uniform(-vrange, vrange, numpy.shape(genomes)),
+        [gene.VMIN for gene in GENES], [gene.VMAX for gene in GENES])
@@ -1,148 +1,255 @@
-import random
+import math
+import time
+import numpy
 import pygame
 from evo import utils
 from evo.node import Creature, Fruit
-from evo.dna import Size, Speed, Perception, Digestion
+from evo.dna import Size, Speed, Perception, Digestion, GENOME, mutate_many
 from evo.chart import Chart
+from evo.world import ArrayWorld
+from evo.region import RegionWorld
+from evo.grid import Grid
+from evo import checkpoint
+from evo.profiler import Profiler
+from evo.stats import PopulationStats
+from evo.render import Renderer
+from evo.atlas import SpriteAtlas
+from evo.scheduler import Scheduler
+from evo.telemetry import Telemetry, TELEMETRY_INTERVAL
+from evo.lineage import Lineage
+from evo.control import ControlServer
 
 
 # Constants and Defaults
 SCREEN_DEFAULT = (1024, 768)
+ENGINE_CAPTION = "eVo"
 SCREEN_BACKGROUND = (27, 104, 143)
-ENGINE_SPEED = (1, 200)
+ENGINE_SPEED = (1, 1000)  # Ticks per second (0 : as fast as possible)
+ENGINE_SPEED_DEFAULT = 30
+ENGINE_FPS = 30  # Rendered frames per second
+ENGINE_CHART_INTERVAL = 150  # Ticks between chart samples
+ENGINE_FRAME_TICKS = 1000  # Most ticks owed at once : a slow machine drops ticks instead of freezing
+ENGINE_BACKENDS = ("sprite", "array", "region")
+ENGINE_PHASES = ("data", "spawn", "events", "creatures", "draw")
+ENGINE_FRAME_PHASES = ("events", "draw")  # Once per rendered frame, the others once per tick
 WORLD_SCALE = (0.25, 1)
+WORLD_SCALE_STEP = 0.05
 MAP_DEFAULT = (6, 4)
 MAP_TILE_SIZE = 256
 MAP_MARGIN = 20
 GRID_CELL_SIZE = 128
-
-
-# Initialize
-pygame.init()
-pygame.display.set_caption("eVo")
+GRID_LEVELS = 4
 
 
 class Engine():
 
-    def __init__(self, map_tiles=None, screen_resolution=None, fullscreen=False, display=0):
+    def __init__(self, map_tiles=None, screen_resolution=None, fullscreen=False, display=0, headless=False,
+                 backend="sprite", seed=None, autosave=None, autosave_interval=5000, profile=False,
+                 dirty_rects=True, fps=ENGINE_FPS, chart_interval=ENGINE_CHART_INTERVAL, telemetry=None,
+                 telemetry_interval=TELEMETRY_INTERVAL, telemetry_append=False, lineage=None, lineage_append=False,
+                 workers=None, control=None):
+        # Mode
+        if backend not in ENGINE_BACKENDS:
+            raise ValueError("Unknown backend: {}".format(backend))
+        self.headless = headless
+        self.backend = backend
+        # Randomness
+        self.rng = utils.RandomStreams(seed)
         # Screen
-        if fullscreen:
+        if self.headless:
+            # No display : keep a nominal screen size for offsets and chart layout.
+            screen_size = SCREEN_DEFAULT if screen_resolution is None else screen_resolution
+            self.screen_size = utils.Int2D(*screen_size)
+            self.screen = None
+        elif fullscreen:
+            utils.init_display(ENGINE_CAPTION)
             self.screen = pygame.display.set_mode(display=display, flags=pygame.FULLSCREEN)
             self.screen_size = utils.Int2D(*self.screen.get_size())
         else:
             screen_size = SCREEN_DEFAULT if screen_resolution is None else screen_resolution
             self.screen_size = utils.Int2D(*screen_size)
+            utils.init_display(ENGINE_CAPTION)
             self.screen = pygame.display.set_mode(self.screen_size.xy)
         self.screen_offset = pygame.math.Vector2(0)
         self.screen_drag = False
-        # Images
-        self.images_map = utils.load_map_images()
-        self.images_ponds = utils.load_pond_images()
-        self.images_fruits = utils.load_fruit_images()
-        self.images_creatures = utils.load_creature_images((Size.VMIN, Size.VMAX))
+        # Images (converting requires a display, skip when headless)
+        if self.headless:
+            self.images_map, self.images_ponds, self.images_fruits, self.images_creatures = {}, [], {}, []
+            self.atlas = None
+        else:
+            self.images_map = utils.load_map_images()
+            self.images_ponds = utils.load_pond_images()
+            self.images_fruits = utils.load_fruit_images()
+            self.images_creatures = utils.load_creature_images((Size.VMIN, Size.VMAX))
+            # - Lifeform sprites, one sheet per zoom step
+            zoom_steps = round((WORLD_SCALE[1] - WORLD_SCALE[0]) / WORLD_SCALE_STEP)
+            self.atlas = SpriteAtlas(
+                self.images_creatures, self.images_fruits, (Size.VMIN, Size.VMAX),
+                zooms=[round(WORLD_SCALE[1] - i * WORLD_SCALE_STEP, 2) for i in range(zoom_steps + 1)])
         # Map
         if map_tiles is None:
             self.map_tiles = utils.Int2D(*MAP_DEFAULT)
         else:
             self.map_tiles = utils.Int2D(x=max(map_tiles[0], 2), y=max(map_tiles[1], 2))
         self.map_size = self.map_tiles * MAP_TILE_SIZE
-        self.map = pygame.Surface(self.map_size.xy)
-        self.map.set_colorkey(utils.ALPHA_COLOR)
         # World
         self.world_tiles = self.map_tiles + 2
         self.world_size = self.world_tiles * 256
-        self.world_background = self.load_world()
-        self.world = pygame.Surface(self.world_size.xy)
         self.world_scale = 1
+        self.world_layout = self.generate_world()
+        # - Rendering (viewport only, background chunks generated on first view)
+        if self.headless:
+            self.renderer = None
+        else:
+            self.renderer = Renderer(self, MAP_TILE_SIZE, SCREEN_BACKGROUND, dirty=dirty_rects)
         # - Update screen offset to match world center.
         self.screen_offset -= pygame.math.Vector2((self.world_size - self.screen_size).xy) / 2
         # Grid
-        self.grid_cells = utils.Int2D(
-            x=utils.ceildiv(self.map_size.x,  GRID_CELL_SIZE),
-            y=utils.ceildiv(self.map_size.y, GRID_CELL_SIZE)
-        )
-        self.grid = None
-        self.clear_grid()
+        self.grid = Grid(self.map_size, GRID_CELL_SIZE, GRID_LEVELS)
+        self.fruit_grid = Grid(self.map_size, GRID_CELL_SIZE, GRID_LEVELS)  # Static : only updated on spawn / death
         # Chart
         # - Chart config
         chart_size = (min(self.screen_size.x/2, 640), min(self.screen_size.y/2, 480))
         self.chart = Chart(size=chart_size, history=250)
         self.chart_position = self.screen_size - self.chart.size
         self.chart_active = next(self.chart.active)
-        self.chart_interval = 150  # TODO : Configurable
+        if chart_interval < 1:
+            raise ValueError("Chart interval must be at least 1 tick: {}".format(chart_interval))
+        self.chart_interval = chart_interval
         # - Chart metrics
-        self.chart.add_metric("cps", 0)
+        self.chart.add_metric("tps", 0)
         self.chart.add_metric("creatures", 0)
         self.chart.add_metric("fruits", 0)
         self.chart.add_metric("size", Size.VMIN, Size.VMAX)
         self.chart.add_metric("speed", Speed.VMIN, Speed.VMAX)
         self.chart.add_metric("perception", Perception.VMIN, Perception.VMAX)
         self.chart.add_metric("digestion", Digestion.VMIN, Perception.VMAX)
+        # Profiling
+        self.profiler = Profiler(enabled=profile)
+        self.profiler_overlay = profile
+        if self.profiler.enabled:
+            self.chart.add_metric("tick_ms", 0)
+            self.chart.add_metric("candidates", 0)
+        # Population statistics (kept up to date on every birth and death)
+        self.population = PopulationStats(GENOME)
+        # Lineage (id-based family tree, dead creatures beyond its window go to the [lineage] archive file,
+        # continued rather than started over with [lineage_append])
+        self.lineage = Lineage(self.population.names, archive=lineage, append=lineage_append)
         # Node groups
         self.fruits = pygame.sprite.Group()
         self.creatures = pygame.sprite.Group()
         self.lifeforms = pygame.sprite.Group()
+        self.awake = pygame.sprite.Group()  # Creatures updated every tick (others sleep through timed tasks)
+        self.scheduler = Scheduler()  # Asleep creatures, by wake up tick
+        # Array backend (replaces node groups when enabled), optionally split across [workers] processes
+        if backend == "array":
+            self.array_world = ArrayWorld(self, MAP_MARGIN, MAP_TILE_SIZE, GRID_CELL_SIZE)
+        elif backend == "region":
+            self.array_world = RegionWorld(self, MAP_MARGIN, MAP_TILE_SIZE, GRID_CELL_SIZE, workers=workers)
+        else:
+            self.array_world = None
         # Internals
         self.clock = pygame.time.Clock()
+        self.panels = dict()  # HUD panels, by name
         self.selected = None
-        self.speed = 30
+        self.speed = ENGINE_SPEED_DEFAULT
+        self.paused = False
+        self.fps = fps
+        self.frame_time = None  # Start of the previous frame
+        self.frame_ticks = 0  # Ticks run during the previous frame
+        self.tick_debt = 0
+        self.tps = 0  # Measured ticks per second
         self.time = 0
+        self.elapsed = 0
+        self.births = 0
+        self.deaths = 0
+        self.offspring = list()  # Parents that gave birth this tick (sprite backend, see spawn_offspring)
         self.running = False
-
-    def load_world(self):
-        background = pygame.Surface(self.world_size.xy)
-        # Background tiles
+        self.fruits_chance = 0.01
+        self.fruits_max = 0
+        self.phases = [(phase, getattr(self, "phase_{}".format(phase))) for phase in ENGINE_PHASES]
+        self.tick_phases = [(name, phase) for name, phase in self.phases if name not in ENGINE_FRAME_PHASES]
+        self.frame_phases = [(name, phase) for name, phase in self.phases if name in ENGINE_FRAME_PHASES]
+        # Checkpoints
+        self.autosaver = checkpoint.Autosaver(autosave) if autosave else None
+        self.autosave_interval = autosave_interval
+        # Telemetry (written off the main loop, continued rather than started over with [telemetry_append])
+        self.telemetry = Telemetry(
+            telemetry, self.population.names, interval=telemetry_interval,
+            append=telemetry_append) if telemetry else None
+        # Control server (commands run and snapshots taken between ticks)
+        self.control = ControlServer(control) if control else None
+
+    def generate_world(self):
+        # World layout, one row per tile : (x, y, variant, pond, pond variant, pond rotation, pond offset x/y)
+        # Variants are raw draws, mapped onto available images at render time (headless-friendly).
+        rng = self.rng.world
+        layout = list()
         for tile_x in range(self.world_tiles.x):
             for tile_y in range(self.world_tiles.y):
-                # Tile coordinates
-                tile_pos = (MAP_TILE_SIZE*tile_x, MAP_TILE_SIZE*tile_y)
-                background.blit(self.load_grass_tile(tile_x, tile_y), tile_pos)
+                variant = rng.randrange(2**16)
                 # Pond tile?
-                if 1 < tile_x < self.world_tiles.x-1 and 1 < tile_y < self.world_tiles.y-1:
-                    if random.random() > 0.66:
-                        pond_tile = self.load_pond_tile()
-                        pond_tile_pos = (
-                            tile_pos[0] + random.uniform(0, MAP_TILE_SIZE-pond_tile.get_width()),
-                            tile_pos[1] + random.uniform(0, MAP_TILE_SIZE-pond_tile.get_height())
-                        )
-                        background.blit(pond_tile, pond_tile_pos)
-        return background
-
-    def load_pond_tile(self):
-        pond_tile = random.choice(self.images_ponds)
-        return pygame.transform.rotate(pond_tile, random.randint(0, 3) * 90)
-
-    def load_grass_tile(self, x, y):
+                pond = 1 < tile_x < self.world_tiles.x-1 and 1 < tile_y < self.world_tiles.y-1 and rng.random() > 0.66
+                if pond:
+                    layout.append((tile_x, tile_y, variant, 1, rng.randrange(2**16), rng.randint(0, 3),
+                                   rng.random(), rng.random()))
+                else:
+                    layout.append((tile_x, tile_y, variant, 0, 0, 0, 0, 0))
+        return layout
+
+    def load_chunk(self, tile_x, tile_y):
+        # Background of one world tile (layout rows are stored column by column)
+        _, _, variant, pond, pond_variant, pond_rotation, pond_x, pond_y = \
+            self.world_layout[tile_x * self.world_tiles.y + tile_y]
+        chunk = pygame.Surface((MAP_TILE_SIZE, MAP_TILE_SIZE))
+        chunk.blit(self.load_grass_tile(tile_x, tile_y, variant), (0, 0))
+        # Pond tile?
+        if pond:
+            pond_tile = self.load_pond_tile(pond_variant, pond_rotation)
+            pond_tile_pos = (
+                pond_x * (MAP_TILE_SIZE-pond_tile.get_width()),
+                pond_y * (MAP_TILE_SIZE-pond_tile.get_height())
+            )
+            chunk.blit(pond_tile, pond_tile_pos)
+        return chunk.convert()
+
+    def load_pond_tile(self, variant, rotation):
+        pond_tile = self.images_ponds[variant % len(self.images_ponds)]
+        return pygame.transform.rotate(pond_tile, rotation * 90)
+
+    def load_grass_tile(self, x, y, variant):
+        corner = self.images_map['corner'][variant % len(self.images_map['corner'])]
+        edge = self.images_map['edge'][variant % len(self.images_map['edge'])]
         # Tile type?
         if x == 0:
             if y == 0:
                 # Top-left corner
-                return random.choice(self.images_map['corner'])
+                return corner
             elif y == self.world_tiles.y - 1:
                 # Bottom-left corner
-                return pygame.transform.rotate(random.choice(self.images_map['corner']), 90)
+                return pygame.transform.rotate(corner, 90)
             else:
                 # Left edge
-                return random.choice(self.images_map['edge'])
+                return edge
         elif x == self.world_tiles.x - 1:
             if y == 0:
                 # Top-right corner
-                return pygame.transform.rotate(random.choice(self.images_map['corner']), -90)
+                return pygame.transform.rotate(corner, -90)
             elif y == self.world_tiles.y - 1:
                 # Bottom-right corner
-                return pygame.transform.rotate(random.choice(self.images_map['corner']), 180)
+                return pygame.transform.rotate(corner, 180)
             else:
                 # Right edge
-                return pygame.transform.rotate(random.choice(self.images_map['edge']), 180)
+                return pygame.transform.rotate(edge, 180)
         elif y == 0:
             # Top edge
-            return pygame.transform.rotate(random.choice(self.images_map['edge']), -90)
+            return pygame.transform.rotate(edge, -90)
         elif y == self.world_tiles.y - 1:
             # Bottom edge
-            return pygame.transform.rotate(random.choice(self.images_map['edge']), 90)
+            return pygame.transform.rotate(edge, 90)
         else:
             # Center / main tile
-            return random.choice(self.images_map['center'])
+            return self.images_map['center'][variant % len(self.images_map['center'])]
 
     def screen_to_map(self, position: pygame.math.Vector2) -> pygame.math.Vector2:
         return pygame.math.Vector2(
@@ -151,10 +258,16 @@ class Engine():
             - pygame.math.Vector2(MAP_TILE_SIZE)
         )
 
-    def random_map_position(self) -> pygame.math.Vector2:
+    def random_map_positions(self, count, rng) -> numpy.ndarray:
+        # Vectorized random_map_position, [rng] is a numpy Generator
+        return rng.uniform(
+            (MAP_MARGIN, MAP_MARGIN), (self.map_size.x - MAP_MARGIN, self.map_size.y - MAP_MARGIN), (count, 2))
+
+    def random_map_position(self, rng=None) -> pygame.math.Vector2:
+        rng = self.rng.spawn if rng is None else rng
         return pygame.Vector2(
-            random.uniform(MAP_MARGIN, self.map_size.x - MAP_MARGIN),
-            random.uniform(MAP_MARGIN, self.map_size.y - MAP_MARGIN)
+            rng.uniform(MAP_MARGIN, self.map_size.x - MAP_MARGIN),
+            rng.uniform(MAP_MARGIN, self.map_size.y - MAP_MARGIN)
         )
 
     def clamp_map_position(self, position: pygame.math.Vector2) -> pygame.math.Vector2:
@@ -164,41 +277,32 @@ class Engine():
         )
 
     def bounce_map_position(self, position: pygame.math.Vector2) -> pygame.math.Vector2:
+        rng = self.rng.behavior
         # If X is out of range, randomize it.
         if position.x < MAP_MARGIN:
-            pos_x = random.uniform(MAP_MARGIN, MAP_TILE_SIZE)
+            pos_x = rng.uniform(MAP_MARGIN, MAP_TILE_SIZE)
         elif position.x > self.map_size.x-MAP_MARGIN:
-            pos_x = random.uniform(self.map_size.x-MAP_TILE_SIZE, self.map_size.x-MAP_MARGIN)
+            pos_x = rng.uniform(self.map_size.x-MAP_TILE_SIZE, self.map_size.x-MAP_MARGIN)
         else:
             pos_x = position.x
         # If Y is out of range, randomize it.
         if position.y < MAP_MARGIN:
-            pos_y = random.uniform(MAP_MARGIN, MAP_TILE_SIZE)
+            pos_y = rng.uniform(MAP_MARGIN, MAP_TILE_SIZE)
         elif position.y > self.map_size.y-MAP_MARGIN:
-            pos_y = random.uniform(self.map_size.y-MAP_TILE_SIZE, self.map_size.y-MAP_MARGIN)
+            pos_y = rng.uniform(self.map_size.y-MAP_TILE_SIZE, self.map_size.y-MAP_MARGIN)
         else:
             pos_y = position.y
         # Return
         return pygame.Vector2(pos_x, pos_y)
 
-    def map_to_grid(self, position) -> tuple:
-        return (
-            int(utils.clamp(position.x, MAP_TILE_SIZE, self.map_size.x-MAP_TILE_SIZE-1) / GRID_CELL_SIZE),
-            int(utils.clamp(position.y, MAP_TILE_SIZE, self.map_size.y-MAP_TILE_SIZE-1) / GRID_CELL_SIZE)
-        )
-
-    def clear_grid(self):
-        self.grid = [[[] for _y in range(self.grid_cells.y)] for _x in range(self.grid_cells.x)]
-
-    def update_grid(self):
-        # First, clear.
-        self.clear_grid()
-        # Then, fill.
-        for lf in self.lifeforms:
-            cx, cy = self.map_to_grid(position=lf.position)
-            self.grid[cx][cy].append(lf)
+    def select(self, creature):
+        self.clear_selected()
+        creature.track()
+        self.selected = creature
 
     def clear_selected(self):
+        if self.selected:
+            self.selected.track(False)
         self.selected = None
 
     def handle_mouse(self, event):
@@ -207,14 +311,14 @@ class Engine():
             if event.button == 3:
                 self.screen_drag = True
                 pygame.mouse.get_rel()
-            # Left button (3) : Select creature
-            if event.button == 1:
+            # Left button (3) : Select creature (array backends keep rows, not creature objects : no selection)
+            if event.button == 1 and not self.array_world:
                 click_pos = pygame.math.Vector2(pygame.mouse.get_pos())
                 selection_pos = self.screen_to_map(click_pos)
                 selection_rect = pygame.Rect(selection_pos - (8, 8), (16, 16))
                 for c in self.creatures:
                     if c.rect.colliderect(selection_rect):
-                        self.selected = c
+                        self.select(c)
         elif event.type == pygame.MOUSEBUTTONUP:
             if event.button == 3:
                 self.screen_drag = False
@@ -224,7 +328,7 @@ class Engine():
         # Zoom
         elif event.type == pygame.MOUSEWHEEL:
             focus = self.screen_to_map((self.screen_size/2).vector2)
-            self.world_scale = utils.clamp(self.world_scale + 0.05 * event.y, *WORLD_SCALE)
+            self.world_scale = utils.clamp(self.world_scale + WORLD_SCALE_STEP * event.y, *WORLD_SCALE)
             self.screen_offset += self.screen_to_map((self.screen_size/2).vector2) - focus
 
     def handle_keyboard(self, event):
@@ -233,65 +337,150 @@ class Engine():
             # Simulation speed
             # - Faster
             if event.key == pygame.K_UP:
-                self.speed = utils.clamp(self.speed+1, *ENGINE_SPEED)
+                self.change_speed(1)
             if event.key == pygame.K_PAGEUP:
-                self.speed = utils.clamp(self.speed+10, *ENGINE_SPEED)
+                self.change_speed(10)
             # - Slower
             if event.key == pygame.K_DOWN:
-                self.speed = utils.clamp(self.speed-1, *ENGINE_SPEED)
+                self.change_speed(-1)
             if event.key == pygame.K_PAGEDOWN:
-                self.speed = utils.clamp(self.speed-10, *ENGINE_SPEED)
+                self.change_speed(-10)
+            # - As fast as possible
+            if event.key == pygame.K_END:
+                self.speed = 0
             # - Reset
             if event.key == pygame.K_SPACE:
-                self.speed = 30
+                self.speed = ENGINE_SPEED_DEFAULT
+            # - Pause
+            if event.key == pygame.K_p:
+                self.pause()
             # Chart selection
             if event.key in (pygame.K_LSHIFT, pygame.K_RSHIFT):
                 self.chart_active = next(self.chart.active)
+            # Profiler overlay
+            if event.key == pygame.K_F3:
+                self.profiler_overlay = not self.profiler_overlay
             # Quit
             if event.key == pygame.K_ESCAPE:
                 self.running = False
 
-    def draw_world(self):
-        # Blit map on world
-        self.world.blit(self.map, (MAP_TILE_SIZE, MAP_TILE_SIZE))
-        # Scale world?
-        if self.world_scale < 1:
-            scaled_world = pygame.transform.smoothscale(self.world, (self.world_size * self.world_scale).xy)
-            self.screen.blit(scaled_world, self.screen_offset * self.world_scale)
-        else:
-            self.screen.blit(self.world, self.screen_offset)
+    def change_speed(self, delta):
+        # Leaving "as fast as possible" starts from the fastest fixed speed
+        self.speed = utils.clamp((self.speed or ENGINE_SPEED[1]) + delta, *ENGINE_SPEED)
+
+    def set_speed(self, speed):
+        self.speed = utils.clamp(speed, *ENGINE_SPEED) if speed else 0
+
+    def pause(self, paused=None):
+        # Toggles unless told which
+        self.paused = not self.paused if paused is None else bool(paused)
 
     def draw_ui(self):
         # TODO : Dynamic placement...
         # Engine info
-        self.draw_text("Time: {}".format(self.time), (20, 20))
-        self.draw_text("CPS: {}".format(round(self.clock.get_fps(), 2)), (20, 40))
-        self.draw_text("Population: {}".format(len(self.creatures)), (20, 60))
-        self.draw_text("Fruits: {}".format(len(self.fruits)), (20, 80))
+        self.draw_panel("engine", (
+            "Time: {}".format(self.time),
+            "TPS: {} / FPS: {}".format(round(self.tps), round(self.clock.get_fps())),
+            "Population: {}".format(self.creature_count()),
+            "Fruits: {}".format(self.fruit_count())), (20, 20))
         # Simulation info
-        self.draw_text("Speed: {}".format(self.speed), (self.screen_size.x-80, 20))
+        self.draw_panel("simulation", (
+            "Paused" if self.paused else "Speed: {}".format(self.speed or "max"),), (self.screen_size.x-80, 20))
         # Creature info
         if self.selected:
             sc = self.selected
-            self.draw_text("[{}]".format(sc.name), (20, self.screen_size.y-160))
-            self.draw_text("Gen: {}".format(sc.generation), (20, self.screen_size.y-140))
-            self.draw_text("Age: {}".format(sc.age), (20, self.screen_size.y-120))
-            self.draw_text("Energy: {}".format(int(sc.energy)), (20, self.screen_size.y-100))
-            self.draw_text("Size: {}".format(round(sc.size.value, 2)), (20, self.screen_size.y-80))
-            self.draw_text("Speed: {}".format(round(sc.speed.value, 2)), (20, self.screen_size.y-60))
-            self.draw_text("Perception: {}".format(round(sc.perception.value, 2)), (20, self.screen_size.y-40))
-            self.draw_text("Action: {}".format(sc.action), (20, self.screen_size.y-20))
+            age, energy = sc.settled(self.time - 1)
+            self.draw_panel("creature", (
+                "[{}]".format(sc.name),
+                "Gen: {}".format(sc.generation),
+                "Age: {}".format(age),
+                "Energy: {}".format(int(energy)),
+                "Size: {}".format(round(sc.size.value, 2)),
+                "Speed: {}".format(round(sc.speed.value, 2)),
+                "Perception: {}".format(round(sc.perception.value, 2)),
+                "Action: {}".format(sc.action)), (20, self.screen_size.y-160))
+        # Profiler
+        if self.profiler.enabled and self.profiler_overlay:
+            self.draw_panel("profiler", (
+                "{}: {}".format(name, value) for name, value in self.profiler.latest.items()),
+                (self.screen_size.x/2-80, 20))
         # Chart
         if self.chart_active:
-            self.screen.blit(self.chart_active, self.chart_position.xy)
-
-    def draw_text(self, text, position, color=None):
-        self.screen.blit(utils.gui_text(text=text, fg=color), position)
-
-    def simulate(self,
-                 creatures_start=None, fruits_start=None,
-                 fruits_chance=None, fruits_max=None,
-                 quit_on_extinct=False):
+            self.renderer.overlay(self.screen.blit(self.chart.surface(self.chart_active), self.chart_position.xy))
+
+    def draw_panel(self, name, lines, position):
+        # HUD text blocks, each cached until one of its lines changes
+        panel = self.panels.get(name)
+        if panel is None:
+            panel = self.panels[name] = utils.TextPanel()
+        self.renderer.overlay(self.screen.blit(panel.surface(lines), position))
+
+    def creature_count(self):
+        if self.array_world:
+            return self.array_world.creature_count()
+        return len(self.creatures)
+
+    def fruit_count(self):
+        if self.array_world:
+            return self.array_world.fruit_count()
+        return len(self.fruits)
+
+    def max_generation(self):
+        if self.array_world:
+            return self.array_world.max_generation()
+        return max((c.generation for c in self.creatures), default=0)
+
+    def grid_occupancy(self):
+        # Most crowded (level-0) grid cell, creatures and fruits together
+        if self.array_world:
+            return self.array_world.occupancy()
+        return int((self.grid.counts + self.fruit_grid.counts).max(initial=0))
+
+    def spawn_creatures(self, count):
+        if self.array_world:
+            self.array_world.spawn_creatures(count)
+        else:
+            for _ in range(count):
+                Creature(self)
+
+    def wake_creatures(self):
+        # Creatures whose timed task expires (or who starve) this tick, in one batch
+        for creature in self.scheduler.pop(self.time):
+            if creature.alive():
+                creature.wake(self.time)
+
+    def spawn_offspring(self):
+        # Births of the tick, with every offspring genome mutated in one batch
+        if self.offspring:
+            parents, self.offspring = self.offspring, list()
+            genomes = mutate_many(numpy.array([parent.genome for parent in parents]), self.rng.array)
+            for parent, genome in zip(parents, genomes.tolist()):
+                Creature(self, parent=parent, genome=genome)
+
+    def spawn_fruits(self, count):
+        if self.array_world:
+            self.array_world.spawn_fruits(count)
+        else:
+            Fruit.spawn_many(self, count)
+
+    def stats(self):
+        return {
+            'seed': self.rng.seed,
+            'time': self.time,
+            'elapsed': round(self.elapsed, 3),
+            'tps': round(self.time / self.elapsed, 2) if self.elapsed > 0 else 0,
+            'creatures': self.creature_count(),
+            'fruits': self.fruit_count(),
+            'births': self.births,
+            'deaths': self.deaths,
+            'generation': self.max_generation(),
+            'size': self.population.quantiles('size'),
+            'speed': self.population.quantiles('speed'),
+            'perception': self.population.quantiles('perception'),
+            'digestion': self.population.quantiles('digestion')
+        }
+
+    def populate(self, creatures_start=None, fruits_start=None, fruits_chance=None, fruits_max=None):
 
         # Creature / fruit generation is bound to tile count
         tile_count = self.map_tiles.x * self.map_tiles.y
@@ -302,54 +491,41 @@ class Engine():
             creatures_start = tile_count * 2
         if fruits_start is None:
             fruits_start = tile_count * 5
-        if fruits_max is None:
-            fruits_max = tile_count * 8
-        if fruits_chance is None:
-            fruits_chance = 0.01
-
-        # Creatures
-        for _ in range(creatures_start):
-            Creature(self)
-
-        # Fruits
-        for _ in range(fruits_start):
-            Fruit.spawn(self)
-
-        self.running = True
-        while self.running:
-
-            # Data...
-            if not self.time % self.chart_interval:
-                # Compute metrics
-                # TODO : Optimize....
-                new_data = {
-                    'cps': (round(self.clock.get_fps(), 2),),
-                    'creatures': (len(self.creatures),),
-                    'fruits': (len(self.fruits),),
-                    'size': utils.stat_quantiles([c.size.value for c in self.creatures]),
-                    'speed': utils.stat_quantiles([c.speed.value for c in self.creatures]),
-                    'perception': utils.stat_quantiles([c.perception.value for c in self.creatures]),
-                    'digestion': utils.stat_quantiles([c.digestion.value for c in self.creatures])
-                }
-                # Push to chart
-                self.chart.add_data(data=new_data)
-
-            # Clear screen, world and map
-            self.screen.fill(SCREEN_BACKGROUND)
-            self.world.blit(self.world_background, (0, 0))
-            self.map.fill(utils.ALPHA_COLOR)
-
-            # Clear selection?
-            if self.selected and not self.selected.alive():
-                self.clear_selected()
-
-            # Spawn fruits?
-            for _ in range(tile_count):
-                if len(self.fruits) < fruits_max:
-                    if random.random() <= fruits_chance:
-                        Fruit.spawn(self)
-
-            # Handle events
+        self.fruits_max = tile_count * 8 if fruits_max is None else fruits_max
+        self.fruits_chance = 0.01 if fruits_chance is None else fruits_chance
+
+        # Initial population (fresh worlds only, not when resuming)
+        if not self.time:
+            self.spawn_creatures(creatures_start)
+            self.spawn_fruits(fruits_start)
+
+    def phase_data(self):
+        if not self.time % self.chart_interval:
+            # Compute metrics
+            new_data = {
+                'tps': (round(self.tps, 2),),
+                'creatures': (self.creature_count(),),
+                'fruits': (self.fruit_count(),),
+                'size': self.population.quantiles('size'),
+                'speed': self.population.quantiles('speed'),
+                'perception': self.population.quantiles('perception'),
+                'digestion': self.population.quantiles('digestion')
+            }
+            if self.profiler.enabled:
+                new_data['tick_ms'] = (self.profiler.latest.get('tick_ms', 0),)
+                new_data['candidates'] = (self.profiler.latest.get('candidates', 0),)
+            # Push to chart
+            self.chart.add_data(data=new_data)
+
+    def phase_spawn(self):
+        # Every tile has [fruits_chance] to grow a fruit : one binomial draw for the whole map
+        count = self.rng.fruits.binomial(self.map_tiles.x * self.map_tiles.y, self.fruits_chance)
+        count = min(count, self.fruits_max - self.fruit_count())
+        if count > 0:
+            self.spawn_fruits(count)
+
+    def phase_events(self):
+        if not self.headless:
             for event in pygame.event.get():
                 # Mouse
                 self.handle_mouse(event)
@@ -359,31 +535,155 @@ class Engine():
                 if event.type == pygame.QUIT:
                     self.running = False
 
-            # Update
-            self.update_grid()
-            self.fruits.update()
-            self.creatures.update()
-
-            # Draw
-            self.fruits.draw(self.map)
-            self.creatures.draw(self.map)
-            self.draw_world()
+    def phase_creatures(self):
+        # Clear selection?
+        if self.selected and not self.selected.alive():
+            self.clear_selected()
+        # Update creatures
+        if self.array_world:
+            self.array_world.step()
+        else:
+            self.awake.update()
+            self.wake_creatures()
+            self.spawn_offspring()
+
+    def phase_draw(self):
+        if not self.headless:
+            # Draw the visible world (changed regions only, if possible) and UI
+            self.renderer.draw()
             self.draw_ui()
+            # Push to the display
+            self.renderer.present()
+
+    def run_phases(self, phases):
+        if self.profiler.enabled:
+            for name, phase in phases:
+                phase_start = time.perf_counter()
+                phase()
+                self.profiler.add_time(name, time.perf_counter() - phase_start)
+        else:
+            for _, phase in phases:
+                phase()
+
+    def end_tick(self):
+        if self.profiler.enabled:
+            self.profiler.tick(
+                time=self.time,
+                totals={'births': self.births, 'deaths': self.deaths},
+                gauges={
+                    'creatures': self.creature_count(),
+                    'asleep': len(self.scheduler),
+                    'fruits': self.fruit_count(),
+                    'grid_max': self.grid_occupancy()
+                })
+        if self.telemetry:
+            self.telemetry.record(self)
+        # Time is passing...
+        self.time += 1
+
+    def step(self):
+        # One simulation tick and one frame : every phase, in ENGINE_PHASES order.
+        self.run_phases(self.phases)
+        self.end_tick()
+
+    def tick(self):
+        # One simulation tick, nothing drawn
+        self.run_phases(self.tick_phases)
+        self.end_tick()
+
+    def frame(self):
+        # One rendered frame (events and drawing), time stands still.
+        # Profiled frame phases are accounted to the next tick.
+        self.run_phases(self.frame_phases)
+
+    def due_ticks(self, now):
+        # Fixed timestep : ticks owed since the previous frame at [speed] ticks per second.
+        # Headless or "as fast as possible" : as many as fit in a frame. Paused : none.
+        if self.frame_time is not None:
+            period = max(now - self.frame_time, 1e-9)
+            self.tps = 0.9 * self.tps + 0.1 * self.frame_ticks / period
+            self.tick_debt = min(self.tick_debt + period * self.speed, ENGINE_FRAME_TICKS)
+        self.frame_time = now
+        if self.paused:
+            self.tick_debt = 0
+            return 0
+        if self.headless or not self.speed:
+            return math.inf
+        return int(self.tick_debt)
 
-            # Flip the display
-            pygame.display.flip()
+    def simulate(self,
+                 creatures_start=None, fruits_start=None,
+                 fruits_chance=None, fruits_max=None,
+                 quit_on_extinct=False, ticks=None):
 
-            # Time is passing...
-            self.time += 1
-            self.clock.tick(self.speed)
+        # Initial population and fruit settings
+        self.populate(creatures_start, fruits_start, fruits_chance, fruits_max)
 
-            # Creatures extinct?
-            if not self.creatures and quit_on_extinct:
-                self.running = False
+        # Tick budget (if any)
+        time_stop = None if ticks is None else self.time + ticks
+        time_start = time.perf_counter()
+
+        self.running = True
+        self.frame_time = None
+        self.tick_debt = 0
+        while self.running:
+
+            # Ticks : as many as owed, within one frame's time
+            frame_start = time.perf_counter()
+            frame_end = frame_start + 1 / self.fps
+            ticks = self.due_ticks(frame_start)
+            done = 0
+            while done < ticks and self.running:
+                self.tick()
+                done += 1
+
+                # Autosave? (written off the main loop)
+                if self.autosaver and not self.time % self.autosave_interval:
+                    self.autosaver.save(*checkpoint.snapshot(self))
+
+                # Creatures extinct?
+                if not self.creature_count() and quit_on_extinct:
+                    self.running = False
+                # Tick budget exhausted?
+                if time_stop is not None and self.time >= time_stop:
+                    self.running = False
+                # Out of frame time?
+                if time.perf_counter() > frame_end:
+                    break
+            self.frame_ticks = done
+            self.tick_debt = max(self.tick_debt - done, 0)
+
+            # Control commands and snapshots
+            if self.control:
+                self.control.update(self)
+
+            # Frame (capped at [fps], uncapped when headless and running)
+            self.frame()
+            self.clock.tick(0 if self.headless and not self.paused else self.fps)
 
         # Simulation done, exit
-        return self.time  # TODO : Return actual stats
+        self.elapsed += time.perf_counter() - time_start
+        return self.stats()
+
+    def save_checkpoint(self, path):
+        checkpoint.write(path, *checkpoint.snapshot(self))
+
+    def load_checkpoint(self, path):
+        checkpoint.restore(self, *checkpoint.read(path))
 
     def cleanup(self):
-        # TODO: Anything else to cleanup?
+        # Wait for a pending autosave
+        if self.autosaver:
+            self.autosaver.close()
+        # Flush telemetry and lineage
+        if self.telemetry:
+            self.telemetry.close()
+        if self.lineage.archive:
+            self.lineage.flush()
+        # Stop the control server
+        if self.control:
+            self.control.close()
+        # Stop array backend workers (if any)
+        if self.array_world:
+            self.array_world.close()
         pygame.quit()
@@ -0,0 +1,90 @@
+import math
+import numpy
+from evo import utils
+
+
+class Grid():
+
+    # Multi-level spatial hash : level 0 cells are [cell_size] wide, each level above doubles it.
+    # Items only record their level-0 cell, upper-level cells are derived by bit-shifting it.
+    # Cells are insertion-ordered dicts (used as ordered sets) for O(1) removal.
+    # Level-0 cell populations are counted as items come and go (crowding gauges read them without a scan).
+
+    def __init__(self, size, cell_size, levels=4):
+        # Config
+        self.size = size
+        self.cell_size = cell_size
+        # Levels : (cell size, cell count, cells)
+        self.levels = list()
+        for level in range(levels):
+            level_size = cell_size << level
+            cells = utils.Int2D(utils.ceildiv(size.x, level_size), utils.ceildiv(size.y, level_size))
+            self.levels.append((level_size, cells, [[dict() for _y in range(cells.y)] for _x in range(cells.x)]))
+        self.counts = numpy.zeros(self.levels[0][1].xy, dtype=numpy.int64)
+
+    def cell(self, position) -> tuple:
+        return (
+            int(utils.clamp(position.x, 0, self.size.x-1)) // self.cell_size,
+            int(utils.clamp(position.y, 0, self.size.y-1)) // self.cell_size
+        )
+
+    def insert(self, item):
+        item.grid_cell = cx, cy = self.cell(item.position)
+        for level, (_, _, cells) in enumerate(self.levels):
+            cells[cx >> level][cy >> level][item] = None
+        self.counts[cx, cy] += 1
+
+    def remove(self, item):
+        if item.grid_cell is not None:
+            cx, cy = item.grid_cell
+            for level, (_, _, cells) in enumerate(self.levels):
+                cells[cx >> level][cy >> level].pop(item, None)
+            self.counts[cx, cy] -= 1
+            item.grid_cell = None
+
+    def move(self, item):
+        # Only touch the grid when the item actually changed cell (removed items stay out).
+        if item.grid_cell is not None and self.cell(item.position) != item.grid_cell:
+            self.remove(item)
+            self.insert(item)
+
+    def occupancy(self):
+        # Most crowded level-0 cell
+        return int(self.counts.max(initial=0))
+
+    def items_in(self, rect):
+        # Items of every level-0 cell overlapping [rect]
+        _, cells, grid = self.levels[0]
+        xmin, xmax = max(rect.left // self.cell_size, 0), min(rect.right // self.cell_size, cells.x - 1)
+        ymin, ymax = max(rect.top // self.cell_size, 0), min(rect.bottom // self.cell_size, cells.y - 1)
+        for cx in range(xmin, xmax+1):
+            for cy in range(ymin, ymax+1):
+                yield from grid[cx][cy]
+
+    def level(self, radius):
+        # Smallest level whose cells are at least half the query radius (at most ~5x5 cells scanned)
+        for level in self.levels:
+            if 2 * level[0] >= radius:
+                return level
+        return self.levels[-1]
+
+    def query(self, position, radius):
+        # Yields (item, distance) for every item within [radius] of [position].
+        level_size, cells, grid = self.level(radius)
+        px, py = position.x, position.y
+        radius_sq = radius * radius
+        xmin, xmax = max(int(px - radius) // level_size, 0), min(int(px + radius) // level_size, cells.x - 1)
+        ymin, ymax = max(int(py - radius) // level_size, 0), min(int(py + radius) // level_size, cells.y - 1)
+        for cx in range(xmin, xmax+1):
+            x0 = cx * level_size
+            dx = max(x0 - px, 0, px - x0 - level_size)
+            for cy in range(ymin, ymax+1):
+                y0 = cy * level_size
+                dy = max(y0 - py, 0, py - y0 - level_size)
+                # Skip cells whose closest point is out of reach (box corners)
+                if dx*dx + dy*dy > radius_sq:
+                    continue
+                for item in grid[cx][cy]:
+                    distance_sq = position.distance_squared_to(item.position)
+                    if distance_sq <= radius_sq:
+                        yield item, math.sqrt(distance_sq)
@@ -0,0 +1,119 @@
+import os
+import csv
+import itertools
+
+
+# Constants and Defaults
+LINEAGE_WINDOW = 100000  # Dead creatures kept in memory (most recent deaths)
+LINEAGE_SPILL = 10000  # Dead creatures moved to the archive at once, once the window is full
+CAUSE_STARVED = "starved"
+CAUSE_EATEN = "eaten"
+LINEAGE_FIELDS = ('id', 'parent', 'generation', 'birth', 'death', 'cause')
+
+
+class Lineage():
+
+    # Id-based family tree : one record per creature, (parent id, generation, birth tick, genome) plus
+    # (death tick, cause) once dead. Creatures only keep their parent id, so ancestors are never kept alive.
+    # Living creatures are always in memory, the dead only within a bounded window : older records are
+    # appended to the [archive] CSV file (if any), or dropped. With [append] (resumed runs), an existing archive
+    # is continued instead of being started over.
+
+    def __init__(self, genes, archive=None, window=LINEAGE_WINDOW, spill=LINEAGE_SPILL, append=False):
+        # Config
+        self.genes = tuple(genes)
+        self.archive = archive
+        self.window = window
+        self.spill_size = spill
+        # Internals
+        self.living = dict()  # Id -> (parent, generation, birth, genome)
+        self.dead = dict()  # Id -> (parent, generation, birth, genome, death, cause), in death order
+        self.archived = 0
+        if self.archive and not (append and os.path.isfile(self.archive) and os.path.getsize(self.archive)):
+            with open(self.archive, "w", newline="") as f:
+                csv.writer(f).writerow(LINEAGE_FIELDS + self.genes)
+
+    def __len__(self):
+        return len(self.living) + len(self.dead)
+
+    # ----- Records ----- #
+
+    def birth(self, node_id, parent_id, generation, time, genome):
+        # Genes as floats, whichever backend (founders' genes can be ints)
+        self.living[node_id] = (parent_id, generation, time, tuple(map(float, genome)))
+
+    def birth_many(self, node_ids, parent_ids, generations, time, genomes):
+        for node_id, parent_id, generation, genome in zip(node_ids, parent_ids, generations, genomes):
+            self.living[node_id] = (parent_id, generation, time, tuple(genome))
+
+    def death(self, node_id, time, cause):
+        record = self.living.pop(node_id, None)
+        if record is not None:
+            self.dead[node_id] = record + (time, cause)
+            if len(self.dead) > self.window + self.spill_size:
+                self.spill(self.spill_size)
+
+    def death_many(self, node_ids, time, cause):
+        for node_id in node_ids:
+            self.death(node_id, time, cause)
+
+    def reset(self, records=()):
+        # Living creatures only (e.g. restored from a checkpoint), dead records are kept
+        # [records] : (id, parent, generation, birth, genome)
+        self.living = {node_id: (parent_id, generation, birth, tuple(genome))
+                       for node_id, parent_id, generation, birth, genome in records}
+        for node_id in self.living:
+            self.dead.pop(node_id, None)
+
+    # ----- Archive ----- #
+
+    def spill(self, count):
+        # Oldest [count] dead records out of memory (into the archive, if any)
+        ids = list(itertools.islice(self.dead, count))
+        records = [(node_id,) + self.dead.pop(node_id) for node_id in ids]
+        if self.archive:
+            with open(self.archive, "a", newline="") as f:
+                csv.writer(f).writerows(
+                    (node_id, parent_id, generation, birth, death, cause) + genome
+                    for node_id, parent_id, generation, birth, genome, death, cause in records)
+        self.archived += len(records)
+
+    def flush(self):
+        # Every dead record into the archive
+        self.spill(len(self.dead))
+
+    def mark(self):
+        # Checkpoint : every dead record into the archive, then its size to rewind to on resume (None without one)
+        if not self.archive:
+            return None
+        self.flush()
+        return os.path.getsize(self.archive)
+
+    def rewind(self, size):
+        # Resume : records archived after the checkpoint was written are dropped, as they will be archived again
+        if self.archive and size is not None and os.path.isfile(self.archive) and os.path.getsize(self.archive) > size:
+            os.truncate(self.archive, size)
+
+    # ----- Lookups ----- #
+
+    def get(self, node_id):
+        # Record in memory (None if unknown or archived)
+        return self.living.get(node_id) or self.dead.get(node_id)
+
+    def parent(self, node_id):
+        record = self.get(node_id)
+        return -1 if record is None else record[0]
+
+    def ancestors(self, node_id):
+        # Ancestor ids, closest first, as far as memory goes
+        node_id = self.parent(node_id)
+        while node_id >= 0:
+            yield node_id
+            node_id = self.parent(node_id)
+
+    def related(self, a, b):
+        # Parent, child or sibling (same parent, founders included), as creatures see it (Creature.related)
+        record_a, record_b = self.get(a), self.get(b)
+        if record_a is None or record_b is None:
+            return (record_a is not None and record_a[0] == b) or (record_b is not None and record_b[0] == a)
+        return record_a[0] == b or record_b[0] == a or record_a[0] == record_b[0]
@@ -1,18 +1,16 @@
-import random
+import math
 import itertools
 import collections
 import pygame
 from evo import task
 from evo import dna
-
-
-# Initialize
-pygame.init()
+from evo.lineage import CAUSE_STARVED, CAUSE_EATEN
 
 
 class Node(pygame.sprite.Sprite):
 
     id_tracker = itertools.count()
+    RNG_STREAM = "spawn"
 
     def __init__(self, engine, position: pygame.math.Vector2 = None):
         # Parent
@@ -21,16 +19,19 @@ class Node(pygame.sprite.Sprite):
         self.engine = engine
         # Variables
         if position is None:
-            self.position = self.engine.random_map_position()
+            self.position = self.engine.random_map_position(getattr(self.engine.rng, self.RNG_STREAM))
         else:
             self.position = self.validate_position(position)
         # Characteristics
         self.id = next(Node.id_tracker)
-        self.name = "{}-{}".format(self.__class__.__name__, self.id)
 
     def __repr__(self):
         return self.name
 
+    @property
+    def name(self):
+        return "{}-{}".format(self.__class__.__name__, self.id)
+
     def validate_position(self, pos):
         return self.engine.clamp_map_position(pos)
 
@@ -38,14 +39,39 @@ class Node(pygame.sprite.Sprite):
         return other.position - self.position
 
 
-class Exploration(Node):
-    pass
+class Waypoint():
+
+    # Positional target : a bare map position, no sprite / id / name (one is picked on most ticks).
+
+    __slots__ = ('position',)
+    id = -1
+
+    def __init__(self, engine, position=None):
+        if position is None:
+            self.position = engine.random_map_position(engine.rng.behavior)
+        else:
+            self.position = self.validate_position(engine, position)
+
+    def __repr__(self):
+        return "{}({:.0f}, {:.0f})".format(self.__class__.__name__, self.position.x, self.position.y)
+
+    @staticmethod
+    def validate_position(engine, position):
+        return engine.clamp_map_position(position)
+
+
+class Exploration(Waypoint):
 
+    __slots__ = ()
 
-class Escape(Node):
 
-    def validate_position(self, position):
-        return self.engine.bounce_map_position(position)
+class Escape(Waypoint):
+
+    __slots__ = ()
+
+    @staticmethod
+    def validate_position(engine, position):
+        return engine.bounce_map_position(position)
 
 
 class PhysicalNode(Node):
@@ -54,20 +80,26 @@ class PhysicalNode(Node):
         # Parent
         super().__init__(engine=engine, position=position)
         # Image
+        self.sprite = None
         self.image = None
         self.rect = None
         # Initialize
         self.load_image()
         self.refresh()
 
-    def _image(self):
-        image = pygame.Surface((10, 10))
-        image.fill((0, 0, 255))
-        return image
+    def _sprite(self):
+        return self.engine.atlas.default
 
     def load_image(self):
-        self.image = self._image()
-        self.rect = self.image.get_rect()
+        # Headless engines never draw : keep a bare rect for positioning/selection.
+        if self.engine.headless:
+            self.sprite = None
+            self.image = None
+            self.rect = pygame.Rect(0, 0, 1, 1)
+        else:
+            self.sprite = self._sprite()
+            self.image = self.engine.atlas.image(self.sprite)
+            self.rect = self.image.get_rect()
 
     def refresh(self):
         self.rect.centerx = self.position.x
@@ -80,6 +112,9 @@ class Lifeform(PhysicalNode):
         super().__init__(engine=engine, position=position)
         self.nutrition = 0
         self.add(self.engine.lifeforms)
+        # Spatial grid (kept up to date on move / kill)
+        self.grid_cell = None
+        self.grid.insert(self)
 
     def drain(self, amount):
         # Clamp bite amount
@@ -87,11 +122,19 @@ class Lifeform(PhysicalNode):
         self.nutrition -= amount
         # Die if nutrition <= 0
         if self.nutrition <= 0:
-            self.die()
+            self.die(CAUSE_EATEN)
         # Return bite amount
         return amount
 
-    def die(self):
+    @property
+    def grid(self):
+        return self.engine.grid
+
+    def kill(self):
+        self.grid.remove(self)
+        super().kill()
+
+    def die(self, cause=None):
         self.kill()
 
 
@@ -101,95 +144,112 @@ class Fruit(Lifeform):
         super().__init__(engine=engine, position=position)
         self.add(self.engine.fruits)
 
+    @property
+    def grid(self):
+        # Fruits never move : they get their own grid, only updated on spawn / death
+        return self.engine.fruit_grid
+
     @classmethod
-    def spawn(cls, engine):
-        fruit_class = random.choice(cls.__subclasses__())
-        return fruit_class(engine)
+    def spawn_many(cls, engine, count):
+        # Batched spawn : kinds and positions drawn at once
+        rng = engine.rng.fruits
+        fruit_classes = cls.__subclasses__()
+        kinds = rng.integers(0, len(fruit_classes), count).tolist()
+        for kind, position in zip(kinds, engine.random_map_positions(count, rng).tolist()):
+            fruit_classes[kind](engine, position=pygame.Vector2(position))
 
 
 class Cherry(Fruit):
 
+    NUTRITION = 1000
+
     def __init__(self, engine, position=None):
         super().__init__(engine=engine, position=position)
-        self.nutrition = 1000
+        self.nutrition = self.NUTRITION
 
-    def _image(self):
-        return self.engine.images_fruits['cherry']
+    def _sprite(self):
+        return self.engine.atlas.fruit('cherry')
 
 
 class Banana(Fruit):
 
+    NUTRITION = 2000
+
     def __init__(self, engine, position=None):
         super().__init__(engine=engine, position=position)
-        self.nutrition = 2000
+        self.nutrition = self.NUTRITION
 
-    def _image(self):
-        return self.engine.images_fruits['banana']
+    def _sprite(self):
+        return self.engine.atlas.fruit('banana')
 
 
 class Pineapple(Fruit):
 
+    NUTRITION = 3000
+
     def __init__(self, engine, position=None):
         super().__init__(engine=engine, position=position)
-        self.nutrition = 3000
+        self.nutrition = self.NUTRITION
 
-    def _image(self):
-        return self.engine.images_fruits['pineapple']
+    def _sprite(self):
+        return self.engine.atlas.fruit('pineapple')
 
 
 class Creature(Lifeform):
 
     DECAY = 0.00075
-
-    def __init__(self, engine, position=None, parent=None):
-        # Parent
-        self.parent = parent
-        # Specs
-        if self.parent is None:
+    WAYPOINTS = 10  # Past targets kept (selected creature only)
+
+    def __init__(self, engine, position=None, parent=None, genome=None):
+        # Parent : only its id is kept (ancestry lives in the engine lineage)
+        self.parent_id = -1 if parent is None else parent.id
+        # Specs : [genome] (gene values in dna.GENOME order) if given, mutated from the parent otherwise
+        if genome is not None:
+            self.size, self.speed, self.perception, self.digestion = (
+                gene(value) for gene, value in zip(dna.GENES, genome))
+        elif parent is None:
             self.size = dna.Size()
             self.speed = dna.Speed()
             self.perception = dna.Perception()
             self.digestion = dna.Digestion()
+        else:
+            rng = engine.rng.mutation
+            self.size = parent.size.mutate(rng)
+            self.speed = parent.speed.mutate(rng)
+            self.perception = parent.perception.mutate(rng)
+            self.digestion = parent.digestion.mutate(rng)
+        if parent is None:
             self.generation = 1
             self.task = None
         else:
-            position = self.parent.position
-            self.size = self.parent.size.mutate()
-            self.speed = self.parent.speed.mutate()
-            self.perception = self.parent.perception.mutate()
-            self.digestion = self.parent.digestion.mutate()
-            self.generation = self.parent.generation + 1
+            position = parent.position
+            self.generation = parent.generation + 1
             self.task = task.Wean(timer=20)
         # Lifeform
         super().__init__(engine=engine, position=position)
         self.nutrition = self.size.cost * 1800
         # PyGame
-        self.add(self.engine.creatures)
+        self.add(self.engine.creatures, self.engine.awake)
+        self.engine.population.add(self.genome)
+        self.engine.lineage.birth(self.id, self.parent_id, self.generation, self.engine.time, self.genome)
         # Variables
         self.age = 0
         self.energy = self.nutrition  # Start_energy = Consumption value
         self.target = None
-        self.waypoints = collections.deque(maxlen=10)
+        self.waypoints = ()
         self.incapacitated = False
+        self.slept = None  # Asleep : tick up to which aging was applied
+        self.wakes = None  # Asleep : tick scheduled to wake up
+        # Newborns wean asleep
+        if self.task:
+            self.sleep(self.engine.time)
 
-    def _image(self):
-        # Color
-        # TODO : Should be dynamic
-        if self.digestion.value >= 6:
-            # Carnivore
-            color = 2
-        elif self.digestion.value <= 4:
-            # Herbivore
-            color = 0
-        else:
-            # Omnivore
-            color = 1
-        # Size
-        for images_size, images in self.engine.images_creatures:
-            if self.size.value >= images_size:
-                return images[color]
-        # If no match, fallback on parent sprite
-        return super()._image()
+    def _sprite(self):
+        return self.engine.atlas.creature(self.size.value, self.digestion.value)
+
+    @property
+    def genome(self):
+        return (self.size.value, self.speed.value, self.perception.value, self.digestion.value)
 
     @property
     def reproduction_cost(self):
@@ -219,69 +279,81 @@ class Creature(Lifeform):
         return self.digestion.herbivore
 
     def related(self, other):
-        return (self.parent == other) or (other.parent == self) or (self.parent == other.parent)
+        # Parent, child or sibling (same parent : founders, without one, are all siblings)
+        return self.parent_id == other.id or other.parent_id == self.id or self.parent_id == other.parent_id
 
     def reproduce(self):
         self.energy -= self.reproduction_cost
-        Creature(engine=self.engine, parent=self)
+        self.engine.births += 1
+        self.engine.offspring.append(self)
+
+    def die(self, cause=None):
+        if self.alive():
+            self.engine.deaths += 1
+            self.engine.lineage.death(self.id, self.engine.time, cause)
+        super().die(cause)
+
+    def kill(self):
+        if self.alive():
+            self.engine.population.remove(self.genome)
+            if self.wakes is not None:
+                self.engine.scheduler.cancel(self.wakes, self)
+                self.wakes = None
+        super().kill()
 
     def look_nearby(self):
-        # Min bounds
-        xmin, ymin = self.engine.map_to_grid(self.position - pygame.math.Vector2(self.perception.distance))
-        # Max bounds
-        xmax, ymax = self.engine.map_to_grid(self.position + pygame.math.Vector2(self.perception.distance))
-        # Look in cells
-        for cellx in range(xmin, xmax+1):
-            for celly in range(ymin, ymax+1):
-                for lf in self.engine.grid[cellx][celly]:
-                    yield lf
+        # Lifeforms within perception range, along with their distance
+        return itertools.chain(
+            self.engine.fruit_grid.query(self.position, self.perception.distance),
+            self.engine.grid.query(self.position, self.perception.distance))
 
     def look(self):
         # Look for lifeforms nearby
-        for lf in self.look_nearby():
+        for lf, distance in self.look_nearby():
             # Fruits are never a predator
             if isinstance(lf, Fruit):
-                yield lf, False
+                yield lf, False, distance
             elif isinstance(lf, Creature):
                 # Ignore self or related
                 if lf is self or self.related(lf):
                     continue
                 # Smaller creatures are a prey
                 if self.size.value > lf.size.value * 1.25:
-                    yield lf, False
+                    yield lf, False, distance
                 # Bigger creatures are a predator
                 elif lf.size.value > self.size.value * 1.25:
-                    yield lf, True
+                    yield lf, True, distance
 
     def select_target(self) -> Lifeform:
         # Init
-        predator, predator_score, predator_vector = None, 0, None
+        predator, predator_score = None, 0
         prey, prey_score = None, 0
         # Look around
-        for lf, is_predator in self.look():
-            # Delta vector
-            vector = self.vector_to(lf)
+        examined = 0
+        for lf, is_predator, distance in self.look():
+            examined += 1
             # If target a predator
             if is_predator:
-                distance = vector.magnitude()
-                if distance <= self.perception.distance:
-                    score = 1 / max(1, distance)
-                    if score > predator_score:
-                        predator, predator_score, predator_vector = lf, score, vector
+                score = 1 / max(1, distance)
+                if score > predator_score:
+                    predator, predator_score = lf, score
             # If target is a prey, and no predator was spotted
             elif not predator:
-                distance = vector.magnitude()
-                if distance <= self.perception.distance:
-                    score = self.digestion_ratio(lf) * lf.nutrition / max(1, distance**2)
-                    if score > prey_score:
-                        prey, prey_score = lf, score
+                score = self.digestion_ratio(lf) * lf.nutrition / max(1, distance**2)
+                if score > prey_score:
+                    prey, prey_score = lf, score
+        # Instrumentation
+        profiler = self.engine.profiler
+        if profiler.enabled:
+            profiler.count('selections')
+            profiler.count('candidates', examined)
+            profiler.count('targets', predator is not None or (prey is None and not self.target))
         # Did we spot a predator?
         if predator:
-            try:
-                target_pos = self.position-predator_vector.normalize() * self.perception.distance * 0.5
-            except ValueError:
-                # Cannot determine feeing direction, can happen if vector is (0,0)
-                # Just pass pos=None to make it random....
+            if self.position != predator.position:
+                target_pos = self.position.move_towards(predator.position, -self.perception.distance * 0.5)
+            else:
+                # Cannot determine fleeing direction : pass pos=None to make it random....
                 target_pos = None
             self.set_target(Escape(self.engine, position=target_pos))
         # Did we post a prey?
@@ -307,8 +379,13 @@ class Creature(Lifeform):
         self.set_target(None)
         return False
 
+    def track(self, enabled=True):
+        # Past targets are only recorded (and drawn) while tracked
+        self.waypoints = collections.deque(maxlen=self.WAYPOINTS) if enabled else ()
+
     def set_target(self, target):
-        self.waypoints.append(self.position.xy)
+        if self.waypoints != ():
+            self.waypoints.append(self.position.xy)
         self.target = target
 
     def refresh_target(self):
@@ -320,7 +397,7 @@ class Creature(Lifeform):
             # If prey alive but is is a creature, check its distance
             elif isinstance(self.target, Creature):
                 # If creature-prey is too far, drop it
-                if self.vector_to(self.target).magnitude() > self.perception.distance:
+                if self.position.distance_to(self.target.position) > self.perception.distance:
                     self.set_target(None)
         # Look for a new target id:
         # - We just droppped our target
@@ -330,11 +407,11 @@ class Creature(Lifeform):
             self.select_target()
 
     def move(self):
-        # Compute distance vector
-        vector = self.vector_to(self.target)
+        target_position = self.target.position
         # If within range, jump to tagret
-        if vector.magnitude() < self.speed.value + self.size.value:
-            self.position.update(self.target.position)
+        if self.position.distance_to(target_position) < self.speed.value + self.size.value:
+            self.position.update(target_position)
+            self.engine.grid.move(self)
             if isinstance(self.target, Lifeform):
                 # Incapacitate target
                 self.incapacitate_target()
@@ -348,29 +425,57 @@ class Creature(Lifeform):
                 self.set_target(None)
         # Else, move towards tagret
         else:
-            self.position += vector.normalize() * self.speed.value
+            self.position.move_towards_ip(target_position, self.speed.value)
+            self.engine.grid.move(self)
             self.energy -= self.speed.cost * self.size.cost  # Energy to move (volume of creature * speed**2)
 
-    def refresh(self):
-        # Parent
-        super().refresh()
-        # If needed, disply extra info
-        if self.engine.selected is self:
-            # Draw past waypoints
-            if len(self.waypoints) > 0:
-                wp0 = self.waypoints[0]
-                for i in range(1, len(self.waypoints)):
-                    wp1 = self.waypoints[i]
-                    pygame.draw.line(self.engine.map, (160, 192, 160), wp0, wp1, 2)
-                    wp0 = wp1
-                pygame.draw.line(self.engine.map, (160, 192, 160), wp0, self.position, 2)
-            # [Debug] draw rect
-            # pygame.draw.rect(self.engine.map, (0,0,0), self.rect, 1)
-            # Draw a circle for perception
-            pygame.draw.circle(self.engine.map, (96, 96, 96), self.position, self.perception.distance, 1)
-            # Draw a line for target (if any)
-            if self.target:
-                pygame.draw.line(self.engine.map, (96, 96, 96), self.position, self.target.position, 1)
+    def aging(self, ticks):
+        # Energy spent over the next [ticks] ticks : sum of (age+i) * DECAY + perception cost, for i in 1..ticks
+        return ticks * self.perception.cost + self.DECAY * (ticks * self.age + ticks * (ticks + 1) / 2)
+
+    def sleep(self, now):
+        # Hands the task over to the engine scheduler (no per-tick update) : asleep creatures are skipped
+        # until the task expires or they starve, aging is then applied in closed form.
+        self.slept = now
+        ticks = math.ceil(self.task.timer)
+        if self.energy <= self.aging(ticks):
+            # Starving : first tick energy runs out
+            low, high = 1, ticks
+            while low < high:
+                mid = (low + high) // 2
+                if self.energy <= self.aging(mid):
+                    high = mid
+                else:
+                    low = mid + 1
+            ticks = low
+        self.remove(self.engine.awake)
+        self.wakes = now + ticks
+        self.engine.scheduler.schedule(self.wakes, self)
+
+    def settle(self, now):
+        # Applies aging (and task timer) up to tick [now] included
+        ticks = now - self.slept
+        if ticks > 0:
+            self.energy -= self.aging(ticks)
+            self.age += ticks
+            self.task.timer -= ticks
+            self.slept = now
+
+    def settled(self, now):
+        # (age, energy) as of tick [now], without applying aging : for display only
+        if self.slept is None or now <= self.slept:
+            return self.age, self.energy
+        ticks = now - self.slept
+        return self.age + ticks, self.energy - self.aging(ticks)
+
+    def wake(self, now):
+        self.settle(now)
+        self.slept = self.wakes = None
+        if self.energy <= 0:
+            self.die(CAUSE_STARVED)
+        else:
+            self.add(self.engine.awake)
+            self.task.action()
 
     def update(self):
         # Time passes...
@@ -378,7 +483,8 @@ class Creature(Lifeform):
         self.energy -= self.age * self.DECAY + self.perception.cost
         # Check if we ran out of energy.
         if self.energy <= 0:
-            self.die()
+            self.die(CAUSE_STARVED)
+            return
         # Do we have an ongoing action?
         if self.task:
             self.task.tick()
@@ -393,3 +499,6 @@ class Creature(Lifeform):
             self.move()
         # Either way, refresh sprite(s).
         self.refresh()
+        # Timed tasks are left to the engine scheduler (unless eaten meanwhile)
+        if self.task and self.task.timed and self.alive():
+            self.sleep(self.engine.time)
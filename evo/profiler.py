@@ -0,0 +1,70 @@
+import csv
+import json
+import collections
+
+
+# Constants and Defaults
+PROFILER_HISTORY = 10000
+
+
+class Profiler():
+
+    # Per-tick phase timings and hot-path counters. Instrumented code checks [enabled] first,
+    # so a disabled profiler costs one attribute lookup per call site.
+
+    def __init__(self, enabled=False, history=PROFILER_HISTORY):
+        # Config
+        self.enabled = enabled
+        # Internals
+        self.timings = collections.defaultdict(float)
+        self.counters = collections.defaultdict(int)
+        self.totals = dict()
+        self.records = collections.deque(maxlen=history)
+        self.latest = dict()
+
+    def add_time(self, name, seconds):
+        self.timings[name] += seconds
+
+    def count(self, name, amount=1):
+        self.counters[name] += amount
+
+    def tick(self, time, totals=None, gauges=None):
+        # Closes the current tick. [totals] are running counts (per-tick deltas are recorded),
+        # [gauges] are recorded as is.
+        record = {'time': time}
+        for name, seconds in self.timings.items():
+            record["{}_ms".format(name)] = round(seconds * 1000, 4)
+        record['tick_ms'] = round(sum(self.timings.values()) * 1000, 4)
+        record.update(self.counters)
+        for name, total in (totals or dict()).items():
+            record[name] = total - self.totals.get(name, total)
+            self.totals[name] = total
+        record.update(gauges or dict())
+        self.records.append(record)
+        self.latest = record
+        self.timings.clear()
+        self.counters.clear()
+
+    def fields(self):
+        fields = dict()
+        for record in self.records:
+            fields.update(dict.fromkeys(record))
+        return list(fields)
+
+    def summary(self):
+        # Mean of every field over the recorded window
+        count = max(len(self.records), 1)
+        return {
+            name: round(sum(record.get(name, 0) for record in self.records) / count, 4)
+            for name in self.fields() if name != 'time'}
+
+    def dump(self, path):
+        # CSV if [path] ends with .csv, JSON otherwise
+        if str(path).endswith(".csv"):
+            with open(path, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=self.fields(), restval=0)
+                writer.writeheader()
+                writer.writerows(self.records)
+        else:
+            with open(path, "w") as f:
+                json.dump({'summary': self.summary(), 'records': list(self.records)}, f)
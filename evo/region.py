@@ -0,0 +1,692 @@
+import os
+import math
+import atexit
+import warnings
+import itertools
+import traceback
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy
+from evo import utils
+from evo import dna
+from evo.profiler import Profiler
+from evo.lineage import CAUSE_EATEN
+from evo.world import (ArrayWorld, Table, CREATURE_COLUMNS, FRUIT_COLUMNS, TARGET_FRUIT, TARGET_CREATURE,
+                       table_sprites, lineage_records)
+
+
+# Constants and Defaults
+REGION_HALO = dna.Perception.VMAX * dna.Perception.DISTANCE_RATIO + 2 * (dna.Speed.VMAX + dna.Size.VMAX)
+REGION_POLL = 1.0  # Seconds between checks that workers are still alive, while waiting for their replies
+REGION_HEADER = 8  # Outbox header : int64 row count of each section
+REGION_TABLES = ('creatures', 'fruits')
+TABLE_CREATURES, TABLE_FRUITS = range(len(REGION_TABLES))
+# - Outbox sections : rows sent to the left / right neighbour, then effects (sent to both)
+SECTION_CREATURES, SECTION_FRUITS, SECTION_EFFECTS = 0, 2, 4
+SIDE_LEFT, SIDE_RIGHT = 0, 1
+# - Effects : (table, effect, uid, amount) rows, about rows owned by another region
+EFFECT_DRAIN, EFFECT_INCAPACITATE, EFFECT_GONE = range(3)
+EFFECT_WIDTH = 4
+
+
+# ----- Rows ----- #
+
+def record_layout(columns):
+    # (column, offset, width) of table rows packed as float64 records (uids stay exact below 2**53)
+    layout, offset = list(), 0
+    for name, (_, width) in dict(columns, uid=(numpy.int64, None)).items():
+        layout.append((name, offset, width))
+        offset += width or 1
+    return layout, offset
+
+
+def pack(table, layout, rows):
+    records = numpy.empty((len(rows), layout[1]))
+    for name, offset, width in layout[0]:
+        records[:, offset:offset + (width or 1)] = getattr(table, name)[rows].reshape(len(rows), width or 1)
+    return records
+
+
+def unpack(table, layout, rows, records):
+    for name, offset, width in layout[0]:
+        values = records[:, offset:offset + (width or 1)]
+        getattr(table, name)[rows] = values if width else values[:, 0]
+
+
+def record_uids(layout, records):
+    offset = next(offset for name, offset, _ in layout[0] if name == 'uid')
+    return records[:, offset].astype(numpy.int64)
+
+
+def find_rows(table, uids):
+    # Alive rows holding [uids] (-1 if none)
+    rows = table.rows()
+    if not len(rows):
+        return numpy.full(len(uids), -1, dtype=numpy.int64)
+    order = numpy.argsort(table.uid[rows])
+    rows, sorted_uids = rows[order], table.uid[rows[order]]
+    slots = numpy.minimum(numpy.searchsorted(sorted_uids, uids), len(rows) - 1)
+    return numpy.where(sorted_uids[slots] == uids, rows[slots], -1)
+
+
+def relink(creatures, fruits, rows):
+    # Points lifeform targets of creature [rows] back at their uid (targets not found stay invalid)
+    for kind, table in ((TARGET_FRUIT, fruits), (TARGET_CREATURE, creatures)):
+        linked = rows[creatures.target[rows] == kind]
+        creatures.target_row[linked] = numpy.maximum(find_rows(table, creatures.target_uid[linked]), 0)
+
+
+def gathered_table(columns, layout, records):
+    table = Table(columns, capacity=max(len(records), 1))
+    unpack(table, layout, table.allocate(len(records)), records)
+    return table
+
+
+# ----- Workers ----- #
+
+class Outbox():
+
+    # Shared memory block written by one region every other tick (header, then float64 rows section by section),
+    # replaced by a larger one when it runs out of room. Neighbours read it the next tick.
+
+    def __init__(self):
+        self.memory = shared_memory.SharedMemory(create=True, size=8 * REGION_HEADER)
+        self.write(())
+
+    @property
+    def name(self):
+        return self.memory.name
+
+    def write(self, sections):
+        size = 8 * REGION_HEADER + sum(section.nbytes for section in sections)
+        if size > self.memory.size:
+            self.close()
+            self.memory = shared_memory.SharedMemory(create=True, size=2 * size)
+        header = numpy.ndarray(REGION_HEADER, dtype=numpy.int64, buffer=self.memory.buf)
+        header[:] = 0
+        header[:len(sections)] = [len(section) for section in sections]
+        offset = 8 * REGION_HEADER
+        for section in sections:
+            numpy.ndarray(section.shape, dtype=numpy.float64, buffer=self.memory.buf, offset=offset)[:] = section
+            offset += section.nbytes
+        del header
+
+    def close(self):
+        self.memory.close()
+        self.memory.unlink()
+
+
+def read_outbox(memory, widths):
+    # Copies of every section of an outbox
+    header = numpy.ndarray(REGION_HEADER, dtype=numpy.int64, buffer=memory.buf).tolist()
+    sections, offset = list(), 8 * REGION_HEADER
+    for count, width in zip(header, widths):
+        sections.append(numpy.ndarray((count, width), dtype=numpy.float64, buffer=memory.buf, offset=offset).copy())
+        offset += 8 * count * width
+    return sections
+
+
+class RegionContext():
+
+    # Engine stand-in inside a worker : map size, random stream, clock and profiler for ArrayWorld,
+    # whose population and lineage calls are recorded as events for the engine.
+
+    def __init__(self, map_size, seed):
+        self.map_size = utils.Int2D(*map_size)
+        self.rng = utils.RandomStreams(seed)
+        self.profiler = Profiler(enabled=False)
+        self.population = self.lineage = self
+        self.time = 0
+        self.births = 0
+        self.deaths = 0
+        self.born = list()
+        self.died = list()
+
+    def add_many(self, genomes):
+        # Births carry their genomes (see birth_many)
+        pass
+
+    def reset(self, genomes):
+        pass
+
+    def birth_many(self, node_ids, parent_ids, generations, time, genomes):
+        self.born.append((node_ids, parent_ids, generations, genomes))
+
+
+class Region(ArrayWorld):
+
+    # One vertical strip of the map, stepped in a worker process with the array backend rules.
+    # Rows are either owned (inside the strip) or ghosts : copies of neighbour rows within [halo] of the strip,
+    # refreshed every tick, so that perception, hunting and eating work across borders.
+    # Effects on ghosts (bites, incapacitation) are sent to their owner, and creatures leaving the strip
+    # are handed over to the neighbour they moved into.
+
+    EXTRA_COLUMNS = {'ghost': (bool, None)}
+
+    def __init__(self, index, edges, halo, map_size, margin, tile_size, cell_size, seed):
+        super().__init__(RegionContext(map_size, seed), margin, tile_size, cell_size)
+        # Strip
+        self.index = index
+        self.regions = len(edges) - 1
+        self.x_min = edges[index] if index > 0 else -math.inf
+        self.x_max = edges[index + 1] if index < self.regions - 1 else math.inf
+        self.spawn_range = (max(edges[index], self.map_min.x), min(edges[index + 1], self.map_max.x))
+        self.halo = halo
+        # Uids stay unique across regions
+        for table in (self.creatures, self.fruits):
+            table.uid_tracker = itertools.count(index, self.regions)
+        # Exchanges
+        self.layouts = {'creatures': record_layout(CREATURE_COLUMNS), 'fruits': record_layout(FRUIT_COLUMNS)}
+        self.widths = (self.layouts['creatures'][1],) * 2 + (self.layouts['fruits'][1],) * 2 + (EFFECT_WIDTH,)
+        self.outboxes = (Outbox(), Outbox())  # By tick parity
+        self.inboxes = dict()  # Name -> neighbour outbox
+        self.effects = list()
+        self.emigrants = numpy.zeros(0, dtype=numpy.int64)  # Creatures handed over last tick
+
+    def close(self):
+        for outbox in self.outboxes:
+            outbox.close()
+        for memory in self.inboxes.values():
+            memory.close()
+
+    def owned_rows(self):
+        rows = self.creatures.rows()
+        return rows[~self.creatures.ghost[rows]]
+
+    def owns(self, positions):
+        return (positions[:, 0] >= self.x_min) & (positions[:, 0] < self.x_max)
+
+    def strip_positions(self, count):
+        return numpy.column_stack((
+            self.rng.uniform(*self.spawn_range, count),
+            self.rng.uniform(self.map_min.y, self.map_max.y, count)
+        ))
+
+    def effect(self, table, effect, uids, amounts=0):
+        records = numpy.zeros((len(uids), EFFECT_WIDTH))
+        records[:, 0], records[:, 1], records[:, 2], records[:, 3] = table, effect, uids, amounts
+        self.effects.append(records)
+
+    # ----- Commands ----- #
+
+    def tick(self, time, creatures, fruits, neighbours):
+        # [neighbours] : (left, right) outbox names of the previous tick, None at the map edges
+        self.engine.time = time
+        self.exchange(neighbours)
+        if creatures:
+            self.spawn_creatures(creatures, positions=self.strip_positions(creatures))
+        if fruits:
+            self.spawn_fruits(fruits, positions=self.strip_positions(fruits))
+        # Step, then report creatures incapacitated by a predator from this side of the border
+        c = self.creatures
+        ghosts = numpy.flatnonzero(c.alive & c.ghost)
+        incapacitated = c.incapacitated[ghosts]
+        self.step()
+        self.effect(TABLE_CREATURES, EFFECT_INCAPACITATE, c.uid[ghosts[c.incapacitated[ghosts] & ~incapacitated]])
+        self.publish(self.outboxes[time % 2])
+        return self.report()
+
+    def gather(self, view=None):
+        # Owned rows (within [view] : left, top, right, bottom), packed, and the next uids.
+        # Creatures being handed over are still this region's until the neighbour adopts them.
+        records, uid_next = dict(), dict()
+        for name in REGION_TABLES:
+            table = getattr(self, name)
+            owned = table.alive & ~table.ghost
+            if name == 'creatures':
+                owned[self.emigrants] |= table.alive[self.emigrants]
+            rows = numpy.flatnonzero(owned)
+            if view is not None:
+                x, y = table.position[rows, 0], table.position[rows, 1]
+                rows = rows[(x >= view[0]) & (x < view[2]) & (y >= view[1]) & (y < view[3])]
+            records[name] = pack(table, self.layouts[name], rows)
+            uid_next[name] = next(table.uid_tracker)
+            table.uid_tracker = itertools.count(uid_next[name], self.regions)
+        return records, uid_next
+
+    def save(self):
+        # Exact state for checkpoints : rows where they are (ghosts included), uids, random streams,
+        # creatures being handed over and the outbox neighbours read next tick
+        engine = self.engine
+        meta = {'time': engine.time, 'rng': engine.rng.getstate(), 'emigrants': self.emigrants.tolist()}
+        columns = dict()
+        for name in REGION_TABLES:
+            table = getattr(self, name)
+            meta[name], table_columns = table.state()
+            table.uid_tracker = itertools.count(meta[name]['uid_next'], self.regions)
+            columns.update({"{}.{}".format(name, column): array for column, array in table_columns.items()})
+        sections = read_outbox(self.outboxes[engine.time % 2].memory, self.widths)
+        columns.update({"outbox.{}".format(index): section for index, section in enumerate(sections)})
+        return meta, columns
+
+    def restore(self, meta, columns):
+        # Inverse of save()
+        engine = self.engine
+        engine.time = meta['time']
+        engine.rng.setstate(meta['rng'])
+        for name in REGION_TABLES:
+            table = getattr(self, name)
+            prefix = "{}.".format(name)
+            table.load_state(meta[name], {
+                column[len(prefix):]: array for column, array in columns.items() if column.startswith(prefix)})
+            table.uid_tracker = itertools.count(meta[name]['uid_next'], self.regions)
+        self.reset_indexes()
+        self.emigrants = numpy.array(meta['emigrants'], dtype=numpy.int64)
+        self.effects = list()
+        self.outboxes[engine.time % 2].write([columns["outbox.{}".format(index)] for index in range(len(self.widths))])
+        return self.report()
+
+    def load(self, records, uid_next):
+        # Replaces every row, then publishes halos for whichever tick comes next
+        for name in REGION_TABLES:
+            table = getattr(self, name)
+            table.release(table.rows())
+            rows = table.allocate(len(records[name]))
+            unpack(table, self.layouts[name], rows, records[name])
+            table.ghost[rows] = False
+            start = uid_next[name] + (self.index - uid_next[name]) % self.regions
+            table.uid_tracker = itertools.count(start, self.regions)
+        # Target rows are the gathered table's : relinked by uid (targets over the border once halos are in)
+        c = self.creatures
+        rows = c.rows()
+        c.target_row[rows] = 0
+        relink(c, self.fruits, rows)
+        self.reset_indexes()
+        self.emigrants = numpy.zeros(0, dtype=numpy.int64)
+        self.effects = list()
+        for outbox in self.outboxes:
+            self.publish(outbox)
+        return self.report()
+
+    def report(self):
+        engine = self.engine
+        c = self.creatures
+        owned = c.alive & ~c.ghost
+        report = {
+            'outboxes': tuple(outbox.name for outbox in self.outboxes),
+            'born': engine.born,
+            'died': engine.died,
+            'births': engine.births,
+            'deaths': engine.deaths,
+            'creatures': int(owned.sum() + c.alive[self.emigrants].sum()),  # Handed over ones included
+            'fruits': int((self.fruits.alive & ~self.fruits.ghost).sum()),
+            'generation': int(c.generation[owned].max(initial=0)),
+            'occupancy': self.occupancy()
+        }
+        engine.born, engine.died = list(), list()
+        engine.births = engine.deaths = 0
+        return report
+
+    # ----- Exchanges ----- #
+
+    def inbox(self, name):
+        memory = self.inboxes.get(name)
+        if memory is None:
+            memory = self.inboxes[name] = shared_memory.SharedMemory(name=name)
+        return memory
+
+    def exchange(self, neighbours):
+        received = {name: list() for name in REGION_TABLES}
+        effects = list()
+        for name, side in zip(neighbours, (SIDE_RIGHT, SIDE_LEFT)):
+            if name is not None:
+                sections = read_outbox(self.inbox(name), self.widths)
+                received['creatures'].append(sections[SECTION_CREATURES + side])
+                received['fruits'].append(sections[SECTION_FRUITS + side])
+                effects.append(sections[SECTION_EFFECTS])
+        # Neighbours replaced a grown outbox : let go of the old one
+        for name in set(self.inboxes) - set(neighbours):
+            self.inboxes.pop(name).close()
+        if effects:
+            self.apply_effects(numpy.concatenate(effects))
+        for name in REGION_TABLES:
+            if received[name]:
+                self.merge(name, numpy.concatenate(received[name]))
+        self.emigrants = numpy.zeros(0, dtype=numpy.int64)
+        # Targets whose row changed (handed over, ghost recreated)
+        c = self.creatures
+        rows = c.rows()
+        rows = rows[numpy.isin(c.target[rows], (TARGET_FRUIT, TARGET_CREATURE))]
+        relink(c, self.fruits, rows[~self.target_valid(rows)])
+
+    def apply_effects(self, effects):
+        for index, name in enumerate(REGION_TABLES):
+            table = getattr(self, name)
+            effects_table = effects[effects[:, 0] == index]
+            rows = find_rows(table, effects_table[:, 2].astype(numpy.int64))
+            found = rows >= 0
+            effects_table, rows = effects_table[found], rows[found]
+            kinds = effects_table[:, 1]
+            # Rows their owner lost : drop ghosts
+            table.release(rows[(kinds == EFFECT_GONE) & table.ghost[rows]])
+            # Effects on owned rows
+            owned = ~table.ghost[rows]
+            if name == 'creatures':
+                table.incapacitated[rows[owned & (kinds == EFFECT_INCAPACITATE)]] = True
+            drained = owned & (kinds == EFFECT_DRAIN)
+            numpy.subtract.at(table.nutrition, rows[drained], effects_table[drained, 3])
+            dead = numpy.unique(rows[drained][table.nutrition[rows[drained]] <= 0])
+            if name == 'creatures':
+                self.kill_creatures(dead, CAUSE_EATEN)
+            else:
+                self.kill_fruits(dead)
+
+    def merge(self, name, records):
+        # Neighbour rows : ghosts, or owned for creatures that crossed into the strip
+        table = getattr(self, name)
+        layout = self.layouts[name]
+        rows = find_rows(table, record_uids(layout, records))
+        new = rows < 0
+        if new.any():
+            rows[new] = table.allocate(int(new.sum()))
+        unpack(table, layout, rows, records)
+        table.ghost[rows] = ~self.owns(table.position[rows])
+        if name == 'creatures':
+            # Target rows are the neighbour's : relinked by uid once every table is merged
+            table.target_row[rows] = 0
+        # Ghosts not refreshed left the halo (creatures handed over last tick are not adopted yet : keep them)
+        stale = table.alive & table.ghost
+        stale[rows] = False
+        if name == 'creatures':
+            stale[self.emigrants] = False
+        table.release(numpy.flatnonzero(stale))
+
+    def publish(self, outbox):
+        sections = [None] * (SECTION_EFFECTS + 1)
+        for name, section in zip(REGION_TABLES, (SECTION_CREATURES, SECTION_FRUITS)):
+            table = getattr(self, name)
+            rows = table.rows()
+            rows = rows[~table.ghost[rows]]
+            x = table.position[rows, 0]
+            left = rows[x < self.x_min + self.halo] if self.index > 0 else rows[:0]
+            right = rows[x >= self.x_max - self.halo] if self.index < self.regions - 1 else rows[:0]
+            sections[section + SIDE_LEFT] = pack(table, self.layouts[name], left)
+            sections[section + SIDE_RIGHT] = pack(table, self.layouts[name], right)
+        sections[SECTION_EFFECTS] = numpy.concatenate(self.effects) if self.effects else numpy.zeros((0, EFFECT_WIDTH))
+        outbox.write(sections)
+        self.effects = list()
+        # Creatures that left the strip are now their neighbour's
+        c = self.creatures
+        rows = self.owned_rows()
+        self.emigrants = rows[~self.owns(c.position[rows])]
+        c.ghost[self.emigrants] = True
+
+    # ----- Simulation (ghost-aware) ----- #
+
+    def spawn_fruits(self, count, positions=None):
+        # Recycled rows may have been ghosts
+        rows = super().spawn_fruits(count, positions)
+        self.fruits.ghost[rows] = False
+        return rows
+
+    def spawn_creatures(self, count, parents=None, positions=None):
+        rows = super().spawn_creatures(count, parents, positions)
+        self.creatures.ghost[rows] = False
+        return rows
+
+    def drain(self, consumers, table, kind):
+        # Bites taken from ghosts are sent to their owner
+        c = self.creatures
+        targets = numpy.unique(c.target_row[consumers[c.target[consumers] == kind]])
+        ghosts = targets[table.ghost[targets]]
+        nutrition = table.nutrition[ghosts]
+        super().drain(consumers, table, kind)
+        drained = nutrition - table.nutrition[ghosts]
+        bitten = drained > 0
+        self.effect(TABLE_CREATURES if kind == TARGET_CREATURE else TABLE_FRUITS, EFFECT_DRAIN,
+                    table.uid[ghosts[bitten]], drained[bitten])
+
+    def kill_creatures(self, rows, cause=None):
+        # Ghosts drained dry are only dropped : their owner kills them once the bites are in
+        c = self.creatures
+        c.release(rows[c.ghost[rows]])
+        released = c.release(rows[~c.ghost[rows]])
+        self.engine.died.append((c.uid[released].tolist(), c.genes[released].tolist(), cause))
+        self.engine.deaths += len(released)
+        self.effect(TABLE_CREATURES, EFFECT_GONE, c.uid[released])
+
+    def kill_fruits(self, rows):
+        f = self.fruits
+        f.release(rows[f.ghost[rows]])
+        self.effect(TABLE_FRUITS, EFFECT_GONE, f.uid[f.release(rows[~f.ghost[rows]])])
+
+
+def run_region(connection, config):
+    # Worker process : one Region, driven by (command, arguments) messages. Replies are (True, result),
+    # or (False, traceback) once a command failed, after which the worker stops.
+    region = None
+    try:
+        region = Region(**config)
+        connection.send((True, region.report()))
+        while True:
+            command, arguments = connection.recv()
+            if command == "stop":
+                break
+            connection.send((True, getattr(region, command)(*arguments)))
+    except EOFError:
+        # Engine gone
+        pass
+    except Exception:
+        connection.send((False, traceback.format_exc()))
+    finally:
+        if region:
+            region.close()
+        connection.close()
+
+
+# ----- Engine side ----- #
+
+class RegionWorld():
+
+    # Array backend split across worker processes : the map is cut into vertical strips (on grid cell edges,
+    # at least REGION_HALO wide so that only neighbours interact), each stepped by a Region in its own process.
+    # Regions exchange halos, handed over creatures and effects through shared memory ; the engine sends one
+    # command per tick and applies the births and deaths each region reports.
+
+    def __init__(self, engine, margin, tile_size, cell_size, workers=None):
+        self.engine = engine
+        # Strips
+        map_width = engine.map_size.x
+        count = max(1, min(os.cpu_count() if workers is None else workers, int(map_width // REGION_HALO)))
+        cells = utils.ceildiv(map_width, cell_size)
+        self.edges = (numpy.linspace(0, cells, count + 1).round().astype(numpy.int64) * cell_size).tolist()
+        self.edges[-1] = map_width
+        # - Spawns are split by strip area (within map margins)
+        low, high = numpy.clip(self.edges[:-1], margin, map_width - margin), numpy.clip(
+            self.edges[1:], margin, map_width - margin)
+        self.weights = (high - low) / (high - low).sum()
+        self.pending = {name: numpy.zeros(count, dtype=numpy.int64) for name in REGION_TABLES}
+        self.layouts = {'creatures': record_layout(CREATURE_COLUMNS), 'fruits': record_layout(FRUIT_COLUMNS)}
+        # Workers
+        os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+        context = multiprocessing.get_context("spawn")
+        self.connections, self.processes = list(), list()
+        for index in range(count):
+            connection, worker_connection = context.Pipe()
+            process = context.Process(target=run_region, daemon=True, args=(worker_connection, {
+                'index': index, 'edges': self.edges, 'halo': REGION_HALO, 'map_size': engine.map_size.xy,
+                'margin': margin, 'tile_size': tile_size, 'cell_size': cell_size,
+                'seed': engine.rng.derive("region{}".format(index))}))
+            process.start()
+            self.connections.append(connection)
+            self.processes.append(process)
+        self.reports = self.replies()
+        # Workers unlink their shared memory on close : also when the engine is not cleaned up
+        atexit.register(self.close)
+
+    def close(self):
+        for connection, process in zip(self.connections, self.processes):
+            try:
+                connection.send(("stop", ()))
+            except (BrokenPipeError, ConnectionResetError):
+                # Worker already gone
+                pass
+            process.join()
+        self.connections, self.processes = list(), list()
+
+    def command(self, name, arguments):
+        # Same command to every region (arguments : one tuple per region), run in parallel
+        for connection, region_arguments in zip(self.connections, arguments):
+            try:
+                connection.send((name, region_arguments))
+            except (BrokenPipeError, ConnectionResetError):
+                # Worker gone : reported by replies()
+                pass
+        return self.replies()
+
+    def replies(self):
+        # One reply per region. A worker that failed or died (e.g. a script started without a __main__ guard
+        # cannot spawn workers) raises here instead of leaving the engine waiting forever.
+        replies = list()
+        for index, (connection, process) in enumerate(zip(self.connections, self.processes)):
+            while not connection.poll(REGION_POLL):
+                if not process.is_alive():
+                    self.close()
+                    raise RuntimeError("Region {} worker died (exit code {})".format(index, process.exitcode))
+            try:
+                ok, reply = connection.recv()
+            except (EOFError, ConnectionResetError):
+                process.join()
+                self.close()
+                raise RuntimeError("Region {} worker died (exit code {})".format(index, process.exitcode)) from None
+            if not ok:
+                self.close()
+                raise RuntimeError("Region {} worker failed:\n{}".format(index, reply))
+            replies.append(reply)
+        return replies
+
+    def receive(self, reports):
+        engine = self.engine
+        for report in reports:
+            for node_ids, parent_ids, generations, genomes in report['born']:
+                engine.population.add_many(numpy.array(genomes, dtype=numpy.float64))
+                engine.lineage.birth_many(node_ids, parent_ids, generations, engine.time, genomes)
+            for node_ids, genomes, cause in report['died']:
+                if node_ids:
+                    engine.population.remove_many(numpy.array(genomes, dtype=numpy.float64))
+                    engine.lineage.death_many(node_ids, engine.time, cause)
+            engine.births += report['births']
+            engine.deaths += report['deaths']
+        self.reports = reports
+
+    def neighbours(self, index, parity):
+        return (
+            self.reports[index - 1]['outboxes'][parity] if index > 0 else None,
+            self.reports[index + 1]['outboxes'][parity] if index < len(self.reports) - 1 else None)
+
+    # ----- Counts ----- #
+
+    def creature_count(self):
+        return sum(report['creatures'] for report in self.reports) + int(self.pending['creatures'].sum())
+
+    def fruit_count(self):
+        return sum(report['fruits'] for report in self.reports) + int(self.pending['fruits'].sum())
+
+    def max_generation(self):
+        return max(report['generation'] for report in self.reports) if self.creature_count() else 0
+
+    def occupancy(self):
+        return max(report['occupancy'] for report in self.reports)
+
+    # ----- Simulation ----- #
+
+    def spawn_creatures(self, count):
+        # Spawned with the next tick
+        self.pending['creatures'] += self.engine.rng.array.multinomial(count, self.weights)
+
+    def spawn_fruits(self, count):
+        self.pending['fruits'] += self.engine.rng.array.multinomial(count, self.weights)
+
+    def step(self):
+        parity = (self.engine.time - 1) % 2
+        arguments = [
+            (self.engine.time, int(creatures), int(fruits), self.neighbours(index, parity))
+            for index, (creatures, fruits) in enumerate(zip(self.pending['creatures'], self.pending['fruits']))]
+        for pending in self.pending.values():
+            pending[:] = 0
+        self.receive(self.command("tick", arguments))
+
+    # ----- Gathering ----- #
+
+    def gather(self, view=None):
+        # Owned rows of every region in one table per kind (with the next uid), lifeform targets relinked
+        replies = self.command("gather", [(view,)] * len(self.connections))
+        tables = dict()
+        for name, columns in (('creatures', CREATURE_COLUMNS), ('fruits', FRUIT_COLUMNS)):
+            tables[name] = gathered_table(
+                columns, self.layouts[name], numpy.concatenate([records[name] for records, _ in replies]))
+            tables[name].uid_tracker = itertools.count(max(uid_next[name] for _, uid_next in replies))
+        relink(tables['creatures'], tables['fruits'], tables['creatures'].rows())
+        return tables
+
+    def sprites(self, view):
+        tables = self.gather((view.left, view.top, view.right, view.bottom))
+        f, c = tables['fruits'], tables['creatures']
+        return table_sprites(self.engine.atlas, f, f.rows(), c, c.rows())
+
+    def lineage_records(self, time):
+        return lineage_records(self.gather()['creatures'], time)
+
+    def state(self):
+        # Same layout as ArrayWorld.state(), plus the exact state of every region (and spawns not handed out yet)
+        meta, columns = dict(), dict()
+        for name, table in self.gather().items():
+            meta[name], table_columns = table.state()
+            columns.update({"{}.{}".format(name, column): array for column, array in table_columns.items()})
+        regions = self.command("save", [()] * len(self.connections))
+        meta['regions'] = {
+            'edges': self.edges,
+            'pending': {name: pending.tolist() for name, pending in self.pending.items()},
+            'states': [region_meta for region_meta, _ in regions]}
+        for index, (_, region_columns) in enumerate(regions):
+            columns.update({"region{}.{}".format(index, column): array for column, array in region_columns.items()})
+        return meta, columns
+
+    def load_state(self, meta, columns):
+        regions = meta.get('regions')
+        if regions and regions['edges'] == self.edges:
+            self.restore_regions(meta, columns)
+            return
+        if regions:
+            warnings.warn("Checkpoint made with {} regions, resumed with {} : rows are redistributed and the run "
+                          "will not match an uninterrupted one".format(len(regions['edges']) - 1, len(self.edges) - 1))
+        self.load_gathered(meta, columns)
+        if regions:
+            # Spawns not handed out yet, split over the new strips
+            self.spawn_creatures(sum(regions['pending']['creatures']))
+            self.spawn_fruits(sum(regions['pending']['fruits']))
+
+    def restore_regions(self, meta, columns):
+        # Same strips : every region picks up exactly where it was
+        arguments = list()
+        for index, region_meta in enumerate(meta['regions']['states']):
+            prefix = "region{}.".format(index)
+            arguments.append((region_meta, {
+                column[len(prefix):]: array for column, array in columns.items() if column.startswith(prefix)}))
+        for name, pending in self.pending.items():
+            pending[:] = meta['regions']['pending'][name]
+        creatures = meta['creatures'], {
+            column[len("creatures."):]: array for column, array in columns.items() if column.startswith("creatures.")}
+        table = Table(CREATURE_COLUMNS, capacity=0)
+        table.load_state(*creatures)
+        self.engine.population.reset(table.genes[table.alive])
+        self.reports = self.command("restore", arguments)
+
+    def load_gathered(self, meta, columns):
+        # Rows go to the region owning their position
+        records, uid_next = [dict() for _ in self.connections], dict()
+        for name, table_columns in (('creatures', CREATURE_COLUMNS), ('fruits', FRUIT_COLUMNS)):
+            prefix = "{}.".format(name)
+            table = Table(table_columns, capacity=0)
+            table.load_state(meta[name], {
+                column[len(prefix):]: array for column, array in columns.items() if column.startswith(prefix)})
+            rows = table.rows()
+            owners = numpy.searchsorted(self.edges[1:-1], table.position[rows, 0], side='right')
+            for index, region_records in enumerate(records):
+                region_records[name] = pack(table, self.layouts[name], rows[owners == index])
+            uid_next[name] = meta[name]['uid_next']
+            if name == 'creatures':
+                self.engine.population.reset(table.genes[rows])
+        for pending in self.pending.values():
+            pending[:] = 0
+        self.reports = self.command("load", [(region_records, uid_next) for region_records in records])
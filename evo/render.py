@@ -0,0 +1,262 @@
+import operator
+import itertools
+import collections
+import numpy
+import pygame
+
+
+# Constants and Defaults
+RENDER_CHUNK_PIXELS = 2**23  # Scaled background chunks kept, in pixels (least recently viewed dropped first)
+RENDER_MARGIN = 64  # Lifeforms are culled by center : keep those this close to the view (sprite overhang)
+RENDER_DIRTY_CELL = 6  # Dirty rects are bucketed in (1 << RENDER_DIRTY_CELL) pixels wide screen cells
+RENDER_DIRTY_MAX = 2000  # Above this many dirty rects, flipping the whole display is cheaper
+RENDER_DIRTY_RATIO = 0.25  # Above this share of changed sprites, redrawing the whole frame is cheaper
+SELECTION_WAYPOINTS_COLOR = (160, 192, 160)
+SELECTION_COLOR = (96, 96, 96)
+SPRITE = operator.attrgetter("sprite")
+POSITION = operator.attrgetter("position")
+
+
+class Renderer():
+
+    # Draws the visible part of the world straight onto the screen. Frame cost and memory follow the screen
+    # size, whatever the map size : the static background is made of one chunk per world tile, generated and
+    # scaled on first view and dropped once out of sight for long enough, and lifeforms outside the view are skipped.
+    # Coordinates : screen = (map + tile + screen_offset) * world_scale
+    # In [dirty] mode, while the view does not change, only sprites that moved, appeared or vanished
+    # (and overlays : UI, selection) are redrawn, and only those screen regions are pushed to the display.
+
+    def __init__(self, engine, tile_size, background_color, dirty=True):
+        # Config
+        self.engine = engine
+        self.tile_size = tile_size
+        self.background_color = background_color
+        self.dirty = dirty
+        # Internals
+        self.chunks = collections.OrderedDict()  # (zoom, tile x, tile y) -> scaled background chunk, by last use
+        self.chunk_pixels = 0
+        self.frame = dict()  # Key -> (sprite, x, y) of sprites drawn last frame (top-left screen corner)
+        self.frame_areas = list()  # Sheet areas (sprite sizes) of last frame
+        self.frame_view = None
+        self.overlays = list()  # Screen rects drawn on top of the world this frame
+        self.updates = None  # Screen rects to push to the display (None : everything)
+
+    def clear(self):
+        # Drop cached chunks (background changed) and redraw everything next frame
+        self.chunks.clear()
+        self.chunk_pixels = 0
+        self.frame_view = None
+
+    @staticmethod
+    def zoom(scale):
+        return round(scale, 2)
+
+    def chunk_offset(self, zoom, tile):
+        # Scaled chunk edges are rounded from tile edges, so chunks tile the screen without gaps
+        return round(tile * self.tile_size * zoom)
+
+    def chunk(self, zoom, tile_x, tile_y):
+        key = (zoom, tile_x, tile_y)
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = self.engine.load_chunk(tile_x, tile_y)
+            if zoom != 1:
+                chunk = pygame.transform.smoothscale(chunk, (
+                    self.chunk_offset(zoom, tile_x + 1) - self.chunk_offset(zoom, tile_x),
+                    self.chunk_offset(zoom, tile_y + 1) - self.chunk_offset(zoom, tile_y)))
+            self.chunks[key] = chunk
+            self.chunk_pixels += chunk.get_width() * chunk.get_height()
+            while self.chunk_pixels > RENDER_CHUNK_PIXELS and len(self.chunks) > 1:
+                _, dropped = self.chunks.popitem(last=False)
+                self.chunk_pixels -= dropped.get_width() * dropped.get_height()
+        else:
+            self.chunks.move_to_end(key)
+        return chunk
+
+    def background_blits(self, zoom, position, rect):
+        # (chunk, screen position, chunk area) of background chunks under screen [rect]
+        step = self.tile_size * zoom
+        tiles = self.engine.world_tiles
+        tiles_x = range(max(int((rect.left - position[0]) // step) - 1, 0),
+                        min(int((rect.right - position[0]) // step) + 2, tiles.x))
+        tiles_y = range(max(int((rect.top - position[1]) // step) - 1, 0),
+                        min(int((rect.bottom - position[1]) // step) + 2, tiles.y))
+        blits = list()
+        for tile_x in tiles_x:
+            left = position[0] + self.chunk_offset(zoom, tile_x)
+            for tile_y in tiles_y:
+                top = position[1] + self.chunk_offset(zoom, tile_y)
+                chunk = self.chunk(zoom, tile_x, tile_y)
+                area = rect.clip(pygame.Rect((left, top), chunk.get_size()))
+                if area:
+                    blits.append((chunk, area.topleft, area.move(-left, -top)))
+        return blits
+
+    def view(self):
+        # Visible map area
+        engine = self.engine
+        return pygame.Rect(
+            engine.screen_to_map(pygame.math.Vector2(0)),
+            (engine.screen_size.vector2 / engine.world_scale))
+
+    def origin(self):
+        # Screen position of the map origin, unscaled
+        return self.engine.screen_offset + pygame.math.Vector2(self.tile_size)
+
+    def to_screen(self, position):
+        return (pygame.math.Vector2(position) + self.origin()) * self.engine.world_scale
+
+    def visible(self, view):
+        # (keys, sprites, centers) of visible lifeforms, fruits first
+        items = list(itertools.chain(self.engine.fruit_grid.items_in(view), self.engine.grid.items_in(view)))
+        sprites = numpy.fromiter(map(SPRITE, items), dtype=numpy.int64, count=len(items))
+        centers = numpy.fromiter(
+            itertools.chain.from_iterable(map(POSITION, items)), dtype=numpy.float64, count=2*len(items))
+        return items, sprites, centers.reshape(-1, 2)
+
+    def draw(self):
+        engine = self.engine
+        scale = engine.world_scale
+        zoom = self.zoom(scale)
+        background_position = (int(engine.screen_offset.x * zoom), int(engine.screen_offset.y * zoom))
+        # Lifeforms : top-left screen corners, computed in bulk
+        view = self.view().inflate(2*RENDER_MARGIN, 2*RENDER_MARGIN)
+        keys, sprites, centers = engine.array_world.sprites(view) if engine.array_world else self.visible(view)
+        sheet, areas = engine.atlas.sheet(zoom)
+        halves = numpy.array([(area.w // 2, area.h // 2) for area in areas], dtype=numpy.int64).reshape(-1, 2)
+        origin = self.origin()
+        corners = ((centers + (origin.x, origin.y)) * zoom).astype(numpy.int64) - halves[sprites]
+        sprites = sprites.tolist()
+        frame = dict(zip(keys, zip(sprites, corners[:, 0].tolist(), corners[:, 1].tolist())))
+        # Full redraw (first frame, view moved / zoomed, dirty mode off)
+        frame_view = (zoom, background_position)
+        redraw = None
+        if self.dirty and frame_view == self.frame_view:
+            redraw = self.dirty_redraw(frame, areas, zoom, background_position)
+        if redraw is None:
+            engine.screen.fill(self.background_color)
+            engine.screen.blits(
+                self.background_blits(zoom, background_position, engine.screen.get_rect()), doreturn=False)
+            engine.screen.blits(list(zip(
+                itertools.repeat(sheet), zip(corners[:, 0].tolist(), corners[:, 1].tolist()),
+                [areas[sprite] for sprite in sprites])), doreturn=False)
+            self.updates = None
+        # Dirty redraw
+        else:
+            engine.screen.blits([(sheet, (x, y), areas[sprite]) for sprite, x, y in redraw], doreturn=False)
+        self.frame = frame
+        self.frame_areas = areas
+        self.frame_view = frame_view
+        self.overlays = list()
+        # Selection
+        if engine.selected:
+            self.draw_selection(engine.selected)
+
+    def dirty_redraw(self, frame, areas, zoom, background_position):
+        # Restores dirty regions, returns the sprites to draw again (None : a full redraw is cheaper)
+        changes, changed = self.changes(frame, areas)
+        if len(changed) > RENDER_DIRTY_RATIO * len(frame):
+            return None
+        dirty, redraw = self.dirty_regions(frame, areas, changes, changed)
+        # Clip first (fill moves partly off-screen rects back on screen instead of clipping them)
+        screen = self.engine.screen
+        screen_rect = screen.get_rect()
+        dirty = [rect for rect in (rect.clip(screen_rect) for rect in dirty) if rect]
+        for rect in dirty:
+            screen.fill(self.background_color, rect)
+        screen.blits([
+            blit for rect in dirty for blit in self.background_blits(zoom, background_position, rect)], doreturn=False)
+        self.updates = dirty
+        return redraw
+
+    def changes(self, frame, areas):
+        # Screen rects of sprites that moved, changed, appeared or vanished since last frame,
+        # along with the keys of those (still visible) sprites.
+        rects, keys = list(), set()
+        previous_frame = self.frame
+        for key, current in frame.items():
+            previous = previous_frame.get(key)
+            if previous != current:
+                sprite, x, y = current
+                rect = pygame.Rect((x, y), areas[sprite].size)
+                if previous is not None:
+                    sprite, x, y = previous
+                    rect.union_ip(pygame.Rect((x, y), self.frame_areas[sprite].size))
+                rects.append(rect)
+                keys.add(key)
+        rects.extend(
+            pygame.Rect((x, y), self.frame_areas[sprite].size)
+            for key, (sprite, x, y) in previous_frame.items() if key not in frame)
+        return rects, keys
+
+    def dirty_regions(self, frame, areas, changes, changed):
+        # Dirty rects, and the sprites to redraw (in drawing order). Redrawn sprites dirty their own rect,
+        # so this grows until no other sprite overlaps : stacking order then matches a full redraw.
+        dirty = self.overlays + changes
+        index = DirtyIndex(dirty)
+        sprites = list(frame.values())
+        redraw = [key in changed for key in frame]
+        growing = True
+        while growing:
+            growing = False
+            for i, (sprite, x, y) in enumerate(sprites):
+                if not redraw[i]:
+                    rect = pygame.Rect((x, y), areas[sprite].size)
+                    if index.touches(rect):
+                        redraw[i] = growing = True
+                        index.add(rect)
+                        dirty.append(rect)
+        return dirty, [sprite for sprite, drawn in zip(sprites, redraw) if drawn]
+
+    def overlay(self, rect):
+        # Registers a rect drawn on top of the world (restored next frame)
+        self.overlays.append(rect)
+
+    def present(self):
+        if self.updates is None or len(self.updates) + len(self.overlays) > RENDER_DIRTY_MAX:
+            pygame.display.flip()
+        else:
+            pygame.display.update(self.updates + self.overlays)
+
+    def draw_selection(self, creature):
+        scale = self.engine.world_scale
+        position = self.to_screen(creature.position)
+        # Past waypoints
+        if creature.waypoints:
+            points = [self.to_screen(wp) for wp in creature.waypoints] + [position]
+            self.overlay(pygame.draw.lines(
+                self.engine.screen, SELECTION_WAYPOINTS_COLOR, False, points, max(round(2*scale), 1)))
+        # Perception
+        self.overlay(pygame.draw.circle(
+            self.engine.screen, SELECTION_COLOR, position, creature.perception.distance*scale, 1))
+        # Target (if any)
+        if creature.target:
+            self.overlay(pygame.draw.line(
+                self.engine.screen, SELECTION_COLOR, position, self.to_screen(creature.target.position), 1))
+
+
+class DirtyIndex():
+
+    # Dirty screen rects, bucketed in (1 << RENDER_DIRTY_CELL) pixels wide cells for overlap tests.
+
+    def __init__(self, rects=()):
+        self.cells = collections.defaultdict(list)
+        for rect in rects:
+            self.add(rect)
+
+    def add(self, rect):
+        cells = self.cells
+        ys = range(rect.top >> RENDER_DIRTY_CELL, (rect.bottom >> RENDER_DIRTY_CELL) + 1)
+        for cx in range(rect.left >> RENDER_DIRTY_CELL, (rect.right >> RENDER_DIRTY_CELL) + 1):
+            for cy in ys:
+                cells[(cx, cy)].append(rect)
+
+    def touches(self, rect):
+        cells = self.cells
+        ys = range(rect.top >> RENDER_DIRTY_CELL, (rect.bottom >> RENDER_DIRTY_CELL) + 1)
+        for cx in range(rect.left >> RENDER_DIRTY_CELL, (rect.right >> RENDER_DIRTY_CELL) + 1):
+            for cy in ys:
+                bucket = cells.get((cx, cy))
+                if bucket and rect.collidelist(bucket) != -1:
+                    return True
+        return False
@@ -0,0 +1,51 @@
+# Constants and Defaults
+SCHEDULER_SLOTS = 256  # Timer wheel size, in ticks (later expiries wait for the wheel to come around)
+
+
+class Scheduler():
+
+    # Timer wheel : items are bucketed by expiry tick (modulo the wheel size), so each tick only looks at
+    # its own bucket. Every tick must be popped, in order. Items can be cancelled (e.g. dead creatures).
+
+    def __init__(self, slots=SCHEDULER_SLOTS):
+        self.slots = slots
+        self.wheel = [list() for _ in range(slots)]
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def schedule(self, time, item):
+        self.wheel[time % self.slots].append((time, item))
+        self.count += 1
+
+    def cancel(self, time, item):
+        # Drops [item], scheduled at [time]
+        bucket = self.wheel[time % self.slots]
+        for index, entry in enumerate(bucket):
+            if entry[1] is item and entry[0] == time:
+                del bucket[index]
+                self.count -= 1
+                return
+
+    def pop(self, time):
+        # Items due at [time] (or earlier), in scheduling order
+        slot = time % self.slots
+        bucket = self.wheel[slot]
+        if not bucket:
+            return list()
+        due = [item for expiry, item in bucket if expiry <= time]
+        self.wheel[slot] = [entry for entry in bucket if entry[0] > time] if len(due) < len(bucket) else list()
+        self.count -= len(due)
+        return due
+
+    def items(self):
+        # Every scheduled item, in scheduling order within each tick's bucket
+        for bucket in self.wheel:
+            for _, item in bucket:
+                yield item
+
+    def clear(self):
+        for bucket in self.wheel:
+            bucket.clear()
+        self.count = 0
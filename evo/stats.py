@@ -0,0 +1,112 @@
+import numpy
+
+
+# Constants and Defaults
+STATS_BINS = 512
+
+
+class GeneStats():
+
+    # Streaming histogram of one gene over [vmin, vmax] (genes are clamped to it), plus running sums.
+    # Quantiles are read from the histogram : cost depends on [bins], not on the population.
+
+    def __init__(self, vmin, vmax, bins=STATS_BINS):
+        # Config
+        self.vmin = vmin
+        self.vmax = vmax
+        self.bins = bins
+        self.bin_size = (vmax - vmin) / bins
+        # Internals
+        self.counts = numpy.zeros(bins, dtype=numpy.int64)
+        self.count = 0
+        self.total = 0.0
+
+    def bin(self, value):
+        return min(max(int((value - self.vmin) / self.bin_size), 0), self.bins - 1)
+
+    def add(self, value):
+        self.counts[self.bin(value)] += 1
+        self.count += 1
+        self.total += value
+
+    def remove(self, value):
+        self.counts[self.bin(value)] -= 1
+        self.count -= 1
+        self.total -= value
+
+    def add_many(self, values):
+        self.counts += self.histogram(values)
+        self.count += len(values)
+        self.total += float(numpy.sum(values))
+
+    def remove_many(self, values):
+        self.counts -= self.histogram(values)
+        self.count -= len(values)
+        self.total -= float(numpy.sum(values))
+
+    def histogram(self, values):
+        bins = numpy.clip(((numpy.asarray(values) - self.vmin) / self.bin_size).astype(numpy.int64), 0, self.bins - 1)
+        return numpy.bincount(bins, minlength=self.bins)
+
+    def clear(self):
+        self.counts[:] = 0
+        self.count = 0
+        self.total = 0.0
+
+    def value(self, bin_index):
+        # Bin center
+        return self.vmin + (bin_index + 0.5) * self.bin_size
+
+    def mean(self):
+        return self.total / self.count if self.count else 0
+
+    def bounds(self):
+        occupied = numpy.flatnonzero(self.counts)
+        if not len(occupied):
+            return (0, 0)
+        return (self.value(occupied[0]), self.value(occupied[-1]))
+
+    def quantiles(self, *ratios):
+        # Same ranks as utils.stat_quantiles : the int(count*ratio)-th smallest value
+        if not self.count:
+            return (0,) * len(ratios)
+        ranks = numpy.cumsum(self.counts)
+        return tuple(
+            self.value(int(numpy.searchsorted(ranks, int(self.count * ratio), side="right")))
+            for ratio in ratios)
+
+
+class PopulationStats():
+
+    # One GeneStats per gene, fed on every birth and death.
+    # Genome rows are sequences of gene values in [genes] order.
+
+    def __init__(self, genes):
+        self.names = tuple(name for name, _ in genes)
+        self.genes = {name: GeneStats(gene.VMIN, gene.VMAX) for name, gene in genes}
+
+    def add(self, genome):
+        for name, value in zip(self.names, genome):
+            self.genes[name].add(value)
+
+    def remove(self, genome):
+        for name, value in zip(self.names, genome):
+            self.genes[name].remove(value)
+
+    def add_many(self, genomes):
+        genomes = numpy.asarray(genomes, dtype=numpy.float64).reshape(-1, len(self.names))
+        for column, name in enumerate(self.names):
+            self.genes[name].add_many(genomes[:, column])
+
+    def remove_many(self, genomes):
+        genomes = numpy.asarray(genomes, dtype=numpy.float64).reshape(-1, len(self.names))
+        for column, name in enumerate(self.names):
+            self.genes[name].remove_many(genomes[:, column])
+
+    def reset(self, genomes):
+        for gene_stats in self.genes.values():
+            gene_stats.clear()
+        self.add_many(genomes)
+
+    def quantiles(self, name, mid=0.5, low=0.1, high=0.9):
+        return self.genes[name].quantiles(mid, low, high)
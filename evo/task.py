@@ -19,6 +19,11 @@ class Task():
     def __bool__(self):
         return self.running
 
+    @property
+    def timed(self):
+        # Timer-only task (nothing to do every tick)
+        return self._update is None
+
     @property
     def running(self):
         return (self.timer > 0) and (not self.aborted)
@@ -36,15 +41,12 @@ class Task():
     def tick(self):
         # Only take action if not aborted
         if not self.aborted:
-            # Validate ...
+            # Update (and validate) ...
             if self.update() is False:
                 self.aborted = True
-            # ... and tick/execute.
+            # ... then tick, and execute action if done.
             else:
-                # Uodate
                 self.timer -= 1
-                self.update()
-                # Execute action if done
                 if self.timer <= 0:
                     self.action()
 
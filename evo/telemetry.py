@@ -0,0 +1,156 @@
+import os
+import json
+import queue
+import threading
+import itertools
+import numpy
+
+
+# Constants and Defaults
+TELEMETRY_VERSION = 1
+TELEMETRY_BUFFER = 1000  # Rows buffered per table before they are handed over to the writer thread
+TELEMETRY_INTERVAL = 100  # Ticks between gene distribution samples
+TELEMETRY_BINS = 32  # Histogram bins per gene (gene statistics bins are summed down to this : must divide them)
+TELEMETRY_QUANTILES = (('p50', 0.5), ('p10', 0.1), ('p90', 0.9))
+TICK_FIELDS = ('time', 'creatures', 'fruits', 'births', 'deaths', 'tps')
+
+# Each table is written twice : [prefix].[table].csv (with a header) and [prefix].[table].f64 (raw little-endian
+# float64 rows, numpy.fromfile(path, "<f8").reshape(-1, len(fields))). [prefix].json describes both
+# (file names are relative to it).
+# Births and deaths are running totals.
+
+
+class Telemetry():
+
+    # Buffered columnar recorder : the simulation loop only appends rows, full buffers are converted
+    # and written by a background thread. With [append] (resumed runs), existing tables are continued
+    # (their schema must match) instead of being started over.
+
+    def __init__(self, prefix, genes, interval=TELEMETRY_INTERVAL, bins=TELEMETRY_BINS, buffer=TELEMETRY_BUFFER,
+                 append=False):
+        # Config
+        self.prefix = prefix
+        self.interval = interval
+        self.bins = bins
+        self.buffer_size = buffer
+        self.genes = tuple(genes)
+        self.tables = {
+            'ticks': TICK_FIELDS,
+            'genes': ('time',) + tuple(
+                "{}_{}".format(gene, stat) for gene in self.genes
+                for stat in ('mean',) + tuple(name for name, _ in TELEMETRY_QUANTILES)
+                + tuple("bin{}".format(i) for i in range(bins)))
+        }
+        # Internals
+        self.buffers = {name: list() for name in self.tables}
+        self.queue = queue.Queue()
+        self.files = dict()
+        self.open(append and os.path.isfile(self.path("json")))
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def path(self, suffix):
+        return "{}.{}".format(self.prefix, suffix)
+
+    def schema(self):
+        return {
+            'version': TELEMETRY_VERSION,
+            'dtype': "<f8",
+            'interval': self.interval,
+            'bins': self.bins,
+            'tables': {
+                name: {
+                    'fields': list(fields),
+                    'csv': os.path.basename(self.path("{}.csv".format(name))),
+                    'raw': os.path.basename(self.path("{}.f64".format(name)))}
+                for name, fields in self.tables.items()}
+        }
+
+    def open(self, append):
+        if append:
+            with open(self.path("json")) as f:
+                if json.load(f) != self.schema():
+                    raise ValueError("Telemetry {} was recorded with other settings (genes, interval or bins) : "
+                                     "use another prefix".format(self.prefix))
+        else:
+            with open(self.path("json"), "w") as f:
+                json.dump(self.schema(), f, indent=2)
+        for name, fields in self.tables.items():
+            csv_file = open(self.path("{}.csv".format(name)), "a" if append else "w")
+            if not append:
+                csv_file.write(",".join(fields) + "\n")
+            self.files[name] = (csv_file, open(self.path("{}.f64".format(name)), "ab" if append else "wb"))
+
+    def resume(self, time):
+        # Run resumed at tick [time] (before any row is recorded) : rows from that tick on were recorded after the
+        # checkpoint, they are dropped as they will be again
+        for name, fields in self.tables.items():
+            csv_file, raw_file = self.files[name]
+            raw = numpy.fromfile(self.path("{}.f64".format(name)), dtype="<f8").reshape(-1, len(fields))
+            count = int(numpy.searchsorted(raw[:, 0], time))
+            raw_file.truncate(count * len(fields) * 8)
+            csv_file.flush()
+            with open(self.path("{}.csv".format(name)), "rb") as f:
+                # Header, then one line per row
+                size = sum(len(line) for line in itertools.islice(f, count + 1))
+            csv_file.truncate(size)
+
+    # ----- Recording (simulation loop) ----- #
+
+    def add(self, table, row):
+        buffer = self.buffers[table]
+        buffer.append(row)
+        if len(buffer) >= self.buffer_size:
+            self.flush(table)
+
+    def flush(self, table):
+        if self.buffers[table]:
+            self.queue.put((table, self.buffers[table]))
+            self.buffers[table] = list()
+
+    def record(self, engine):
+        # Engine metrics every tick, gene distributions every [interval] ticks
+        self.add('ticks', (engine.time, engine.creature_count(), engine.fruit_count(),
+                           engine.births, engine.deaths, engine.tps))
+        if not engine.time % self.interval:
+            self.add('genes', self.gene_row(engine.time, engine.population))
+
+    def gene_row(self, time, population):
+        row = [time]
+        for name in self.genes:
+            gene_stats = population.genes[name]
+            row.append(gene_stats.mean())
+            row.extend(gene_stats.quantiles(*(ratio for _, ratio in TELEMETRY_QUANTILES)))
+            row.extend(gene_stats.counts.reshape(self.bins, -1).sum(axis=1).tolist())
+        return row
+
+    def close(self):
+        for table in self.tables:
+            self.flush(table)
+        self.queue.put(None)
+        self.thread.join()
+
+    # ----- Writing (background thread) ----- #
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            table, rows = item
+            csv_file, raw_file = self.files[table]
+            array = numpy.array(rows, dtype="<f8").reshape(-1, len(self.tables[table]))
+            numpy.savetxt(csv_file, array, fmt="%.10g", delimiter=",")
+            array.tofile(raw_file)
+        for csv_file, raw_file in self.files.values():
+            csv_file.close()
+            raw_file.close()
+
+
+def read(prefix, table):
+    # (fields, rows) of a recorded table, from its raw file
+    with open("{}.json".format(prefix)) as f:
+        schema = json.load(f)
+    fields = schema['tables'][table]['fields']
+    raw = os.path.join(os.path.dirname(str(prefix)), schema['tables'][table]['raw'])
+    return fields, numpy.fromfile(raw, dtype=schema['dtype']).reshape(-1, len(fields))
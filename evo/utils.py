@@ -1,16 +1,20 @@
+import random
+import hashlib
 import pathlib
+import functools
+import numpy
 import pygame
-
-
-pygame.init()
+from evo.assets import AssetPack
 
 
 # ----- Constants ----- #
 
 HOMEDIR = pathlib.Path(__file__).parent.absolute()
 IMAGEDIR = HOMEDIR / "img"
-TEXT_FONT = pygame.font.SysFont(None, 16)
+TEXT_SIZE = 16
 TEXT_COLOR = (0, 0, 0)
+TEXT_CACHE = 512  # Rendered text surfaces kept (least recently used dropped first)
+TEXT_LINE_HEIGHT = 20
 ALPHA_COLOR = (255, 0, 255)
 
 
@@ -18,12 +22,11 @@ ALPHA_COLOR = (255, 0, 255)
 
 class Int2D():
 
+    __slots__ = ('_x', '_y')
+
     def __init__(self, x, y=None):
         self._x = x
-        if y is None:
-            self._y = x
-        else:
-            self._y = y
+        self._y = x if y is None else y
 
     def __repr__(self):
         return "<Int2D({},{})>".format(self.x, self.y)
@@ -84,6 +87,64 @@ class Int2D():
         raise TypeError("Unsupported operation: {} {} {}".format(cls, op, type(other)))
 
 
+class TextPanel():
+
+    # Lines of text composed onto one cached surface, re-rendered only when a line changes.
+
+    def __init__(self, line_height=TEXT_LINE_HEIGHT):
+        self.line_height = line_height
+        self.lines = None
+        self.panel = None
+
+    def surface(self, lines, fg=None):
+        lines = tuple(lines)
+        if lines != self.lines:
+            texts = [gui_text(line, fg=fg) for line in lines]
+            self.panel = pygame.Surface(
+                (max((text.get_width() for text in texts), default=1), max(len(texts), 1) * self.line_height),
+                pygame.SRCALPHA)
+            # Lines do not overlap : copy them as is (blending onto the transparent panel would darken edges)
+            for i, text in enumerate(texts):
+                self.panel.blit(text, (0, i * self.line_height), special_flags=pygame.BLEND_RGBA_MAX)
+            self.lines = lines
+        return self.panel
+
+
+class RandomStreams():
+
+    # Independent random streams (one per subsystem) derived from a single seed, so that a run
+    # is reproducible and e.g. drawing more fruits does not shift mutations.
+
+    STREAMS = ("world", "spawn", "mutation", "behavior")
+    ARRAY_STREAMS = ("array", "fruits")  # Vectorized (NumPy) streams : array backend, batched fruit spawns
+
+    def __init__(self, seed=None):
+        self.seed = random.randrange(2**32) if seed is None else seed
+        for name in self.STREAMS:
+            setattr(self, name, random.Random(self.derive(name)))
+        for name in self.ARRAY_STREAMS:
+            setattr(self, name, numpy.random.default_rng(self.derive(name)))
+
+    def derive(self, name):
+        return int(hashlib.sha256("{}:{}".format(self.seed, name).encode()).hexdigest()[:16], 16)
+
+    def getstate(self):
+        state = {name: getattr(self, name).getstate() for name in self.STREAMS}
+        for name in self.ARRAY_STREAMS:
+            state[name] = getattr(self, name).bit_generator.state
+        return state
+
+    def setstate(self, state):
+        # Accepts states round-tripped through JSON (lists instead of tuples)
+        for name in self.STREAMS:
+            version, internal, gauss = state[name]
+            getattr(self, name).setstate((version, tuple(internal), gauss))
+        for name in self.ARRAY_STREAMS:
+            # Streams missing from older states keep their seed-derived state
+            if name in state:
+                getattr(self, name).bit_generator.state = state[name]
+
+
 # ----- Helpers ----- #
 
 def avg(values):
@@ -124,18 +185,43 @@ def scale(v, old_min, old_max, new_min, new_max):
     return new_min + (new_max - new_min) * (v - old_min) / (old_max - old_min)
 
 
+def init_display(caption=None):
+    # Pygame subsystems are only started once something is rendered (headless runs never start them)
+    if not pygame.display.get_init():
+        pygame.display.init()
+        pygame.font.init()
+    if caption is not None:
+        pygame.display.set_caption(caption)
+
+
+@functools.lru_cache(maxsize=None)
+def text_font():
+    # Pygame's bundled font : no system font scan
+    if not pygame.font.get_init():
+        pygame.font.init()
+    return pygame.font.Font(None, TEXT_SIZE)
+
+
+@functools.lru_cache(maxsize=None)
+def asset_pack():
+    return AssetPack(IMAGEDIR)
+
+
 def gui_text(text, fg=None, bg=None):
-    if fg is None:
-        fg = TEXT_COLOR
-    return TEXT_FONT.render(str(text), True, fg, bg)
+    # Shared surfaces : blit them, never draw on them
+    return render_text(str(text), TEXT_COLOR if fg is None else tuple(fg), None if bg is None else tuple(bg))
+
+
+@functools.lru_cache(maxsize=TEXT_CACHE)
+def render_text(text, fg, bg):
+    return text_font().render(text, True, fg, bg)
 
 
 def load_image_file(file_name, alpha=True) -> pygame.Surface:
-    with open(IMAGEDIR / file_name, "r") as f:
-        img = pygame.image.load(f)
-        if alpha:
-            img.set_colorkey(ALPHA_COLOR)
-        return img.convert()
+    img = asset_pack().surface(file_name)
+    if alpha:
+        img.set_colorkey(ALPHA_COLOR)
+    return img.convert()
 
 
 def load_image_strip(file_name, alpha=True):
@@ -151,14 +237,12 @@ def load_image_strip(file_name, alpha=True):
 
 
 def load_image_files(file_pattern, alpha=True):
-    return [
-        load_image_file(p.name, alpha)
-        for p in IMAGEDIR.glob(file_pattern) if p.is_file()]
+    return [load_image_file(name, alpha) for name in asset_pack().names(file_pattern)]
 
 
 def load_image_strips(file_pattern, alpha=True):
     return sorted(
-        [load_image_strip(f.name, alpha=True) for f in IMAGEDIR.glob(file_pattern) if f.is_file()],
+        [load_image_strip(name, alpha=True) for name in asset_pack().names(file_pattern)],
         key=lambda x: x[0],
         reverse=True
     )
@@ -188,9 +272,7 @@ def load_creature_images(scale_to):
 
 def load_fruit_images():
     sprites = dict()
-    for item in IMAGEDIR.glob("sp_fruit_*.bmp"):
-        if item.is_file():
-            _, _, fruit_type = item.stem.split("_")
-            fruit_image = load_image_file(item.name)
-            sprites[fruit_type] = fruit_image
+    for name in asset_pack().names("sp_fruit_*.bmp"):
+        _, _, fruit_type = pathlib.Path(name).stem.split("_")
+        sprites[fruit_type] = load_image_file(name)
     return sprites
@@ -0,0 +1,587 @@
+import itertools
+import numpy
+from evo import utils
+from evo import dna
+from evo.node import Creature, Fruit
+from evo.lineage import CAUSE_STARVED, CAUSE_EATEN
+
+
+# Constants and Defaults
+TABLE_CAPACITY = 1024
+# - Gene columns
+GENES = dna.GENES
+SIZE, SPEED, PERCEPTION, DIGESTION = range(len(GENES))
+GENE_NAMES = tuple(name for name, _ in dna.GENOME)
+# - Task kinds
+TASK_NONE, TASK_WEAN, TASK_GESTATE, TASK_CONSUME = range(4)
+TASK_VERBS = ("Idle", "Weaning", "Gestating", "Consuming")
+# - Target kinds
+TARGET_NONE, TARGET_EXPLORATION, TARGET_ESCAPE, TARGET_FRUIT, TARGET_CREATURE = range(5)
+# - Fruit kinds
+FRUITS = tuple(Fruit.__subclasses__())
+FRUITS_NUTRITION = numpy.array([f.NUTRITION for f in FRUITS], dtype=numpy.float64)
+# - Table columns : name -> (dtype, width)
+CREATURE_COLUMNS = {
+    'position': (numpy.float64, 2),
+    'energy': (numpy.float64, None),
+    'age': (numpy.float64, None),
+    'nutrition': (numpy.float64, None),
+    'generation': (numpy.int64, None),
+    'parent': (numpy.int64, None),
+    'genes': (numpy.float64, len(GENES)),
+    'cost': (numpy.float64, len(GENES)),
+    'distance': (numpy.float64, None),
+    'carnivore': (numpy.float64, None),
+    'herbivore': (numpy.float64, None),
+    'task': (numpy.int8, None),
+    'timer': (numpy.float64, None),
+    'target': (numpy.int8, None),
+    'target_row': (numpy.int64, None),
+    'target_uid': (numpy.int64, None),
+    'target_position': (numpy.float64, 2),
+    'incapacitated': (bool, None),
+}
+FRUIT_COLUMNS = {
+    'position': (numpy.float64, 2),
+    'nutrition': (numpy.float64, None),
+    'kind': (numpy.int8, None),
+}
+
+
+class Table():
+
+    # Fixed-capacity structure-of-arrays, rows are recycled through the [alive] mask.
+    # columns [dict] : name -> (dtype, width), width=None for scalar columns.
+
+    def __init__(self, columns, capacity=TABLE_CAPACITY):
+        # Config
+        self.columns = dict(columns, uid=(numpy.int64, None))
+        # Internals
+        self.capacity = 0
+        self.count = 0
+        self.alive = numpy.zeros(0, dtype=bool)
+        self.uid_tracker = itertools.count()
+        self.journal = None  # List of allocated / released row batches, when tracked
+        for name, (dtype, width) in self.columns.items():
+            setattr(self, name, numpy.zeros(self._shape(0, width), dtype=dtype))
+        # Initialize
+        self.grow(capacity)
+
+    @staticmethod
+    def _shape(rows, width):
+        return (rows,) if width is None else (rows, width)
+
+    def grow(self, capacity):
+        extra = capacity - self.capacity
+        if extra <= 0:
+            return
+        self.alive = numpy.concatenate((self.alive, numpy.zeros(extra, dtype=bool)))
+        for name, (dtype, width) in self.columns.items():
+            column = getattr(self, name)
+            setattr(self, name, numpy.concatenate((column, numpy.zeros(self._shape(extra, width), dtype=dtype))))
+        self.capacity = capacity
+
+    def allocate(self, count):
+        # Returns [count] free rows, flagged alive and given a fresh uid.
+        free = numpy.flatnonzero(~self.alive)
+        if len(free) < count:
+            self.grow(max(self.capacity * 2, self.capacity + count - len(free)))
+            free = numpy.flatnonzero(~self.alive)
+        rows = free[:count]
+        self.alive[rows] = True
+        self.uid[rows] = numpy.fromiter(itertools.islice(self.uid_tracker, count), dtype=numpy.int64, count=count)
+        self.count += count
+        if self.journal is not None:
+            self.journal.append(rows)
+        return rows
+
+    def release(self, rows):
+        rows = rows[self.alive[rows]]
+        self.alive[rows] = False
+        self.count -= len(rows)
+        if self.journal is not None:
+            self.journal.append(rows)
+        return rows
+
+    def rows(self):
+        return numpy.flatnonzero(self.alive)
+
+    def state(self):
+        uid_next = next(self.uid_tracker)
+        self.uid_tracker = itertools.count(uid_next)
+        columns = {name: getattr(self, name).copy() for name in self.columns}
+        columns['alive'] = self.alive.copy()
+        return {'uid_next': uid_next}, columns
+
+    def load_state(self, meta, columns):
+        for name in self.columns:
+            setattr(self, name, columns[name].copy())
+        self.alive = columns['alive'].copy()
+        self.capacity = len(self.alive)
+        self.count = int(self.alive.sum())
+        self.uid_tracker = itertools.count(meta['uid_next'])
+
+
+def expand_ranges(starts, counts):
+    # Concatenation of range(start, start+count) for every pair, without a Python loop.
+    total = counts.sum()
+    offsets = numpy.repeat(numpy.cumsum(counts) - counts, counts)
+    return numpy.repeat(starts, counts) + numpy.arange(total) - offsets
+
+
+def group_best(groups, scores, count):
+    # Per group (sorted ids in [0, count)) : best positive score and index of the first pair reaching it (or -1).
+    best_score = numpy.zeros(count)
+    best_index = numpy.full(count, -1, dtype=numpy.int64)
+    numpy.maximum.at(best_score, groups, scores)
+    winners = numpy.flatnonzero((scores > 0) & (scores == best_score[groups]))
+    winner_groups, first = numpy.unique(groups[winners], return_index=True)
+    best_index[winner_groups] = winners[first]
+    return best_score, best_index
+
+
+class CellIndex():
+
+    # Table rows bucketed by grid cell : [order] lists rows sorted by cell, cell i spanning
+    # order[start[i]:start[i+1]]. Maintained incrementally : only rows that were added, removed
+    # or changed cell since the last update are re-sorted and spliced in.
+    # static [bool] : rows never move, only the table journal (allocations / releases) is checked.
+
+    def __init__(self, table, map_size, cell_size, static=False):
+        # Config
+        self.table = table
+        self.map_size = map_size
+        self.cell_size = cell_size
+        self.cells = utils.Int2D(utils.ceildiv(map_size.x, cell_size), utils.ceildiv(map_size.y, cell_size))
+        self.static = static
+        # Internals
+        self.order = numpy.zeros(0, dtype=numpy.int64)
+        self.order_cell = numpy.zeros(0, dtype=numpy.int64)
+        self.row_cell = numpy.full(0, -1, dtype=numpy.int64)
+        self.start = numpy.zeros(self.cells.x * self.cells.y + 1, dtype=numpy.int64)
+        if self.static:
+            self.table.journal = list()
+
+    def cell_coords(self, positions):
+        return (
+            numpy.clip((positions[:, 0] // self.cell_size).astype(numpy.int64), 0, self.cells.x - 1),
+            numpy.clip((positions[:, 1] // self.cell_size).astype(numpy.int64), 0, self.cells.y - 1)
+        )
+
+    def update(self):
+        table = self.table
+        # Follow table growth
+        if len(self.row_cell) < table.capacity:
+            self.row_cell = numpy.concatenate((
+                self.row_cell, numpy.full(table.capacity - len(self.row_cell), -1, dtype=numpy.int64)))
+        # Rows to check
+        if self.static:
+            if not table.journal:
+                return
+            rows = numpy.unique(numpy.concatenate(table.journal))
+            table.journal.clear()
+        else:
+            rows = numpy.flatnonzero(table.alive | (self.row_cell[:table.capacity] >= 0))
+        cx, cy = self.cell_coords(table.position[rows])
+        cells = numpy.where(table.alive[rows], cx * self.cells.y + cy, -1)
+        changed = cells != self.row_cell[rows]
+        if not changed.any():
+            return
+        rows, cells = rows[changed], cells[changed]
+        # Drop stale entries...
+        stale = numpy.zeros(len(self.row_cell), dtype=bool)
+        stale[rows] = True
+        keep = ~stale[self.order]
+        self.order, self.order_cell = self.order[keep], self.order_cell[keep]
+        # ... and splice (re)inserted rows at their sorted place.
+        inserted = cells >= 0
+        rows, cells = rows[inserted], cells[inserted]
+        ranking = numpy.argsort(cells, kind='stable')
+        rows, cells = rows[ranking], cells[ranking]
+        slots = numpy.searchsorted(self.order_cell, cells, side='right')
+        self.order = numpy.insert(self.order, slots, rows)
+        self.order_cell = numpy.insert(self.order_cell, slots, cells)
+        self.row_cell[stale] = -1
+        self.row_cell[rows] = cells
+        self.start = numpy.searchsorted(self.order_cell, numpy.arange(self.cells.x * self.cells.y + 1))
+
+    def counts(self):
+        # Population of every cell
+        return numpy.diff(self.start)
+
+    def candidates(self, positions, radius):
+        # Pairs (query index, table row) of rows within [radius] of each query, with offset and distance.
+        xmin, ymin = self.cell_coords(positions - radius[:, None])
+        xmax, ymax = self.cell_coords(positions + radius[:, None])
+        span_y = ymax - ymin + 1
+        boxes = (xmax - xmin + 1) * span_y
+        query = numpy.repeat(numpy.arange(len(positions)), boxes)
+        local = expand_ranges(numpy.zeros(len(positions), dtype=numpy.int64), boxes)
+        cx = xmin[query] + local // span_y[query]
+        cy = ymin[query] + local % span_y[query]
+        # Skip cells whose closest point is out of reach (box corners)
+        dx = numpy.maximum(numpy.maximum(cx * self.cell_size - positions[query, 0], 0),
+                           positions[query, 0] - (cx + 1) * self.cell_size)
+        dy = numpy.maximum(numpy.maximum(cy * self.cell_size - positions[query, 1], 0),
+                           positions[query, 1] - (cy + 1) * self.cell_size)
+        near = dx**2 + dy**2 <= radius[query]**2
+        query, cells = query[near], cx[near] * self.cells.y + cy[near]
+        # Expand cells to their rows, then keep exact matches only
+        counts = self.start[cells+1] - self.start[cells]
+        owner = numpy.repeat(query, counts)
+        rows = self.order[expand_ranges(self.start[cells], counts)]
+        delta = self.table.position[rows] - positions[owner]
+        distance = numpy.hypot(delta[:, 0], delta[:, 1])
+        within = distance <= radius[owner]
+        return owner[within], rows[within], delta[within], distance[within]
+
+
+class ArrayWorld():
+
+    # Vectorized alternative to the sprite backend : same rules as evo.node, applied with
+    # batched array operations over every creature at once. Only rendering goes through pygame.
+
+    EXTRA_COLUMNS = dict()  # Columns added to both tables by subclasses
+
+    def __init__(self, engine, margin, tile_size, cell_size):
+        # Engine
+        self.engine = engine
+        self.tile_size = tile_size
+        # Tables
+        self.creatures = Table(dict(CREATURE_COLUMNS, **self.EXTRA_COLUMNS))
+        self.fruits = Table(dict(FRUIT_COLUMNS, **self.EXTRA_COLUMNS))
+        # Spatial indexes
+        self.cell_size = cell_size
+        self.creature_index = None
+        self.fruit_index = None
+        self.reset_indexes()
+        # Internals
+        self.rng = engine.rng.array
+        self.map_min = utils.Int2D(margin)
+        self.map_max = engine.map_size - margin
+
+    def reset_indexes(self):
+        self.creature_index = CellIndex(self.creatures, self.engine.map_size, self.cell_size)
+        self.fruit_index = CellIndex(self.fruits, self.engine.map_size, self.cell_size, static=True)
+        # Static index : everything alive is new to it.
+        self.fruits.journal.append(self.fruits.rows())
+
+    def state(self):
+        meta, columns = dict(), dict()
+        for name in ('creatures', 'fruits'):
+            meta[name], table_columns = getattr(self, name).state()
+            columns.update({"{}.{}".format(name, column): array for column, array in table_columns.items()})
+        return meta, columns
+
+    def load_state(self, meta, columns):
+        for name in ('creatures', 'fruits'):
+            prefix = "{}.".format(name)
+            getattr(self, name).load_state(meta[name], {
+                column[len(prefix):]: array for column, array in columns.items() if column.startswith(prefix)})
+        self.reset_indexes()
+        self.engine.population.reset(self.creatures.genes[self.creatures.alive])
+
+    def lineage_records(self, time):
+        return lineage_records(self.creatures, time)
+
+    def close(self):
+        pass
+
+    # ----- Counts ----- #
+
+    def creature_count(self):
+        return self.creatures.count
+
+    def fruit_count(self):
+        return self.fruits.count
+
+    def occupancy(self):
+        # Most crowded cell, creatures and fruits together
+        return int((self.creature_index.counts() + self.fruit_index.counts()).max(initial=0))
+
+    # ----- Helpers ----- #
+
+    def random_positions(self, count):
+        return numpy.column_stack((
+            self.rng.uniform(self.map_min.x, self.map_max.x, count),
+            self.rng.uniform(self.map_min.y, self.map_max.y, count)
+        ))
+
+    def bounce_positions(self, positions):
+        # Vectorized Engine.bounce_map_position
+        tile = self.tile_size
+        for axis, vmin, vmax in ((0, self.map_min.x, self.map_max.x), (1, self.map_min.y, self.map_max.y)):
+            low = positions[:, axis] < vmin
+            high = positions[:, axis] > vmax
+            positions[low, axis] = self.rng.uniform(vmin, tile, low.sum())
+            positions[high, axis] = self.rng.uniform(vmax + vmin - tile, vmax, high.sum())
+        return positions
+
+    def derive(self, rows):
+        # Precompute gene costs and derived values for [rows]
+        c = self.creatures
+        genes = c.genes[rows]
+        for column, gene in enumerate(GENES):
+            c.cost[rows, column] = gene.cost_of(genes[:, column])
+        c.distance[rows] = genes[:, PERCEPTION] * dna.Perception.DISTANCE_RATIO
+        c.carnivore[rows] = dna.Digestion.carnivore_of(genes[:, DIGESTION])
+        c.herbivore[rows] = 1 / c.carnivore[rows]
+        c.nutrition[rows] = c.cost[rows, SIZE] * 1800
+
+    def max_generation(self):
+        generations = self.creatures.generation[self.creatures.alive]
+        return int(generations.max()) if len(generations) else 0
+
+    def owned_rows(self):
+        # Creature rows updated by step()
+        return self.creatures.rows()
+
+    # ----- Lifecycle ----- #
+
+    def spawn_fruits(self, count, positions=None):
+        f = self.fruits
+        rows = f.allocate(count)
+        f.position[rows] = self.random_positions(count) if positions is None else positions
+        f.kind[rows] = self.rng.integers(0, len(FRUITS), count)
+        f.nutrition[rows] = FRUITS_NUTRITION[f.kind[rows]]
+        return rows
+
+    def spawn_creatures(self, count, parents=None, positions=None):
+        c = self.creatures
+        # Parent data must be read before allocating (tables may grow)
+        if parents is None:
+            genes = numpy.array([[gene.DEFAULT for gene in GENES]] * count, dtype=numpy.float64)
+            positions = self.random_positions(count) if positions is None else positions
+            generations = numpy.ones(count, dtype=numpy.int64)
+            parent_uids = numpy.full(count, -1, dtype=numpy.int64)
+        else:
+            genes = dna.mutate_many(c.genes[parents], self.rng)
+            positions = c.position[parents].copy()
+            generations = c.generation[parents] + 1
+            parent_uids = c.uid[parents].copy()
+        rows = c.allocate(count)
+        c.genes[rows] = genes
+        self.engine.population.add_many(genes)
+        self.engine.lineage.birth_many(
+            c.uid[rows].tolist(), parent_uids.tolist(), generations.tolist(), self.engine.time, genes.tolist())
+        c.position[rows] = positions
+        c.generation[rows] = generations
+        c.parent[rows] = parent_uids
+        self.derive(rows)
+        c.age[rows] = 0
+        c.energy[rows] = c.nutrition[rows]
+        c.task[rows] = TASK_NONE if parents is None else TASK_WEAN
+        c.timer[rows] = 0 if parents is None else 20
+        c.target[rows] = TARGET_NONE
+        c.incapacitated[rows] = False
+        return rows
+
+    def kill_creatures(self, rows, cause=None):
+        released = self.creatures.release(rows)
+        self.engine.population.remove_many(self.creatures.genes[released])
+        self.engine.lineage.death_many(self.creatures.uid[released].tolist(), self.engine.time, cause)
+        self.engine.deaths += len(released)
+
+    def kill_fruits(self, rows):
+        self.fruits.release(rows)
+
+    # ----- Simulation ----- #
+
+    def target_positions(self, rows):
+        c = self.creatures
+        positions = c.target_position[rows].copy()
+        fruit = c.target[rows] == TARGET_FRUIT
+        positions[fruit] = self.fruits.position[c.target_row[rows[fruit]]]
+        creature = c.target[rows] == TARGET_CREATURE
+        positions[creature] = c.position[c.target_row[rows[creature]]]
+        return positions
+
+    def target_valid(self, rows):
+        # Lifeform targets must still be alive (and not a recycled row)
+        c = self.creatures
+        valid = numpy.ones(len(rows), dtype=bool)
+        for kind, table in ((TARGET_FRUIT, self.fruits), (TARGET_CREATURE, c)):
+            mask = c.target[rows] == kind
+            target_rows = c.target_row[rows[mask]]
+            valid[mask] = table.alive[target_rows] & (table.uid[target_rows] == c.target_uid[rows[mask]])
+        return valid
+
+    def drain(self, consumers, table, kind):
+        # Consumers of a given target kind take one bite each, shared when the target runs dry.
+        c = self.creatures
+        consumers = consumers[c.target[consumers] == kind]
+        if not len(consumers):
+            return
+        targets = c.target_row[consumers]
+        ratio = c.carnivore[consumers] if kind == TARGET_CREATURE else c.herbivore[consumers]
+        bites = ratio * 50
+        requested = numpy.bincount(targets, weights=bites, minlength=table.capacity)
+        available = table.nutrition + 1
+        share = numpy.minimum(1, available / numpy.maximum(requested, 1e-9))
+        drained = bites * share[targets]
+        table.nutrition -= numpy.minimum(requested, available)
+        c.energy[consumers] += drained
+        # Drained dry?
+        dead = numpy.flatnonzero(table.alive & (requested > 0) & (table.nutrition <= 0))
+        if kind == TARGET_CREATURE:
+            self.kill_creatures(dead, CAUSE_EATEN)
+        else:
+            self.kill_fruits(dead)
+
+    def select_targets(self, rows):
+        c, f = self.creatures, self.fruits
+        if not len(rows):
+            return
+        pos = c.position[rows]
+        reach = c.distance[rows]
+        count = len(rows)
+        # Creatures : relatives are ignored, size decides predator / prey.
+        owner, other, delta, dist = self.creature_index.candidates(pos, reach)
+        me = rows[owner]
+        # Same rule as Creature.related (founders are all siblings)
+        related = (c.parent[me] == c.uid[other]) | (c.parent[other] == c.uid[me]) | (c.parent[me] == c.parent[other])
+        visible = ~related
+        predator = visible & (c.genes[other, SIZE] > c.genes[me, SIZE] * 1.25)
+        prey = visible & (c.genes[me, SIZE] > c.genes[other, SIZE] * 1.25)
+        # - Predators : closest wins
+        _, predator_best = group_best(owner, numpy.where(predator, 1 / numpy.maximum(1, dist), 0), count)
+        # - Prey : best nutrition/distance² score wins
+        hunted_score, hunted_best = group_best(
+            owner, numpy.where(prey, c.carnivore[me] * c.nutrition[other] / numpy.maximum(1, dist**2), 0), count)
+        # Fruits
+        fruit_owner, fruit, _, fruit_dist = self.fruit_index.candidates(pos, reach)
+        picked_score, picked_best = group_best(
+            fruit_owner, c.herbivore[rows[fruit_owner]] * f.nutrition[fruit] / numpy.maximum(1, fruit_dist**2), count)
+        # Escape?
+        fleeing = predator_best >= 0
+        if fleeing.any():
+            away = -delta[predator_best[fleeing]]
+            norm = numpy.hypot(away[:, 0], away[:, 1])
+            escape = pos[fleeing] + away / numpy.maximum(norm, 1e-9)[:, None] * reach[fleeing, None] * 0.5
+            # Cannot determine fleeing direction : go anywhere.
+            stuck = norm == 0
+            escape[stuck] = self.random_positions(stuck.sum())
+            fled = rows[fleeing]
+            c.target[fled] = TARGET_ESCAPE
+            c.target_position[fled] = self.bounce_positions(escape)
+        # Hunt ?
+        hunting = ~fleeing & (hunted_best >= 0) & (hunted_score >= picked_score)
+        hunters = rows[hunting]
+        c.target[hunters] = TARGET_CREATURE
+        c.target_row[hunters] = other[hunted_best[hunting]]
+        c.target_uid[hunters] = c.uid[c.target_row[hunters]]
+        # Pick ?
+        picking = ~fleeing & ~hunting & (picked_best >= 0)
+        pickers = rows[picking]
+        c.target[pickers] = TARGET_FRUIT
+        c.target_row[pickers] = fruit[picked_best[picking]]
+        c.target_uid[pickers] = f.uid[c.target_row[pickers]]
+        # Otherwise, continue exploring
+        idle = rows[~fleeing & ~hunting & ~picking & (c.target[rows] == TARGET_NONE)]
+        c.target[idle] = TARGET_EXPLORATION
+        c.target_position[idle] = self.random_positions(len(idle))
+        # Instrumentation
+        profiler = self.engine.profiler
+        if profiler.enabled:
+            profiler.count('selections', count)
+            profiler.count('candidates', len(owner) + len(fruit_owner))
+            profiler.count('targets', len(idle) + int(fleeing.sum()))
+
+    def step(self):
+        c = self.creatures
+        rows = self.owned_rows()
+        # Time passes...
+        c.age[rows] += 1
+        c.energy[rows] -= c.age[rows] * Creature.DECAY + c.cost[rows, PERCEPTION]
+        # Check who ran out of energy.
+        starved = c.energy[rows] <= 0
+        self.kill_creatures(rows[starved], CAUSE_STARVED)
+        rows = rows[~starved]
+        # Ongoing tasks
+        busy = rows[c.task[rows] != TASK_NONE]
+        # - Consumption : drop dead targets, bite the others.
+        consumers = busy[c.task[busy] == TASK_CONSUME]
+        lost = consumers[~self.target_valid(consumers)]
+        c.task[lost] = TASK_NONE
+        c.target[lost] = TARGET_NONE
+        consumers = consumers[c.task[consumers] == TASK_CONSUME]
+        self.drain(consumers, self.fruits, TARGET_FRUIT)
+        self.drain(consumers, c, TARGET_CREATURE)
+        # - Timers
+        busy = busy[c.task[busy] != TASK_NONE]
+        c.timer[busy] -= 1
+        done = busy[c.timer[busy] <= 0]
+        gestated = done[c.task[done] == TASK_GESTATE]
+        c.task[done] = TASK_NONE
+        if len(gestated):
+            c.energy[gestated] -= c.nutrition[gestated] * 0.6
+            self.engine.births += len(gestated)
+            self.spawn_creatures(len(gestated), parents=gestated)
+        # Free creatures
+        active = rows[(c.task[rows] == TASK_NONE) & ~c.incapacitated[rows] & c.alive[rows]]
+        active = active[~numpy.isin(active, done)]
+        # - Reproduction
+        fertile = active[c.energy[active] >= c.nutrition[active] * 1.6]
+        c.task[fertile] = TASK_GESTATE
+        c.timer[fertile] = 30
+        # - Refresh targets : drop dead or out-of-reach prey
+        lost = ~self.target_valid(active)
+        hunting = c.target[active] == TARGET_CREATURE
+        gap = self.target_positions(active[hunting]) - c.position[active[hunting]]
+        lost[hunting] |= numpy.hypot(gap[:, 0], gap[:, 1]) > c.distance[active[hunting]]
+        c.target[active[lost]] = TARGET_NONE
+        self.creature_index.update()
+        self.fruit_index.update()
+        self.select_targets(active[numpy.isin(c.target[active], (TARGET_NONE, TARGET_EXPLORATION))])
+        # - Move
+        vector = self.target_positions(active) - c.position[active]
+        distance = numpy.hypot(vector[:, 0], vector[:, 1])
+        arrived = distance < c.genes[active, SPEED] + c.genes[active, SIZE]
+        # -- Arrived : jump to target, start consuming lifeforms
+        reached = active[arrived]
+        c.position[reached] += vector[arrived]
+        for kind, table in ((TARGET_FRUIT, self.fruits), (TARGET_CREATURE, c)):
+            eaters = reached[c.target[reached] == kind]
+            ratio = c.carnivore[eaters] if kind == TARGET_CREATURE else c.herbivore[eaters]
+            if kind == TARGET_CREATURE:
+                c.incapacitated[c.target_row[eaters]] = True
+            c.task[eaters] = TASK_CONSUME
+            c.timer[eaters] = table.nutrition[c.target_row[eaters]] / (ratio * 50)
+        c.target[reached[numpy.isin(c.target[reached], (TARGET_EXPLORATION, TARGET_ESCAPE))]] = TARGET_NONE
+        # -- Otherwise move towards target
+        moving = active[~arrived]
+        c.position[moving] += vector[~arrived] / distance[~arrived, None] * c.genes[moving, SPEED][:, None]
+        c.energy[moving] -= c.cost[moving, SPEED] * c.cost[moving, SIZE]
+
+    # ----- Rendering ----- #
+
+    @staticmethod
+    def inside(table, view):
+        rows = table.rows()
+        positions = table.position[rows]
+        return rows[
+            (positions[:, 0] >= view.left) & (positions[:, 0] < view.right)
+            & (positions[:, 1] >= view.top) & (positions[:, 1] < view.bottom)]
+
+    def sprites(self, view):
+        # Thin view : nothing is kept per creature.
+        return table_sprites(self.engine.atlas, self.fruits, self.inside(self.fruits, view),
+                             self.creatures, self.inside(self.creatures, view))
+
+
+def table_sprites(atlas, f, fruit_rows, c, creature_rows):
+    # (keys, sprites, centers) of table rows, fruits first. Keys : creature uid, or ~uid for fruits.
+    fruit_sprites = numpy.array([atlas.fruit(fruit.__name__.lower()) for fruit in FRUITS], dtype=numpy.int64)
+    keys = numpy.concatenate((~f.uid[fruit_rows], c.uid[creature_rows])).tolist()
+    sprites = numpy.concatenate((
+        fruit_sprites[f.kind[fruit_rows]],
+        atlas.creatures(c.genes[creature_rows, SIZE], c.genes[creature_rows, DIGESTION])))
+    centers = numpy.concatenate((f.position[fruit_rows], c.position[creature_rows]))
+    return keys, sprites, centers
+
+
+def lineage_records(c, time):
+    # (id, parent, generation, birth, genome) of living creatures
+    return zip(
+        c.uid[c.alive].tolist(), c.parent[c.alive].tolist(), c.generation[c.alive].tolist(),
+        (time - c.age[c.alive]).tolist(), c.genes[c.alive].tolist())
@@ -1,4 +1,6 @@
+import json
 import argparse
+from evo import checkpoint
 from evo.engine import Engine
 
 
@@ -44,15 +46,142 @@ parser.add_argument(
     default=False,
     action='store_true',
     help='Quit on extinction')
-# Parse
-args = parser.parse_args()
-
+# Headless switch
+parser.add_argument(
+    "--headless",
+    required=False,
+    default=False,
+    action='store_true',
+    help='Runs without display, as fast as possible')
+# Tick budget
+parser.add_argument(
+    "--ticks",
+    required=False,
+    default=None,
+    type=int,
+    help='Stop after this many ticks')
+# Simulation backend
+parser.add_argument(
+    "--backend",
+    required=False,
+    default="sprite",
+    choices=("sprite", "array", "region"),
+    help='Simulation backend: sprite (one object per creature), array (vectorized NumPy tables) '
+         'or region (array backend, map split into strips stepped in parallel processes)')
+# Region workers
+parser.add_argument(
+    "--workers",
+    required=False,
+    default=None,
+    type=int,
+    help='Worker processes of the region backend (defaults to CPU count, limited by map width)')
+# Seed
+parser.add_argument(
+    "--seed",
+    required=False,
+    default=None,
+    type=int,
+    help='Random seed (random if omitted)')
+# Resume
+parser.add_argument(
+    "--resume",
+    required=False,
+    default=None,
+    help='Resume from a checkpoint file (map size and backend are taken from it)')
+# Autosave
+parser.add_argument(
+    "--autosave",
+    required=False,
+    default=None,
+    help='Checkpoint file, periodically overwritten')
+parser.add_argument(
+    "--autosave-interval",
+    required=False,
+    default=5000,
+    type=int,
+    help='Ticks between autosaves')
+# Profiling
+parser.add_argument(
+    "--profile",
+    required=False,
+    default=None,
+    help='Enables per-phase profiling and dumps it to this file (.csv or .json)')
+# Lineage
+parser.add_argument(
+    "--lineage",
+    required=False,
+    default=None,
+    help='Archives dead creatures (id, parent, generation, birth / death ticks, cause, genes) to this CSV file')
+# Telemetry
+parser.add_argument(
+    "--telemetry",
+    required=False,
+    default=None,
+    help='Records per-tick metrics and gene distributions to PREFIX.json / .csv / .f64 files')
+parser.add_argument(
+    "--telemetry-interval",
+    required=False,
+    default=100,
+    type=int,
+    help='Ticks between gene distribution samples')
+# Control server
+parser.add_argument(
+    "--control",
+    required=False,
+    default=None,
+    help='Serves metrics, population and selection snapshots and accepts commands (speed, pause, spawn, '
+         'checkpoint) as JSON lines on HOST:PORT or a Unix socket path')
+# Rendering
+parser.add_argument(
+    "--fps",
+    required=False,
+    type=int,
+    default=30,
+    help='Rendered frames per second (simulation speed is set separately, in ticks per second)')
+parser.add_argument(
+    "--chart-interval",
+    required=False,
+    type=int,
+    default=150,
+    help='Ticks between chart samples (the chart shows the latest 250)')
+parser.add_argument(
+    "--full-redraw",
+    action="store_true",
+    help='Redraws the whole screen every frame (disables dirty-rect rendering)')
+# Region backend workers are spawned processes : guard the entry point.
+if __name__ == "__main__":
+    # Parse
+    args = parser.parse_args()
+    if args.resume:
+        header = checkpoint.read_header(args.resume)
+        args.map, args.backend = header['map_tiles'], header['backend']
 
-# Simulation
-engine = Engine(
-    map_tiles=args.map,
-    screen_resolution=args.resolution,
-    fullscreen=args.fullscreen,
-    display=args.display)
-engine.simulate(quit_on_extinct=args.quit)
-engine.cleanup()
+    # Simulation
+    engine = Engine(
+        map_tiles=args.map,
+        screen_resolution=args.resolution,
+        fullscreen=args.fullscreen,
+        display=args.display,
+        headless=args.headless,
+        backend=args.backend,
+        seed=args.seed,
+        autosave=args.autosave,
+        autosave_interval=args.autosave_interval,
+        profile=args.profile is not None,
+        telemetry=args.telemetry,
+        lineage=args.lineage,
+        lineage_append=args.resume is not None,
+        telemetry_interval=args.telemetry_interval,
+        telemetry_append=args.resume is not None,
+        dirty_rects=not args.full_redraw,
+        fps=args.fps,
+        chart_interval=args.chart_interval,
+        workers=args.workers,
+        control=args.control)
+    if args.resume:
+        engine.load_checkpoint(args.resume)
+    stats = engine.simulate(quit_on_extinct=args.quit, ticks=args.ticks)
+    engine.cleanup()
+    if args.profile:
+        engine.profiler.dump(args.profile)
+    print(json.dumps(stats, indent=2))
@@ -0,0 +1,17 @@
+import os
+import itertools
+import pytest
+from evo.node import Node
+
+
+# Headless runs never open a window, pygame only has to import quietly
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+
+@pytest.fixture(autouse=True)
+def node_ids():
+    # Sprite backend ids come from a module-level counter : every test starts from 0
+    Node.id_tracker = itertools.count()
+    yield
+    Node.id_tracker = itertools.count()
@@ -0,0 +1,26 @@
+import json
+import pytest
+from evo import batch
+
+
+def test_sweep_grid_and_seeds():
+    configs = list(batch.sweep(base={'ticks': 10}, grid={'decay': [0.1, 0.2], 'map': [(6, 4)]}, seeds=2))
+    assert configs == [
+        {'ticks': 10, 'seed': 0, 'decay': 0.1, 'map': (6, 4)}, {'ticks': 10, 'seed': 1, 'decay': 0.1, 'map': (6, 4)},
+        {'ticks': 10, 'seed': 0, 'decay': 0.2, 'map': (6, 4)}, {'ticks': 10, 'seed': 1, 'decay': 0.2, 'map': (6, 4)}]
+    assert len({batch.config_key(config) for config in configs}) == 4
+
+
+@pytest.mark.parametrize("grid", [{'decy': [0.1]}, {'seed': [1, 2]}])
+def test_sweep_rejects_unknown_parameters(grid):
+    with pytest.raises(ValueError):
+        list(batch.sweep(grid=grid))
+
+
+def test_runs_are_cached(tmp_path):
+    configs = [{'ticks': 20, 'map': (4, 4), 'seed': 0}]
+    first, = batch.run_batch(configs, workers=1, cache_dir=tmp_path)
+    cached, = batch.run_batch(configs, workers=1, cache_dir=tmp_path)
+    assert not first['cached'] and cached['cached']
+    # Cached as JSON : tuples come back as lists
+    assert cached['stats'] == json.loads(json.dumps(first['stats']))
@@ -0,0 +1,107 @@
+import itertools
+import numpy
+import pytest
+from evo.engine import Engine
+from evo.node import Node
+
+
+# Small worlds, so that every backend runs in a few seconds (region : 2 workers on a map wide enough for 2 strips)
+BACKENDS = {
+    'sprite': {'map_tiles': (6, 4)},
+    'array': {'map_tiles': (6, 4)},
+    'region': {'map_tiles': (12, 4), 'workers': 2}
+}
+TICKS = 300
+
+
+def make(backend, seed, **kwargs):
+    # Sprite ids come from a shared counter : engines are built and run one after the other
+    Node.id_tracker = itertools.count()
+    return Engine(headless=True, backend=backend, seed=seed, **dict(BACKENDS[backend], **kwargs))
+
+
+def fingerprint(engine):
+    # Every living creature (id, age, energy, position) and fruit (id, position), sorted by id
+    if engine.array_world:
+        meta, columns = engine.array_world.state()
+        creatures, fruits = (
+            {name[len(table) + 1:]: column[columns[table + ".alive"]]
+             for name, column in columns.items() if name.startswith(table + ".")}
+            for table in ("creatures", "fruits"))
+        creature_rows = zip(creatures['uid'].tolist(), creatures['age'].tolist(), creatures['energy'].tolist(),
+                            map(tuple, creatures['position'].tolist()))
+        fruit_rows = zip(fruits['uid'].tolist(), map(tuple, fruits['position'].tolist()))
+    else:
+        creature_rows = ((c.id, c.age, c.energy, tuple(c.position)) for c in engine.creatures)
+        fruit_rows = ((f.id, tuple(f.position)) for f in engine.fruits)
+    return sorted(creature_rows), sorted(fruit_rows)
+
+
+def run(engine, ticks):
+    stats = engine.simulate(ticks=ticks)
+    for key in ('elapsed', 'tps'):
+        stats.pop(key)
+    return stats
+
+
+@pytest.fixture(params=list(BACKENDS))
+def backend(request):
+    return request.param
+
+
+def simulate(backend, seed, ticks):
+    engine = make(backend, seed)
+    try:
+        return run(engine, ticks), fingerprint(engine)
+    finally:
+        engine.cleanup()
+
+
+def test_seeded_runs_match(backend):
+    assert simulate(backend, 3, TICKS) == simulate(backend, 3, TICKS)
+
+
+def test_seeds_differ(backend):
+    assert simulate(backend, 3, TICKS)[1] != simulate(backend, 4, TICKS)[1]
+
+
+def test_resume_matches_uninterrupted_run(backend, tmp_path):
+    path = str(tmp_path / "run.ckpt")
+    expected, expected_fingerprint = simulate(backend, 5, 2 * TICKS)
+    saved = make(backend, seed=5)
+    try:
+        run(saved, TICKS)
+        saved.save_checkpoint(path)
+        # Keeps going after the checkpoint : the resumed run must not depend on it
+        run(saved, TICKS // 2)
+    finally:
+        saved.cleanup()
+    # Another seed : everything comes from the checkpoint
+    resumed = make(backend, seed=99)
+    try:
+        resumed.load_checkpoint(path)
+        assert run(resumed, TICKS) == expected
+        assert fingerprint(resumed) == expected_fingerprint
+    finally:
+        resumed.cleanup()
+
+
+def test_region_resume_other_worker_count(tmp_path):
+    # Strips change : rows are redistributed (with a warning), nothing is lost
+    path = str(tmp_path / "run.ckpt")
+    saved = make("region", seed=5)
+    try:
+        run(saved, TICKS)
+        saved.save_checkpoint(path)
+        creatures, fruits = fingerprint(saved)
+    finally:
+        saved.cleanup()
+    resumed = make("region", seed=5, workers=1)
+    try:
+        with pytest.warns(UserWarning):
+            resumed.load_checkpoint(path)
+        assert [len(rows) for rows in fingerprint(resumed)] == [len(creatures), len(fruits)]
+        assert numpy.isclose(sum(energy for _, _, energy, _ in fingerprint(resumed)[0]),
+                             sum(energy for _, _, energy, _ in creatures))
+    finally:
+        resumed.cleanup()
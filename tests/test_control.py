@@ -0,0 +1,144 @@
+import json
+import time
+import socket
+import threading
+import pytest
+from evo import checkpoint
+from evo.control import CONTROL_LINE_LIMIT, CONTROL_SPAWN_MAX
+from evo.engine import Engine
+
+
+@pytest.fixture
+def engine():
+    engine = Engine(headless=True, seed=1, control="127.0.0.1:0")
+    yield engine
+    engine.cleanup()
+
+
+def exchange(engine, requests, family=socket.AF_INET):
+    # Sends each request (dict, or raw line) on one connection and reads its reply, while the main thread plays
+    # the engine's part (running commands and taking snapshots between "ticks"). None : connection closed.
+    replies = list()
+
+    def client():
+        with socket.socket(family, socket.SOCK_STREAM) as connection:
+            connection.connect(engine.control.address)
+            stream = connection.makefile("rwb")
+            for request in requests:
+                line = request if isinstance(request, (str, bytes)) else json.dumps(request)
+                stream.write((line.encode() if isinstance(line, str) else line) + b"\n")
+                stream.flush()
+                reply = stream.readline()
+                replies.append(json.loads(reply) if reply else None)
+
+    # Queries are answered from the latest snapshot : the engine takes one every frame
+    engine.control.update(engine)
+    thread = threading.Thread(target=client, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while thread.is_alive() and time.monotonic() < deadline:
+        engine.control.update(engine)
+        time.sleep(0.002)
+    assert not thread.is_alive()
+    return replies
+
+
+def test_queries(engine):
+    engine.simulate(ticks=20)
+    metrics, population, selected = exchange(engine, [
+        {'command': "metrics", 'id': 7}, {'command': "population"}, {'command': "selected", 'id': "x"}])
+    assert metrics['ok'] and metrics['id'] == 7
+    assert metrics['result']['time'] == 20
+    assert metrics['result']['creatures'] == engine.creature_count()
+    assert metrics['result']['backend'] == "sprite"
+    assert population['ok'] and 'id' not in population
+    size = population['result']['size']
+    assert size['count'] == engine.creature_count()
+    assert sum(size['histogram']) == size['count']
+    assert selected == {'ok': True, 'result': None, 'id': "x"}
+
+
+def test_malformed_requests(engine):
+    replies = exchange(engine, ["not json", "[1, 2]", '{"id": 1}', '{"command": "nope", "id": 2}'])
+    assert [reply['ok'] for reply in replies] == [False] * 4
+    assert replies[2]['error'] == "Expected a JSON object with a command"
+    assert replies[3] == {'ok': False, 'error': "Unknown command: nope", 'id': 2}
+
+
+def test_speed_and_pause(engine):
+    replies = exchange(engine, [
+        {'command': "speed", 'value': 5}, {'command': "pause"}, {'command': "pause"},
+        {'command': "pause", 'paused': True}, {'command': "metrics"}])
+    assert [reply['result'] for reply in replies[:4]] == [5, True, False, True]
+    # Replies come once the snapshot reflects the commands
+    assert replies[4]['result']['speed'] == 5 and replies[4]['result']['paused']
+    assert engine.speed == 5 and engine.paused
+
+
+@pytest.mark.parametrize("value", [-1, 1.5, True, "5", None, float("inf"), 10**7])
+def test_invalid_arguments_only_fail_the_request(engine, value):
+    speed = engine.speed
+    request = json.dumps({'command': "speed", 'value': value}).replace("Infinity", "1e999")
+    reply, = exchange(engine, [request])
+    assert not reply['ok'] and reply['error'].startswith("ValueError")
+    assert engine.speed == speed
+    # The simulation goes on
+    assert engine.simulate(ticks=5)['time'] == 5
+
+
+def test_spawn(engine):
+    creatures, fruits = engine.creature_count(), engine.fruit_count()
+    replies = exchange(engine, [
+        {'command': "spawn", 'kind': "fruits", 'count': 3}, {'command': "spawn", 'kind': "creatures", 'count': 2},
+        {'command': "spawn", 'kind': "rocks", 'count': 1},
+        {'command': "spawn", 'kind': "fruits", 'count': CONTROL_SPAWN_MAX + 1}, {'command': "spawn"}])
+    assert [reply['ok'] for reply in replies] == [True, True, False, False, False]
+    assert replies[4]['error'].startswith("KeyError")
+    assert (engine.creature_count(), engine.fruit_count()) == (creatures + 2, fruits + 3)
+
+
+def test_select(engine):
+    engine.simulate(ticks=1)
+    creature = next(iter(engine.creatures))
+    selected, query, missing, cleared = exchange(engine, [
+        {'command': "select", 'creature': creature.id}, {'command': "selected"},
+        {'command': "select", 'creature': -5}, {'command': "select"}])
+    assert selected['result']['id'] == creature.id and query['result'] == selected['result']
+    assert set(selected['result']['genes']) == set(engine.population.names)
+    assert not missing['ok']
+    assert cleared == {'ok': True, 'result': None} and engine.selected is None
+
+
+def test_select_needs_sprites():
+    engine = Engine(headless=True, seed=1, backend="array", control="127.0.0.1:0")
+    try:
+        reply, = exchange(engine, [{'command': "select", 'creature': 0}])
+        assert reply == {'ok': False, 'error': "ValueError: Selection needs the sprite backend"}
+    finally:
+        engine.cleanup()
+
+
+def test_checkpoint(engine, tmp_path):
+    path = str(tmp_path / "control.ckpt")
+    engine.simulate(ticks=10)
+    written, invalid = exchange(engine, [{'command': "checkpoint", 'path': path}, {'command': "checkpoint", 'path': 3}])
+    assert written == {'ok': True, 'result': True}
+    assert not invalid['ok']
+    engine.control.saver.close()
+    assert checkpoint.read_header(path)['time'] == 10
+
+
+def test_line_limit_closes_the_connection(engine):
+    reply, = exchange(engine, [b"x" * (CONTROL_LINE_LIMIT + 1)])
+    assert reply is None
+    # The server still answers others
+    assert exchange(engine, [{'command': "metrics"}])[0]['ok']
+
+
+def test_unix_socket(tmp_path):
+    engine = Engine(headless=True, seed=1, control=str(tmp_path / "control.sock"))
+    try:
+        reply, = exchange(engine, [{'command': "metrics"}], family=socket.AF_UNIX)
+        assert reply['ok'] and reply['result']['time'] == 0
+    finally:
+        engine.cleanup()
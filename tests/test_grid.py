@@ -0,0 +1,97 @@
+import math
+import numpy
+import pygame
+import pytest
+from evo import utils
+from evo.grid import Grid
+from evo.world import Table, CellIndex, FRUIT_COLUMNS
+
+
+MAP_SIZE = utils.Int2D(1000, 700)
+CELL_SIZE = 64
+
+
+class Item():
+
+    # Anything the grid can hold : a position, and the cell the grid files it under
+
+    def __init__(self, position):
+        self.position = pygame.Vector2(*position)
+        self.grid_cell = None
+
+
+def scatter(rng, count):
+    # Points over the map (lifeforms never leave it), plus a few right on its edges and on cell edges
+    points = rng.uniform((0, 0), MAP_SIZE.xy, size=(count, 2))
+    return numpy.concatenate((points, [(0, 0), MAP_SIZE.xy, (0, 300), (CELL_SIZE, 2 * CELL_SIZE)]))
+
+
+def brute_force(points, position, radius):
+    return sorted(index for index, point in enumerate(points) if math.dist(point, position) <= radius)
+
+
+@pytest.fixture
+def rng():
+    return numpy.random.default_rng(0)
+
+
+@pytest.mark.parametrize("radius", [0, 1, 30, CELL_SIZE, 150, 400, 2000])
+def test_grid_query_matches_brute_force(rng, radius):
+    points = scatter(rng, 500)
+    grid = Grid(MAP_SIZE, CELL_SIZE, levels=4)
+    items = [Item(point) for point in points]
+    for item in items:
+        grid.insert(item)
+    indexes = {item: index for index, item in enumerate(items)}
+    for position in scatter(rng, 50):
+        found = list(grid.query(pygame.Vector2(*position), radius))
+        assert sorted(indexes[item] for item, _ in found) == brute_force(points, position, radius)
+        for item, distance in found:
+            assert distance == pytest.approx(math.dist(item.position, position))
+
+
+def test_grid_follows_moves_and_removals(rng):
+    points = scatter(rng, 300)
+    grid = Grid(MAP_SIZE, CELL_SIZE, levels=3)
+    items = [Item(point) for point in points]
+    for item in items:
+        grid.insert(item)
+    # Half of the items move anywhere, a third are removed
+    for item, point in zip(items[::2], scatter(rng, 300)):
+        item.position.update(*point)
+        grid.move(item)
+    for item in items[::3]:
+        grid.remove(item)
+    # Removed items stay out, even when moved
+    items[0].position.update(10, 10)
+    grid.move(items[0])
+    remaining = [item for index, item in enumerate(items) if index % 3]
+    assert grid.counts.sum() == len(remaining)
+    positions = [tuple(item.position) for item in remaining]
+    indexes = {item: index for index, item in enumerate(remaining)}
+    for position in scatter(rng, 30):
+        found = grid.query(pygame.Vector2(*position), 120)
+        assert sorted(indexes[item] for item, _ in found) == brute_force(positions, position, 120)
+
+
+def test_cell_index_candidates_match_brute_force(rng):
+    table = Table(FRUIT_COLUMNS, capacity=16)
+    index = CellIndex(table, MAP_SIZE, CELL_SIZE)
+    rows = table.allocate(400)
+    table.position[rows] = scatter(rng, 396)
+    index.update()
+    # Rows come and go, others move : only the changes are re-sorted
+    table.release(rows[::5])
+    table.position[rows[1::5]] = rng.uniform((0, 0), MAP_SIZE.xy, size=(len(rows[1::5]), 2))
+    table.position[table.allocate(50)] = rng.uniform((0, 0), MAP_SIZE.xy, size=(50, 2))
+    index.update()
+    alive = table.rows()
+    assert index.counts().sum() == len(alive)
+    queries = scatter(rng, 40)
+    radius = rng.choice([0.0, 20.0, 64.0, 100.0, 350.0], size=len(queries))
+    owner, found, delta, distance = index.candidates(queries, radius)
+    for query, (position, reach) in enumerate(zip(queries, radius)):
+        expected = alive[numpy.hypot(*(table.position[alive] - position).T) <= reach]
+        assert sorted(found[owner == query].tolist()) == sorted(expected.tolist())
+    numpy.testing.assert_allclose(delta, table.position[found] - queries[owner])
+    numpy.testing.assert_allclose(distance, numpy.hypot(delta[:, 0], delta[:, 1]))
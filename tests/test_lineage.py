@@ -0,0 +1,80 @@
+import csv
+import itertools
+import pytest
+from evo.engine import Engine
+from evo.node import Node
+from evo.lineage import Lineage, CAUSE_EATEN, CAUSE_STARVED
+
+
+def family():
+    # 1, 2 : founders, 3 and 4 : children of 1, 5 : child of 3
+    lineage = Lineage(('size',), window=2, spill=1)
+    for node_id, parent_id, generation in ((1, -1, 1), (2, -1, 1), (3, 1, 2), (4, 1, 2), (5, 3, 3)):
+        lineage.birth(node_id, parent_id, generation, 10 * node_id, (1,))
+    return lineage
+
+
+def test_related_follows_creatures():
+    lineage = family()
+    assert lineage.related(1, 2)  # Founders are siblings, as for Creature.related
+    assert lineage.related(1, 3) and lineage.related(3, 1)
+    assert lineage.related(3, 4)
+    assert not lineage.related(2, 3)
+    assert not lineage.related(1, 5)  # Grandparents are not
+    assert not lineage.related(5, 99) and not lineage.related(99, 98)
+
+
+def test_ancestors_and_bounded_window():
+    lineage = family()
+    assert list(lineage.ancestors(5)) == [3, 1]
+    for node_id in (1, 2, 4, 3):
+        lineage.death(node_id, 100, CAUSE_STARVED)
+    # Window of 2 (+1 spill) : the oldest death is dropped (no archive), its id is still known to its children
+    assert lineage.get(1) is None and lineage.archived == 1
+    assert lineage.get(2)[4:] == (100, CAUSE_STARVED)
+    assert list(lineage.ancestors(5)) == [3, 1]
+    assert lineage.related(3, 4)
+
+
+def test_archive_rewinds_to_checkpoint(tmp_path):
+    path = str(tmp_path / "lineage.csv")
+    lineage = Lineage(('size',), archive=path)
+    for node_id in range(5):
+        lineage.birth(node_id, -1, 1, 0, (1.0,))
+    lineage.death(0, 5, CAUSE_EATEN)
+    mark = lineage.mark()
+    lineage.death(1, 8, CAUSE_EATEN)
+    lineage.flush()
+    # Resumed from the checkpoint : the archive continues from where it was then
+    resumed = Lineage(('size',), archive=path, append=True)
+    resumed.rewind(mark)
+    with open(path, newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ['id', 'parent', 'generation', 'birth', 'death', 'cause', 'size']
+    assert [row[0] for row in rows[1:]] == ['0']
+
+
+@pytest.mark.parametrize("backend", ["sprite", "array"])
+def test_resumed_archive_matches_uninterrupted_run(backend, tmp_path):
+    def make(path, seed, append=False):
+        Node.id_tracker = itertools.count()
+        engine = Engine(headless=True, seed=seed, backend=backend, lineage=path, lineage_append=append)
+        engine.lineage.window, engine.lineage.spill_size = 20, 10
+        return engine
+
+    straight = make(str(tmp_path / "straight.csv"), 4)
+    straight.simulate(ticks=1200)
+    straight.cleanup()
+    path = str(tmp_path / "resumed.csv")
+    saved = make(path, 4)
+    saved.simulate(ticks=600)
+    saved.save_checkpoint(str(tmp_path / "run.ckpt"))
+    # Deaths archived after the checkpoint, then a crash
+    saved.simulate(ticks=300)
+    saved.lineage.flush()
+    resumed = make(path, 9, append=True)
+    resumed.load_checkpoint(str(tmp_path / "run.ckpt"))
+    resumed.simulate(ticks=600)
+    resumed.cleanup()
+    with open(str(tmp_path / "straight.csv")) as expected, open(path) as found:
+        assert sorted(found) == sorted(expected)
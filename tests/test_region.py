@@ -0,0 +1,35 @@
+import pytest
+from evo.engine import Engine
+
+
+@pytest.fixture
+def engine():
+    engine = Engine(map_tiles=(12, 4), headless=True, backend="region", seed=2, workers=2)
+    yield engine
+    engine.cleanup()
+
+
+def test_strips_cover_the_map(engine):
+    region_world = engine.array_world
+    assert len(region_world.processes) == 2
+    assert region_world.edges[0] == 0 and region_world.edges[-1] == engine.map_size.x
+    engine.simulate(ticks=100)
+    # Every lifeform is in exactly one strip
+    tables = region_world.gather()
+    assert tables['creatures'].count == engine.creature_count()
+    assert len(set(tables['creatures'].uid[tables['creatures'].alive].tolist())) == engine.creature_count()
+
+
+def test_failed_worker_raises(engine):
+    region_world = engine.array_world
+    with pytest.raises(RuntimeError, match="Region 0 worker failed"):
+        region_world.command("restore", [({}, {})] * 2)
+    # Every worker was stopped
+    assert not region_world.processes
+
+
+def test_dead_worker_raises(engine):
+    region_world = engine.array_world
+    region_world.processes[1].kill()
+    with pytest.raises(RuntimeError, match="Region 1 worker died"):
+        engine.simulate(ticks=1)
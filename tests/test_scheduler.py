@@ -0,0 +1,72 @@
+import pytest
+from evo.engine import Engine
+from evo.scheduler import Scheduler
+
+
+def drain(scheduler, start, stop):
+    # (tick, items) for every tick in [start, stop), popped in order as the engine does
+    return [(time, scheduler.pop(time)) for time in range(start, stop)]
+
+
+def test_items_due_in_scheduling_order():
+    scheduler = Scheduler(slots=8)
+    for item, time in zip("abcdef", (3, 1, 3, 2, 1, 3)):
+        scheduler.schedule(time, item)
+    assert len(scheduler) == 6
+    assert drain(scheduler, 0, 5) == [(0, []), (1, ["b", "e"]), (2, ["d"]), (3, ["a", "c", "f"]), (4, [])]
+    assert len(scheduler) == 0
+
+
+def test_expiries_beyond_the_wheel_wait_for_it_to_come_around():
+    scheduler = Scheduler(slots=4)
+    # Same slot (time % 4), three laps apart
+    scheduler.schedule(9, "late")
+    scheduler.schedule(1, "early")
+    scheduler.schedule(5, "middle")
+    popped = {time: items for time, items in drain(scheduler, 0, 12) if items}
+    assert popped == {1: ["early"], 5: ["middle"], 9: ["late"]}
+
+
+def test_overdue_items_pop_with_their_slot():
+    # Scheduled in the past : due the next time their slot comes up
+    scheduler = Scheduler(slots=4)
+    scheduler.schedule(2, "overdue")
+    assert scheduler.pop(6) == ["overdue"]
+
+
+def test_cancel():
+    scheduler = Scheduler(slots=4)
+    for item, time in (("a", 2), ("b", 2), ("c", 6), ("d", 2)):
+        scheduler.schedule(time, item)
+    scheduler.cancel(2, "b")
+    # Unknown entries (other tick, other item) are ignored
+    scheduler.cancel(6, "a")
+    scheduler.cancel(2, "z")
+    assert len(scheduler) == 3
+    assert list(scheduler.items()) == ["a", "c", "d"]
+    assert scheduler.pop(2) == ["a", "d"]
+    assert scheduler.pop(6) == ["c"]
+
+
+def test_clear():
+    scheduler = Scheduler(slots=4)
+    for time in range(10):
+        scheduler.schedule(time, time)
+    scheduler.clear()
+    assert len(scheduler) == 0
+    assert not list(scheduler.items())
+
+
+@pytest.mark.parametrize("seed", [1, 3])
+def test_engine_asleep_gauge_counts_the_living(seed):
+    # Creatures eaten while asleep leave the scheduler
+    engine = Engine(headless=True, seed=seed)
+    try:
+        for _ in range(6):
+            engine.simulate(ticks=250)
+            asleep = [c for c in engine.creatures if c.slept is not None]
+            assert len(engine.scheduler) == len(asleep)
+            assert sorted(c.id for c in engine.scheduler.items()) == sorted(c.id for c in asleep)
+            assert all(c.wakes >= engine.time for c in asleep)
+    finally:
+        engine.cleanup()
@@ -0,0 +1,71 @@
+import numpy
+import pytest
+from evo import utils
+from evo.dna import GENOME
+from evo.stats import GeneStats, PopulationStats
+
+
+RATIOS = (0.5, 0.1, 0.9, 0.0, 0.99)
+
+
+def reference(values, ratio):
+    # utils.stat_quantiles ranks : the int(count*ratio)-th smallest value
+    return numpy.sort(values)[int(len(values) * ratio)]
+
+
+@pytest.mark.parametrize("count", [1, 2, 10, 999, 20000])
+def test_quantiles_within_half_a_bin(count):
+    rng = numpy.random.default_rng(count)
+    values = rng.normal(1.0, 0.15, size=count).clip(0.5, 1.5)
+    gene_stats = GeneStats(0.5, 1.5)
+    gene_stats.add_many(values)
+    for ratio, quantile in zip(RATIOS, gene_stats.quantiles(*RATIOS)):
+        assert abs(quantile - reference(values, ratio)) <= gene_stats.bin_size / 2 + 1e-12
+    assert gene_stats.mean() == pytest.approx(values.mean())
+    assert gene_stats.count == count
+
+
+def test_quantiles_match_stat_quantiles():
+    # Values on bin centers : histogram quantiles are exact
+    gene_stats = GeneStats(0, 1, bins=100)
+    values = gene_stats.value(numpy.random.default_rng(1).integers(0, 100, size=501))
+    gene_stats.add_many(values)
+    assert gene_stats.quantiles(0.5, 0.1, 0.9) == pytest.approx(utils.stat_quantiles(values.tolist()))
+
+
+def test_values_out_of_range_fall_in_edge_bins():
+    gene_stats = GeneStats(0, 1, bins=10)
+    gene_stats.add_many([-5.0, 7.0])
+    gene_stats.add(1.0)
+    assert gene_stats.counts[0] == 1 and gene_stats.counts[-1] == 2
+    assert gene_stats.bounds() == (gene_stats.value(0), gene_stats.value(9))
+
+
+def test_empty():
+    gene_stats = GeneStats(0, 1)
+    assert gene_stats.quantiles(0.5, 0.1) == (0, 0)
+    assert gene_stats.mean() == 0
+    assert gene_stats.bounds() == (0, 0)
+
+
+def test_population_births_and_deaths():
+    # Incremental updates (one by one or batched) end up where a fresh count of the survivors does
+    rng = numpy.random.default_rng(2)
+    genomes = numpy.column_stack([rng.uniform(gene.VMIN, gene.VMAX, size=3000) for _, gene in GENOME])
+    population = PopulationStats(GENOME)
+    for genome in genomes[:1000]:
+        population.add(genome)
+    population.add_many(genomes[1000:])
+    for genome in genomes[:500]:
+        population.remove(genome)
+    population.remove_many(genomes[2500:])
+    survivors = genomes[500:2500]
+    fresh = PopulationStats(GENOME)
+    fresh.reset(survivors)
+    for column, name in enumerate(population.names):
+        numpy.testing.assert_array_equal(population.genes[name].counts, fresh.genes[name].counts)
+        assert population.genes[name].count == len(survivors)
+        assert population.genes[name].mean() == pytest.approx(survivors[:, column].mean())
+        bin_size = population.genes[name].bin_size
+        for ratio, quantile in zip((0.5, 0.1, 0.9), population.quantiles(name)):
+            assert abs(quantile - reference(survivors[:, column], ratio)) <= bin_size / 2 + 1e-12
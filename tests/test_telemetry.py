@@ -0,0 +1,55 @@
+import numpy
+import pytest
+from evo import telemetry
+from evo.engine import Engine
+
+
+def record(prefix, ticks, **kwargs):
+    engine = Engine(headless=True, seed=4, telemetry=prefix, telemetry_interval=50, **kwargs)
+    engine.simulate(ticks=ticks)
+    return engine
+
+
+def test_tables(tmp_path):
+    prefix = str(tmp_path / "run")
+    record(prefix, 230).cleanup()
+    fields, ticks = telemetry.read(prefix, "ticks")
+    assert fields == list(telemetry.TICK_FIELDS)
+    numpy.testing.assert_array_equal(ticks[:, 0], numpy.arange(230))
+    # CSV holds the same rows
+    csv_rows = numpy.loadtxt(prefix + ".ticks.csv", delimiter=",", skiprows=1)
+    numpy.testing.assert_allclose(csv_rows, ticks, rtol=1e-9)
+    fields, genes = telemetry.read(prefix, "genes")
+    numpy.testing.assert_array_equal(genes[:, 0], [0, 50, 100, 150, 200])
+    bins = [index for index, field in enumerate(fields) if field.startswith("size_bin")]
+    assert len(bins) == telemetry.TELEMETRY_BINS
+    numpy.testing.assert_array_equal(genes[:, bins].sum(axis=1), ticks[genes[:, 0].astype(int), 1])
+
+
+def test_resume_continues_tables(tmp_path):
+    expected, prefix = str(tmp_path / "straight"), str(tmp_path / "resumed")
+    record(expected, 1000).cleanup()
+    saved = record(prefix, 500)
+    saved.save_checkpoint(str(tmp_path / "run.ckpt"))
+    # Rows recorded after the checkpoint, then a crash
+    saved.simulate(ticks=200)
+    saved.cleanup()
+    resumed = Engine(headless=True, seed=1, telemetry=prefix, telemetry_interval=50, telemetry_append=True)
+    resumed.load_checkpoint(str(tmp_path / "run.ckpt"))
+    resumed.simulate(ticks=500)
+    resumed.cleanup()
+    # Same rows (tps aside : measured, not simulated). Means are running sums : restored ones are summed anew.
+    (_, rows), (_, expected_rows) = telemetry.read(prefix, "ticks"), telemetry.read(expected, "ticks")
+    numpy.testing.assert_array_equal(rows[:, :-1], expected_rows[:, :-1])
+    (_, rows), (_, expected_rows) = telemetry.read(prefix, "genes"), telemetry.read(expected, "genes")
+    numpy.testing.assert_allclose(rows, expected_rows, rtol=1e-12)
+    for table in ("ticks", "genes"):
+        with open("{}.{}.csv".format(prefix, table)) as found, open("{}.{}.csv".format(expected, table)) as f:
+            assert [line.split(",")[0] for line in found] == [line.split(",")[0] for line in f]
+
+
+def test_resume_requires_the_same_schema(tmp_path):
+    prefix = str(tmp_path / "run")
+    record(prefix, 10).cleanup()
+    with pytest.raises(ValueError):
+        Engine(headless=True, seed=4, telemetry=prefix, telemetry_interval=10, telemetry_append=True)